@@ -1,6 +1,7 @@
 import subprocess
 import string
 import re
+import os
 import pathlib
 import json
 from datetime import datetime, timedelta
@@ -54,6 +55,10 @@ from plover_cat.spellcheck import *
 from plover_cat.export_helpers import * 
 from plover_cat.FlowLayout import FlowLayout
 from plover_cat.documentWorker import documentWorker
+from plover_cat.export_bundle import bundle_formats
+from plover_cat.searchWorker import searchWorker, snapshot_paragraphs
+from plover_cat.spellcheckWorker import spellcheckWorker
+from plover_cat.importWorker import importWorker
 from plover_cat.captionWorker import captionWorker
 
 scowl = _load_wordlist(ORTHOGRAPHY_WORDLIST, DICTIONARIES_ROOT)
@@ -98,6 +103,21 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
     :ivar thread: thread for non-main thread processing
     :ivar progressBar: instance of ``QProgressBar`` for display
     :ivar caption_cursor_pos: integer position of text last sent to display
+    :ivar gui_refresh_timer: single-shot ``QTimer`` that coalesces ``update_gui`` calls
+    :ivar gui_dirty: set of pane names waiting to be refreshed
+    :ivar gui_rendered: ``pane name: key`` of the block/version each pane last displayed
+    :ivar gui_version: counter bumped on every undo stack change
+    :ivar gui_refresh_counts: ``Counter`` of requested, rendered and skipped pane refreshes
+    :ivar search_worker: running ``searchWorker`` for find all, if any
+    :ivar search_id: id of latest find all search, results from older searches are dropped
+    :ivar search_restart_timer: single-shot ``QTimer`` to re-issue find all as the query is edited
+    :ivar spell_worker: running ``spellcheckWorker``, if any
+    :ivar spell_id: id of latest spellcheck pass, results from older passes are dropped
+    :ivar spell_revision: document revision checked by latest pass, ``None`` if no pass yet
+    :ivar spell_jump_pending: jump to next misspelling when running pass is done
+    :ivar spell_restart_timer: single-shot ``QTimer`` to re-check after edits while underlining
+    :ivar import_worker: running ``importWorker`` for RTF/CRE import, if any
+    :ivar import_bar: ``QProgressBar`` of running RTF/CRE import
 
     """
     def __init__(self, engine):
@@ -157,6 +177,31 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.thread = QThread()
         self.progressBar = QProgressBar()
         self.caption_cursor_pos = 0
+        self.gui_refresh_timer = QTimer(self)
+        self.gui_refresh_timer.setSingleShot(True)
+        # 0 ms fires once the event queue is idle, after all cursor moves of a stroke
+        self.gui_refresh_timer.setInterval(0)
+        self.gui_refresh_timer.timeout.connect(self.flush_gui)
+        self.gui_dirty = set()
+        self.gui_rendered = {}
+        self.gui_version = 0
+        self.gui_refresh_counts = Counter()
+        self.search_worker = None
+        self.search_id = 0
+        self.search_restart_timer = QTimer(self)
+        self.search_restart_timer.setSingleShot(True)
+        self.search_restart_timer.setInterval(300)
+        self.search_restart_timer.timeout.connect(self.search_all)
+        self.spell_worker = None
+        self.spell_id = 0
+        self.import_worker = None
+        self.import_bar = None
+        self.spell_revision = None
+        self.spell_jump_pending = False
+        self.spell_restart_timer = QTimer(self)
+        self.spell_restart_timer.setSingleShot(True)
+        self.spell_restart_timer.setInterval(500)
+        self.spell_restart_timer.timeout.connect(lambda: self.start_spellcheck())
         self.actionUndo = None
         self.actionRedo = None
         self.menu_enabling()
@@ -198,7 +243,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.actionPaste.triggered.connect(lambda: self.paste_steno())
         self.menuClipboard.triggered.connect(self.paste_steno)
         self.actionJumpToParagraph.triggered.connect(self.jump_par)
-        self.navigationList.itemDoubleClicked.connect(self.heading_navigation)
+        self.navigationList.doubleClicked.connect(self.heading_navigation)
         self.actionRevertTranscript.triggered.connect(self.revert_file)
         ## insert related
         self.actionInsertImage.triggered.connect(lambda: self.insert_image())
@@ -254,6 +299,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.search_steno.toggled.connect(lambda: self.search_steno_options())
         self.search_untrans.toggled.connect(lambda: self.search_untrans_options())
         self.searchResults.itemDoubleClicked.connect(self.search_navigation)
+        self.search_term.textEdited.connect(self.search_term_edited)
         ## spellcheck
         ## steno search
         self.steno_spellcheck.clicked.connect(lambda: self.spell_steno())
@@ -271,6 +317,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.actionODT.triggered.connect(lambda: self.export_odt())
         self.actionRTF.triggered.connect(lambda: self.export_rtf())
         self.actionTape.triggered.connect(lambda: self.export_tape())
+        self.actionExportBundle.triggered.connect(lambda: self.export_bundle())
         # help
         self.actionUserManual.triggered.connect(lambda: self.open_help())
         self.actionAbout.triggered.connect(lambda: self.about())
@@ -379,16 +426,75 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
 
     def update_gui(self):
         """Wrapper for updating parts of GUI when cursor changes position.
+
+        Panes are only marked dirty here, the actual refresh is done once
+        in ``flush_gui`` when the event loop is idle, so the many cursor moves
+        made while writing a stroke result in a single refresh.
         """
-        if not self.textEdit:
+        self.mark_gui_dirty("tape", "steno", "block", "style")
+
+    def mark_gui_dirty(self, *panes):
+        """Mark panes for refresh and schedule a refresh if none pending.
+
+        :param panes: pane names, any of ``tape``, ``steno``, ``block``, ``style``
+        """
+        self.gui_refresh_counts["requested"] += len(panes)
+        self.gui_dirty.update(panes)
+        if not self.gui_refresh_timer.isActive():
+            self.gui_refresh_timer.start()
+
+    def flush_gui(self):
+        """Refresh dirty panes that are visible and whose paragraph or version changed.
+        """
+        dirty = self.gui_dirty
+        self.gui_dirty = set()
+        if not self.textEdit or not dirty:
             return
         current_cursor = self.textEdit.textCursor()
-        if current_cursor.block().userData():
-            self.text_to_stroke_move()
-            self.refresh_steno_display(current_cursor)
-            self.display_block_data()
-            self.update_style_display(self.textEdit.textCursor().block().userData()["style"])
-            self.update_navigation()    
+        block_data = current_cursor.block().userData()
+        if not block_data:
+            return
+        if not block_data["style"]:
+            self.textEdit.to_next_style()
+        self.textEdit.showPossibilities()
+        version = (id(self.textEdit), self.gui_version, self.textEdit.document().revision())
+        block_number = current_cursor.blockNumber()
+        pane_keys = {"tape": (version, block_number, current_cursor.positionInBlock()),
+                    "steno": (version, block_number),
+                    "block": (version, block_number),
+                    "style": (version, block_data["style"])}
+        pane_docks = {"tape": "dockPaper", "steno": "dockStenoData", "block": "dockProp", "style": "dockProp"}
+        for pane in ("tape", "steno", "block", "style"):
+            if pane not in dirty:
+                continue
+            if not self.dock_status[pane_docks[pane]]:
+                # hidden docks are refreshed by update_gui when shown again
+                self.gui_refresh_counts["skipped_hidden"] += 1
+                continue
+            if self.gui_rendered.get(pane) == pane_keys[pane]:
+                self.gui_refresh_counts["skipped_unchanged"] += 1
+                continue
+            if pane == "tape":
+                self.text_to_stroke_move()
+            elif pane == "steno":
+                self.refresh_steno_display(current_cursor)
+            elif pane == "block":
+                self.display_block_data()
+            elif pane == "style":
+                self.update_style_display(block_data["style"])
+            self.gui_rendered[pane] = pane_keys[pane]
+            self.gui_refresh_counts["rendered"] += 1
+        self.gui_refresh_counts["flushes"] += 1
+
+    def gui_refresh_stats(self):
+        """Return counts of pane refreshes requested, done and saved.
+
+        :return: dict with ``requested``, ``flushes``, ``rendered``, ``skipped_hidden``,
+            ``skipped_unchanged`` and ``saved`` counts
+        """
+        stats = {key: self.gui_refresh_counts[key] for key in ["requested", "flushes", "rendered", "skipped_hidden", "skipped_unchanged"]}
+        stats["saved"] = stats["requested"] - stats["rendered"]
+        return(stats)
 
     def update_tape(self, txt):
         """Update tape with new stroke(s).
@@ -439,10 +545,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             self.editorNotes.setText(block_data["notes"])
         else:
             self.editorNotes.clear()
-        if not block_data["style"]:
-            self.textEdit.to_next_style()
         self.style_selector.setCurrentText(block_data["style"])
-        self.textEdit.showPossibilities()
 
     def refresh_steno_display(self, cursor = None):
         """Refresh steno display with data from cursor paragraph.
@@ -920,12 +1023,12 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             return
         QDesktopServices.openUrl(QUrl(link.format(current_cursor.selectedText())))
 
-    def heading_navigation(self, item):
+    def heading_navigation(self, index):
         """Jump to paragraph from navigation dock.
 
-        :param item: ``QListWidgetItem``, should have par number in data
+        :param index: ``QModelIndex`` from ``headingModel``, has par number in data
         """
-        block_number = item.data(Qt.UserRole)
+        block_number = index.data(Qt.UserRole)
         log.debug(f"User navigating to block {block_number}.")
         self.textEdit.navigate_to(block_number)
 
@@ -943,6 +1046,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
     def check_undo_stack(self, index):
         """Refresh config and style GUI based on labels in ``QUndoStack``.
         """
+        # any change on the stack invalidates what the panes are showing
+        self.gui_version += 1
         ## bit of hack because it depends on display text of a ``QUndoAction``
         if self.textEdit.undo_stack.undoText().startswith("Config") or self.textEdit.undo_stack.redoText().startswith("Config"):
             self.update_config_gui()
@@ -1033,28 +1138,16 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
             self.menuIndexEntry.addAction(action)  
 
     def update_navigation(self):     
-        """Create ``QListWidgetItems`` to display headings in navigation dock.
+        """Show heading model of current transcript in navigation dock.
+
+        The transcript keeps its ``headingModel`` in sync with edits,
+        so this only needs to be called when switching transcripts.
         """
-        self.navigationList.clear()
-        if not self.dock_status["dockNavigation"]:
-            return
         if not self.textEdit:
+            self.navigationList.setModel(None)
             return
-        block = self.textEdit.document().begin()
-        for i in range(self.textEdit.document().blockCount()):
-            block_data = block.userData()
-            if not block_data: continue
-            if block_data["style"] in self.textEdit.styles and "defaultoutlinelevel" in self.textEdit.styles[block_data["style"]]:
-                item = QListWidgetItem()
-                level = int(self.textEdit.styles[block_data["style"]]["defaultoutlinelevel"])
-                txt = " " * level + block.text()
-                item.setText(txt)
-                item.setData(Qt.UserRole, block.blockNumber())
-                self.navigationList.addItem(item)
-            if block == self.textEdit.document().lastBlock():
-                break
-            block = block.next()   
-        log.debug("Nagivation pane updated.")
+        self.navigationList.setModel(self.textEdit.heading_model)
+        log.debug("Navigation pane set to transcript headings.")
 
     def stroke_to_text_move(self):
         """Locate text in transcript based on selected line in tape.
@@ -1372,9 +1465,12 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.update_tape(self.textEdit.tape)
         self.update_spell_gui()
         self.spell_search.clicked.connect(lambda: self.spellcheck())
-        self.spell_skip.clicked.connect(lambda: self.spellcheck())
+        self.spell_skip.clicked.connect(lambda: self.spellcheck(rescan = False))
         self.spell_ignore_all.clicked.connect(lambda: self.sp_ignore_all())
         self.spellcheck_suggestions.itemDoubleClicked.connect(self.sp_insert_suggest)
+        self.spellcheck_misspelled.itemClicked.connect(self.spell_navigation)
+        self.spell_underline.toggled.connect(self.spell_underline_toggled)
+        self.textEdit.document().contentsChanged.connect(self.spell_document_changed)
         self.dict_selection.activated.connect(self.set_sp_dict)
         self.update_config_gui()
         self.page_width.valueChanged.connect(lambda value, key = "page_width": self.textEdit.set_config_value(key, value))
@@ -1412,6 +1508,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.textEdit.document().blockCountChanged.connect(lambda: self.get_suggestions())
         self.textEdit.cursorPositionChanged.connect(self.update_gui)
         self.textEdit.player.hasVideoChanged.connect(self.set_up_video)
+        self.update_navigation()
 
         # Qt 6 no longer provides isAudioAvailable()/isVideoAvailable().
         # Use presence of an attached audio file and hasVideo() instead.
@@ -1424,6 +1521,11 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
     def breakdown_connections(self):
         """Disconnect GUI and transcript.
         """
+        self.gui_refresh_timer.stop()
+        self.gui_dirty.clear()
+        self.cancel_search()
+        self.searchResults.clear()
+        log.debug(f"GUI refresh stats: {self.gui_refresh_stats()}")
         if self.actionUndo:
             self.menuEdit.removeAction(self.actionUndo)
             self.actionUndo.deleteLater()
@@ -1445,6 +1547,14 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.spellcheck_suggestions.itemDoubleClicked.disconnect()
         self.dict_selection.activated.disconnect()
         self.spell_ignore_all.clicked.disconnect()
+        self.spellcheck_misspelled.itemClicked.disconnect()
+        self.spell_underline.toggled.disconnect()
+        self.textEdit.document().contentsChanged.disconnect(self.spell_document_changed)
+        self.cancel_spellcheck()
+        self.spell_revision = None
+        self.spellcheck_misspelled.clear()
+        self.spellcheck_suggestions.clear()
+        self.spellcheck_result.clear()
         # disconnect all config
         self.page_width.valueChanged.disconnect()
         self.page_height.valueChanged.disconnect()
@@ -1482,6 +1592,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.menuField.clear() # clear field submenu
         self.menuIndexEntry.clear() # clear index submenu
         self.parSteno.clear()
+        self.navigationList.setModel(None)
         if getattr(self.textEdit, "audio_file", None):
             self.textEdit.player.stop()
             self.audio_menu_enabling(False)
@@ -1585,8 +1696,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
     def import_rtf(self):
         """Import RTF/CRE transcript file.
 
-        This will erase existing transcript data if to proceed.
-        Transcript will close and re-open.
+        The file is parsed by an ``importWorker`` on its own thread, and
+        the transcript is replaced in ``import_rtf_preview`` if confirmed.
         """
         selected_folder = pathlib.Path(self.textEdit.file_name)
         selected_file = QFileDialog.getOpenFileName(
@@ -1597,47 +1708,101 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         )
         if not selected_file[0]:
             return
-        log.debug(f"Import RTF {selected_file[0]}.")            
-        if not self.textEdit.document().isEmpty():
-            user_choice = QMessageBox.question(self, "Plover2CAT", "Are you sure you want to import? This erases the present transcript.", QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-            if user_choice == QMessageBox.Yes:
-                log.debug("User choice to import and erase present document.")
-                pass
-            else:
-                log.debug("Abort import.")
-                return
-        self.textEdit.clear()
+        if self.import_worker:
+            QMessageBox.warning(self, "Plover2CAT", "Another import is in process.")
+            return
+        log.debug(f"Import RTF {selected_file[0]}.")
         self.statusBar.showMessage("Parsing RTF.")
-        self.progressBar = QProgressBar(self)
-        self.statusBar.addWidget(self.progressBar)
-        # self.progressBar.show()
-        parse_results = rtf_steno(selected_file[0], self.progressBar)
-        QApplication.setOverrideCursor(Qt.WaitCursor)
-        parse_results.parse_document()
-        QApplication.restoreOverrideCursor()
-        style_dict, renamed_indiv_style = load_rtf_styles(parse_results)
-        rtf_paragraphs = parse_results.paragraphs
-        for ind, par in rtf_paragraphs.items():
-            par["style"] = renamed_indiv_style[int(ind)]
-        file_path = pathlib.Path(pathlib.Path(selected_file[0]).name).with_suffix(".transcript")
+        self.import_bar = QProgressBar(self)
+        self.import_bar.setFormat("Import %p%")
+        self.statusBar.addWidget(self.import_bar)
+        cancel_button = QToolButton(self)
+        cancel_button.setText(_("Cancel"))
+        cancel_button.clicked.connect(self.cancel_import)
+        self.statusBar.addWidget(cancel_button)
+        import_thread = QThread(self)
         transcript_dir = self.textEdit.file_name
+        self.import_worker = importWorker(selected_file[0], transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript"))
+        self.import_worker.moveToThread(import_thread)
+        import_thread.started.connect(self.import_worker.run)
+        self.import_worker.progress.connect(self.import_progress)
+        self.import_worker.imported.connect(self.import_rtf_preview)
+        self.import_worker.postMessage.connect(self.statusBar.showMessage)
+        self.import_worker.finished.connect(import_thread.quit)
+        self.import_worker.finished.connect(self.import_worker.deleteLater)
+        self.import_worker.finished.connect(self.import_bar.deleteLater)
+        self.import_worker.finished.connect(cancel_button.deleteLater)
+        self.import_worker.finished.connect(self.import_done)
+        import_thread.finished.connect(import_thread.deleteLater)
+        import_thread.start()
+
+    def import_progress(self, read, total):
+        """Show progress of ``importWorker``.
+
+        :param int read: characters read
+        :param int total: size of file
+        """
+        if self.import_bar:
+            self.import_bar.setMaximum(total)
+            self.import_bar.setValue(read)
+
+    def cancel_import(self):
+        """Cancel running RTF/CRE import, if any."""
+        if self.import_worker:
+            try:
+                self.import_worker.cancel()
+            except RuntimeError:
+                # worker already deleted after finishing
+                pass
+
+    def import_done(self):
+        """Clear running import after ``importWorker`` is finished."""
+        self.import_worker = None
+        self.import_bar = None
+
+    def import_rtf_preview(self, result):
+        """Show counts of parsed RTF/CRE file, and replace transcript with it if confirmed.
+
+        Transcript will close and re-open.
+
+        :param dict result: parsed file from ``importWorker``
+        """
+        imported_path = pathlib.Path(result["transcript"])
+        transcript_dir = self.textEdit.file_name if self.textEdit else None
+        if imported_path.parent != transcript_dir:
+            # transcript was closed while parsing
+            imported_path.unlink(missing_ok = True)
+            return
+        message = (f"Import {result['paragraphs']} paragraphs, {result['strokes']} strokes "
+                    f"and {len(result['styles'])} styles from {pathlib.Path(result['path']).name}?")
+        if not self.textEdit.document().isEmpty():
+            message += " This erases the present transcript."
+        user_choice = QMessageBox.question(self, "Plover2CAT", message, QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if user_choice != QMessageBox.Yes:
+            log.debug("Abort import.")
+            imported_path.unlink(missing_ok = True)
+            self.statusBar.showMessage("RTF import cancelled.")
+            return
+        log.debug("User choice to import and erase present document.")
+        self.textEdit.clear()
         new_file_path = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript")
-        save_json(rtf_paragraphs, new_file_path)
-        style_file_path = self.textEdit.file_name / "styles" / pathlib.Path(pathlib.Path(selected_file[0]).name).with_suffix(".json")
-        save_json(remove_empty_from_dict(style_dict), style_file_path)
+        os.replace(imported_path, new_file_path)
+        style_file_path = self.textEdit.file_name / "styles" / pathlib.Path(pathlib.Path(result["path"]).name).with_suffix(".json")
+        save_json(remove_empty_from_dict(result["styles"]), style_file_path)
         self.textEdit.set_config_value("style", str(style_file_path))
-        if "paperw" in parse_results.page:
-            self.textEdit.set_config_value("page_width", parse_results.page["paperw"])
-        if "paperh" in parse_results.page:
-            self.textEdit.set_config_value("page_height", parse_results.page["paperh"])
-        if "margl" in parse_results.page:
-            self.textEdit.set_config_value("page_left_margin", parse_results.page["margl"])
-        if "margt" in parse_results.page:
-            self.textEdit.set_config_value("page_top_margin", parse_results.page["margt"])
-        if "margr" in parse_results.page:
-            self.textEdit.set_config_value("page_right_margin", parse_results.page["margr"])
-        if "margb" in parse_results.page:
-            self.textEdit.set_config_value("page_bottom_margin", parse_results.page["margb"])
+        page = result["page"]
+        if "paperw" in page:
+            self.textEdit.set_config_value("page_width", page["paperw"])
+        if "paperh" in page:
+            self.textEdit.set_config_value("page_height", page["paperh"])
+        if "margl" in page:
+            self.textEdit.set_config_value("page_left_margin", page["margl"])
+        if "margt" in page:
+            self.textEdit.set_config_value("page_top_margin", page["margt"])
+        if "margr" in page:
+            self.textEdit.set_config_value("page_right_margin", page["margr"])
+        if "margb" in page:
+            self.textEdit.set_config_value("page_bottom_margin", page["margb"])
         self.textEdit.save_config_file()
         self.textEdit.undo_stack.setClean()
         success = self.close_file()
@@ -1737,8 +1902,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         if self.blockHeadingLevel.currentText() != "":
             new_style_dict["defaultoutlinelevel"] = self.blockHeadingLevel.currentText()
         # compare par and text properties to recursive original format
-        original_style_par = recursive_style_format(self.textEdit.styles, style_name, prop = "paragraphproperties")
-        original_style_txt = recursive_style_format(self.textEdit.styles, style_name, prop = "textproperties")
+        original_style_par = self.textEdit.style_table[style_name]["paragraphproperties"]
+        original_style_txt = self.textEdit.style_table[style_name]["textproperties"]
         log.debug("Old paragraph properties: %s" % original_style_par)
         log.debug("Old text properties: %s" % original_style_txt)
         new_txt_dict = {"fontname": self.blockFont.currentFont().family(), "fontfamily": self.blockFont.currentFont().family(), 
@@ -2233,44 +2398,227 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         log.debug("Selecting %s dictionary for spellcheck" % lang)
         dict_path = self.dict_selection.itemData(index)
         self.textEdit.load_spellcheck_dict(dict_path)
+        self.cancel_spellcheck()
+        self.spell_revision = None
+        self.spellcheck_misspelled.clear()
+        self.spell_highlight()
 
     def sp_check(self, word):
         """Perform spellcheck for a word.
         """
         return self.textEdit.dictionary.lookup(word)
 
-    def spellcheck(self):
-        """Scan text word by word and spellcheck.
+    def spellcheck(self, rescan = True):
+        """Go to next misspelling after the cursor.
+
+        If the transcript has changed since the last pass, and ``rescan`` is ``True``,
+        a new pass is started on a ``spellcheckWorker`` and the jump happens when it is done.
+        Otherwise the misspelling list from the last pass is used directly.
+
+        :param bool rescan: check transcript again if it was edited
         """
+        if not self.textEdit:
+            return
         log.debug("Perform spellcheck.")
+        revision = self.textEdit.document().revision()
+        if self.spell_worker and self.spell_revision == revision:
+            self.spell_jump_pending = True
+        elif self.spell_revision is None or (rescan and self.spell_revision != revision):
+            self.start_spellcheck(jump = True)
+        else:
+            self.spell_jump()
+
+    def start_spellcheck(self, jump = False):
+        """Check whole transcript for misspellings on a worker thread.
+
+        :param bool jump: go to next misspelling after the cursor when done
+        """
+        if not self.textEdit:
+            return
+        self.cancel_spellcheck()
+        self.spell_id += 1
+        self.spell_jump_pending = jump
+        self.spell_revision = self.textEdit.document().revision()
+        self.spellcheck_misspelled.clear()
+        paragraphs = snapshot_paragraphs(self.textEdit.document())
+        log.debug(f"Spellcheck pass {self.spell_id} on {len(paragraphs)} paragraphs.")
+        spell_thread = QThread(self)
+        self.spell_worker = spellcheckWorker(self.spell_id, paragraphs, self.textEdit.dictionary, 
+                                self.textEdit.spell_verdicts, self.textEdit.spell_paragraphs)
+        self.spell_worker.moveToThread(spell_thread)
+        spell_thread.started.connect(self.spell_worker.run)
+        self.spell_worker.misspelled.connect(self.add_misspellings)
+        self.spell_worker.done.connect(self.spellcheck_done)
+        self.spell_worker.postMessage.connect(self.statusBar.showMessage)
+        self.spell_worker.finished.connect(spell_thread.quit)
+        self.spell_worker.finished.connect(self.spell_worker.deleteLater)
+        spell_thread.finished.connect(spell_thread.deleteLater)
+        spell_thread.start()
+
+    def cancel_spellcheck(self):
+        """Cancel running spellcheck pass, if any."""
+        self.spell_restart_timer.stop()
+        self.spell_jump_pending = False
+        if self.spell_worker:
+            try:
+                self.spell_worker.cancel()
+            except RuntimeError:
+                # worker already deleted after finishing
+                pass
+            self.spell_worker = None
+
+    def add_misspellings(self, check_id, chunk):
+        """Add a chunk of misspellings from ``spellcheckWorker`` to the list.
+
+        :param int check_id: id of pass that found the misspellings
+        :param list chunk: ``(block number, start, end, word)`` tuples
+        """
+        if check_id != self.spell_id:
+            return
+        for block_number, start, end, word in chunk:
+            if word in self.textEdit.spell_ignore:
+                continue
+            item = QListWidgetItem()
+            item.setText(word)
+            item.setToolTip(f"Paragraph {block_number}")
+            item.setData(Qt.UserRole, (block_number, start, end, word))
+            self.spellcheck_misspelled.addItem(item)
+
+    def spellcheck_done(self, check_id):
+        """Update underlines and jump if requested after a pass is done.
+
+        :param int check_id: id of pass that is done
+        """
+        if check_id != self.spell_id:
+            return
+        self.spell_worker = None
+        self.spell_highlight()
+        if self.spell_jump_pending:
+            self.spell_jump_pending = False
+            self.spell_jump()
+
+    def spell_locate(self, item):
+        """Return cursor selecting the misspelling of a list item, ``None`` if it is gone.
+
+        Positions are from the last pass, so if the paragraph was edited since,
+        the occurrence of the word closest to the old position is used.
+
+        :param item: ``QListWidgetItem`` from ``spellcheck_misspelled``
+        """
+        block_number, start, end, word = item.data(Qt.UserRole)
+        block = self.textEdit.document().findBlockByNumber(block_number)
+        if not block.isValid():
+            return None
+        text = block.text()
+        if text[start:end] != word:
+            found = [m.start() for m in re.finditer(r"(?<!\w)%s(?!\w)" % re.escape(word), text)]
+            if not found:
+                return None
+            start = min(found, key = lambda pos: abs(pos - start))
+            end = start + len(word)
+        cursor = self.textEdit.textCursor()
+        cursor.setPosition(block.position() + start)
+        cursor.setPosition(block.position() + end, QTextCursor.KeepAnchor)
+        return(cursor)
+
+    def spell_select(self, item):
+        """Select misspelling in transcript and show suggestions.
+
+        :param item: ``QListWidgetItem`` from ``spellcheck_misspelled``
+        :return: ``True`` if misspelling is still in transcript
+        """
+        cursor = self.spell_locate(item)
+        if not cursor:
+            return(False)
+        word = item.data(Qt.UserRole)[3]
+        self.textEdit.setTextCursor(cursor)
+        self.spellcheck_misspelled.setCurrentItem(item)
+        log.debug("Spellcheck: this word %s not in dictionary." % word)
+        suggestions = [sug for sug in self.textEdit.dictionary.suggest(word)]
+        self.spellcheck_result.setText(word)
+        self.spellcheck_suggestions.clear()
+        self.spellcheck_suggestions.addItems(suggestions)
+        return(True)
+
+    def spell_jump(self, row = None):
+        """Go to first misspelling in list after the cursor.
+
+        :param int row: start from this row of the list instead of the cursor position
+        """
         current_cursor = self.textEdit.textCursor()
-        old_cursor_position = current_cursor.block().position()
-        self.textEdit.setTextCursor(current_cursor)
-        while not current_cursor.atEnd():
-            current_cursor.movePosition(QTextCursor.NextWord)
-            current_cursor.movePosition(QTextCursor.EndOfWord, QTextCursor.KeepAnchor)
-            result = self.sp_check(current_cursor.selectedText())
-            if not result and current_cursor.selectedText() not in self.textEdit.spell_ignore:
-                self.textEdit.setTextCursor(current_cursor)
-                log.debug("Spellcheck: this word %s not in dictionary." % current_cursor.selectedText())
-                suggestions = [sug for sug in self.textEdit.dictionary.suggest(current_cursor.selectedText())]
-                self.spellcheck_result.setText(current_cursor.selectedText())
-                self.spellcheck_suggestions.clear()
-                self.spellcheck_suggestions.addItems(suggestions)
-                break
-        if current_cursor.atEnd():
-            QMessageBox.information(self, "Plover2CAT", "End of document.")
+        cursor_place = (current_cursor.blockNumber(), current_cursor.selectionEnd() - current_cursor.block().position())
+        from_cursor = row is None
+        row = row or 0
+        while row < self.spellcheck_misspelled.count():
+            item = self.spellcheck_misspelled.item(row)
+            block_number, start, end, word = item.data(Qt.UserRole)
+            if from_cursor and (block_number, start) < cursor_place:
+                row += 1
+                continue
+            if word in self.textEdit.spell_ignore or not self.spell_select(item):
+                # ignored or edited away since the pass
+                self.spellcheck_misspelled.takeItem(row)
+                continue
+            return
+        self.spellcheck_result.clear()
+        self.spellcheck_suggestions.clear()
+        QMessageBox.information(self, "Plover2CAT", "End of document.")
+
+    def spell_navigation(self, item):
+        """Go to misspelling selected in list.
+
+        :param item: ``QListWidgetItem`` from ``spellcheck_misspelled``
+        """
+        if not self.spell_select(item):
+            self.statusBar.showMessage("Misspelling no longer in transcript.")
+            self.spellcheck_misspelled.takeItem(self.spellcheck_misspelled.row(item))
+
+    def spell_highlight(self):
+        """Underline listed misspellings in the transcript if enabled."""
+        if not self.textEdit:
+            return
+        selections = []
+        if self.spell_underline.isChecked():
+            char_format = QTextCharFormat()
+            char_format.setUnderlineStyle(QTextCharFormat.SpellCheckUnderline)
+            char_format.setUnderlineColor(QColor(Qt.red))
+            for row in range(self.spellcheck_misspelled.count()):
+                cursor = self.spell_locate(self.spellcheck_misspelled.item(row))
+                if not cursor:
+                    continue
+                selection = QTextEdit.ExtraSelection()
+                selection.cursor = cursor
+                selection.format = char_format
+                selections.append(selection)
+        self.textEdit.setExtraSelections(selections)
+
+    def spell_underline_toggled(self, checked):
+        """Show or hide underlines, checking the transcript first if needed."""
+        if checked and self.spell_revision != self.textEdit.document().revision():
+            self.start_spellcheck()
+        else:
+            self.spell_highlight()
+
+    def spell_document_changed(self):
+        """Schedule a new pass after edits while underlines are shown."""
+        if self.spell_underline.isChecked():
+            self.spell_restart_timer.start()
 
     def sp_ignore_all(self):
-        """Add word to be ignored by spellchecking.
+        """Add word to be ignored by spellchecking, and go to next misspelling.
         """
-        if self.spellcheck_result.text() != "":
-            self.textEdit.spell_ignore.append(self.spellcheck_result.text())
+        word = self.spellcheck_result.text()
+        if word != "":
+            self.textEdit.spell_ignore.append(word)
             log.debug("Ignored spellcheck words: %s" % self.textEdit.spell_ignore)
-        self.spellcheck()
+            for row in reversed(range(self.spellcheck_misspelled.count())):
+                if self.spellcheck_misspelled.item(row).text() == word:
+                    self.spellcheck_misspelled.takeItem(row)
+            self.spell_highlight()
+        self.spellcheck(rescan = False)
 
     def sp_insert_suggest(self, item = None):
-        """Perform spellcheck replacement.
+        """Perform spellcheck replacement, and go to next misspelling.
 
         :param item: a ``QListWidgetItem``, if ``None``, use selected from GUI
         """
@@ -2279,7 +2627,16 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         log.debug("Spellcheck correction: %s" % item.text())
         self.textEdit.undo_stack.beginMacro("Spellcheck: correct to %s" % item.text())
         self.replace(to_next = False, steno = "", replace_term= item.text())
-        self.textEdit.undo_stack.endMacro()  
+        self.textEdit.undo_stack.endMacro()
+        current = self.spellcheck_misspelled.currentItem()
+        if current:
+            # positions after the correction have shifted, so continue from the list row
+            row = self.spellcheck_misspelled.row(current)
+            self.spellcheck_misspelled.takeItem(row)
+            self.spell_highlight()
+            self.spell_jump(row)
+        else:
+            self.spellcheck(rescan = False)
 
     def search(self, direction = 1):
         """Search wrapper.
@@ -2297,49 +2654,86 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
 
     def search_all(self):
         """Find all matches and display in pane.
+
+        The paragraphs are copied and searched by a ``searchWorker`` on its own thread,
+        matches are added to the pane in chunks as they are found.
+        A running search is cancelled when a new one is started.
         """
-        cursor = self.textEdit.textCursor()
-        old_wrap_state = self.search_wrap.isChecked()
-        if old_wrap_state:
-            self.search_wrap.setChecked(False)
-        old_cursor_position = cursor.block().position()        
-        cursor.movePosition(QTextCursor.Start)
-        search_status = True
-        log.debug("Search all, starting from beginning.")
-        while search_status:
-            search_status = self.search()
-            if search_status is None:
-                break
-            match_start = self.textEdit.textCursor().selectionStart()
-            match_end = self.textEdit.textCursor().selectionEnd()
+        if not self.textEdit:
+            return
+        self.cancel_search()
+        self.searchResults.clear()
+        if self.search_untrans.isChecked():
+            mode = "untrans"
+        elif self.search_steno.isChecked():
+            mode = "steno"
+        elif self.search_regex.isChecked():
+            mode = "regex"
+        else:
+            mode = "text"
+        query = self.search_term.text()
+        if not query and mode != "untrans":
+            return
+        self.search_id += 1
+        paragraphs = snapshot_paragraphs(self.textEdit.document(), steno = mode == "steno")
+        log.debug(f"Search all {self.search_id}: {mode} search for {query} in {len(paragraphs)} paragraphs.")
+        search_thread = QThread(self)
+        self.search_worker = searchWorker(self.search_id, paragraphs, query, mode = mode, 
+                                case = self.search_case.isChecked(), whole = self.search_whole.isChecked())
+        self.search_worker.moveToThread(search_thread)
+        search_thread.started.connect(self.search_worker.run)
+        self.search_worker.matches.connect(self.add_search_matches)
+        self.search_worker.postMessage.connect(self.statusBar.showMessage)
+        self.search_worker.finished.connect(search_thread.quit)
+        self.search_worker.finished.connect(self.search_worker.deleteLater)
+        search_thread.finished.connect(search_thread.deleteLater)
+        search_thread.start()
+
+    def cancel_search(self):
+        """Cancel running find all search, if any."""
+        self.search_restart_timer.stop()
+        if self.search_worker:
+            try:
+                self.search_worker.cancel()
+            except RuntimeError:
+                # worker already deleted after finishing
+                pass
+            self.search_worker = None
+
+    def search_term_edited(self, text):
+        """Re-issue find all after the query is edited, if results are displayed."""
+        if self.searchResults.count() > 0 or self.search_worker:
+            self.search_restart_timer.start()
+
+    def add_search_matches(self, search_id, chunk):
+        """Add a chunk of matches from ``searchWorker`` to the results pane.
+
+        :param int search_id: id of search that found the matches
+        :param list chunk: ``(block number, start, end, preview)`` tuples
+        """
+        if search_id != self.search_id:
+            return
+        for block_number, start, end, preview in chunk:
             item = QListWidgetItem()
-            current_cursor = self.textEdit.textCursor()
-            current_cursor.movePosition(QTextCursor.PreviousWord, QTextCursor.MoveAnchor, 2)
-            while current_cursor.selectionEnd() < match_end:
-                current_cursor.movePosition(QTextCursor.NextWord, QTextCursor.KeepAnchor, 2)
-            match_text = current_cursor.selectedText()
-            item.setText(match_text)
-            item.setData(Qt.UserRole, (match_start, match_end))
+            item.setText(preview)
+            item.setData(Qt.UserRole, (block_number, start, end))
             self.searchResults.addItem(item)
-        log.debug("Attempting to set cursor back to original position after search all.")
-        cursor.setPosition(old_cursor_position)
-        self.textEdit.setTextCursor(cursor)
-        self.search_wrap.setChecked(old_wrap_state)
-        # store search options
-        # then set wrapped false
-        # move cursor to top of document
-        # loop search
-        # for each match, append existing cursor with selection to qtextedit.extraSelections
-        # at end of document, stop
-        # for each selection, reverse 2 words
-        # add as item to qlistview, elide right 
 
     def search_navigation(self, item):
-        start_pos, end_pos = item.data(Qt.UserRole)
+        """Select search match in transcript.
+
+        :param item: ``QListWidgetItem`` with paragraph and positions in paragraph as data
+        """
+        block_number, start_pos, end_pos = item.data(Qt.UserRole)
         log.debug("Navigating to selected search match.")
+        block = self.textEdit.document().findBlockByNumber(block_number)
+        if not block.isValid():
+            self.statusBar.showMessage("Match no longer in transcript.")
+            return
         current_cursor = self.textEdit.textCursor()
-        current_cursor.setPosition(start_pos)
-        current_cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
+        end_pos = min(end_pos, block.length() - 1)
+        current_cursor.setPosition(block.position() + min(start_pos, end_pos))
+        current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
         self.textEdit.setTextCursor(current_cursor)
 
     def text_search(self, direction = 1):
@@ -2349,6 +2743,10 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         """
         flags = QTextDocument.FindFlags()
         search = self.search_term.text()
+        if self.search_regex.isChecked():
+            search = QRegularExpression(search)
+            if not self.search_case.isChecked():
+                search.setPatternOptions(QRegularExpression.CaseInsensitiveOption)
         if self.search_case.isChecked():
             flags |= QTextDocument.FindCaseSensitively
         if self.search_whole.isChecked():
@@ -2517,6 +2915,7 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         if self.search_text.isChecked():
             log.debug("Set options for text search.")
             self.search_case.setEnabled(True)
+            self.search_regex.setEnabled(True)
             self.search_whole.setChecked(False)
             self.search_term.setEnabled(True)
             self.search_whole.setEnabled(True)
@@ -2527,6 +2926,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         if self.search_steno.isChecked():
             log.debug("Set options for steno search.")
             self.search_case.setEnabled(False)
+            self.search_regex.setChecked(False)
+            self.search_regex.setEnabled(False)
             self.search_whole.setChecked(True)
             self.search_term.setEnabled(True)
             self.search_whole.setEnabled(False)
@@ -2537,6 +2938,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         if self.search_untrans.isChecked():
             log.debug("Set options for untrans search.")
             self.search_term.setEnabled(False)
+            self.search_regex.setChecked(False)
+            self.search_regex.setEnabled(False)
             self.search_case.setEnabled(False)
             self.search_whole.setChecked(False)
             self.search_whole.setEnabled(False)  
@@ -2787,22 +3190,24 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
                 self.setup_caption_window(self.caption_dialog.font, self.caption_dialog.maxDisplayLines.value())
                 # if captions are enabled in middle of document, don't start from beginning
                 self.caption_cursor_pos = self.textEdit.textCursor().position()
-                self.thread = QThread()
+                cap_thread = QThread(self)
                 self.cap_worker = captionWorker(max_length = self.caption_dialog.capLength.value(), max_lines = self.caption_dialog.maxDisplayLines.value(),
-                                    remote = self.caption_dialog.remoteCapHost.currentText(), endpoint = self.caption_dialog.hostURL.text(), 
-                                    port = self.caption_dialog.serverPort.text(), password = self.caption_dialog.serverPassword.text())
-                self.cap_worker.moveToThread(self.thread)
-                self.thread.started.connect(self.cap_worker.make_caps)
-                self.cap_worker.finished.connect(self.thread.quit)
+                                    remotes = self.caption_dialog.remote_settings())
+                self.cap_worker.moveToThread(cap_thread)
+                cap_thread.started.connect(self.cap_worker.make_caps)
+                self.cap_worker.finished.connect(cap_thread.quit)
                 self.cap_worker.finished.connect(self.cap_worker.deleteLater)
+                cap_thread.finished.connect(cap_thread.deleteLater)
                 self.cap_worker.capSend.connect(self.add_cap)
                 self.cap_worker.postMessage.connect(self.statusBar.showMessage)
-                self.thread.start()
+                cap_thread.start()
             else:
                 self.actionCaptioning.setChecked(False)
         else:
-            # do cleanup
-            self.cap_worker.clean_and_stop()
+            # do cleanup, worker stops on its thread after sending text already written
+            if self.cap_worker:
+                self.cap_worker.stopRequested.emit()
+                self.cap_worker = None
             self.caption_edit.clear()
             self.caption_window.hide()
 
@@ -2849,20 +3254,22 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         current_cursor.setPosition(self.caption_cursor_pos, QTextCursor.KeepAnchor)
         new_text = current_cursor.selectedText()
         self.caption_cursor_pos = new_pos
-        self.cap_worker.intake(new_text)
+        self.cap_worker.textIntake.emit(new_text)
 
     def flush_caption(self):
         """Send all remaining text up to cursor to caption display.
         """
+        if not self.cap_worker:
+            return
         old_pos = self.caption_cursor_pos
         current_cursor = self.textEdit.textCursor()
         current_cursor.setPosition(old_pos) 
         current_cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
         new_text = current_cursor.selectedText()
         if new_text == "":
-            self.cap_worker.intake("\n" + "\u2029")
+            self.cap_worker.textIntake.emit("\n" + "\u2029")
         else:
-            self.cap_worker.intake(new_text)
+            self.cap_worker.textIntake.emit(new_text)
         self.caption_cursor_pos = current_cursor.selectionEnd()
 
     def export_text(self):
@@ -2931,7 +3338,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        layout_cache = self.textEdit.layout_cache, style_table = self.textEdit.style_table)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_ascii)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -2964,7 +3372,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        layout_cache = self.textEdit.layout_cache, style_table = self.textEdit.style_table)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_html)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -2996,7 +3405,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        style_table = self.textEdit.style_table)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_plain_ascii)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3027,7 +3437,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        style_table = self.textEdit.style_table)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_srt)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3060,7 +3471,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        style_table = self.textEdit.style_table)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_odf)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3093,7 +3505,8 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.progressBar.setFormat("Export transcript paragraph %v")
         self.statusBar.addWidget(self.progressBar)
         self.progressBar.show()
-        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name)
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), selected_file[0], deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        layout_cache = self.textEdit.layout_cache, style_table = self.textEdit.style_table)
         self.worker.moveToThread(self.thread)
         self.thread.started.connect(self.worker.save_rtf)
         self.worker.progress.connect(self.progressBar.setValue)
@@ -3101,3 +3514,40 @@ class PloverCATWindow(QMainWindow, Ui_PloverCAT):
         self.worker.finished.connect(self.worker.deleteLater)
         self.worker.finished.connect(lambda: self.statusBar.showMessage("Exported in RTF/CRE format."))
         self.thread.start()
+
+    def export_bundle(self):
+        """Export transcript to all formats in ``bundle_formats`` in one job.
+        """
+        selected_folder = pathlib.Path(self.textEdit.file_name) / "export"
+        selected_file = QFileDialog.getSaveFileName(
+            self,
+            _("Export All Deliverables"),
+            str(selected_folder.joinpath(self.textEdit.file_name.stem))
+            , _("Base file name (*)")
+        )
+        if not selected_file[0]:
+            return
+        if self.thread and self.thread.isRunning():
+            QMessageBox.warning(self, "Plover2CAT", "Another export is in process.")
+            return        
+        self.save_file()
+        # each format adds its own suffix
+        base_path = pathlib.Path(selected_file[0])
+        if base_path.suffix in bundle_formats.values():
+            base_path = base_path.with_suffix("")
+        log.debug(f"Exporting bundle to {base_path}")
+        self.thread = QThread()
+        self.progressBar = QProgressBar(self)
+        self.progressBar.setMaximum(len(self.textEdit.backup_document))
+        self.progressBar.setFormat("Export transcript paragraph %v")
+        self.statusBar.addWidget(self.progressBar)
+        self.progressBar.show()
+        self.worker = documentWorker(deepcopy(self.textEdit.backup_document), str(base_path), deepcopy(self.textEdit.config), deepcopy(self.textEdit.styles), deepcopy(self.textEdit.user_field_dict), self.textEdit.file_name,
+                                        layout_cache = self.textEdit.layout_cache, style_table = self.textEdit.style_table)
+        self.worker.moveToThread(self.thread)
+        self.thread.started.connect(self.worker.save_bundle)
+        self.worker.progress.connect(self.progressBar.setValue)
+        self.worker.finished.connect(self.thread.quit)
+        self.worker.finished.connect(self.worker.deleteLater)
+        self.worker.finished.connect(lambda: self.statusBar.showMessage("Exported all deliverables."))
+        self.thread.start()
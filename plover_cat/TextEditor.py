@@ -25,9 +25,11 @@ from plover import log
 from plover_cat.qcommands import *
 from plover_cat.steno_objects import *
 from plover_cat.rtf_parsing import *
-from plover_cat.export_helpers import load_odf_styles, recursive_style_format, parprop_to_blockformat, txtprop_to_textformat
-from plover_cat.helpers import ms_to_hours, save_json, backup_dictionary_stack, add_custom_dicts, load_dictionary_stack_from_backup, return_commits, hide_file
+from plover_cat.export_helpers import load_odf_styles, resolved_style_table
+from plover_cat.helpers import ms_to_hours, save_json, backup_dictionary_stack, add_custom_dicts, load_dictionary_stack_from_backup, return_commits, hide_file, config_with_defaults
 from plover_cat.constants import default_styles, default_config, default_dict
+from plover_cat.headingModel import headingModel
+from plover_cat.export_bundle import text_layout_cache
 
 class PloverCATEditor(QTextEdit):
     """Editor object for a transcript.
@@ -46,6 +48,7 @@ class PloverCATEditor(QTextEdit):
     :ivar dict styles: transcript style parameters
     :ivar dict txt_formats: ``QTextCharFormat`` objects for each style by name
     :ivar dict par_formats: ``QTextBlockFormat`` objects for each style by name
+    :ivar style_table: ``resolved_style_table`` of current style revision, shared with exports
     :ivar dict highlight_colors: ``QColor`` objects for each element type
     :ivar dict user_field_dict: dict ref of ``self.config["user_field_dict"]``
     :ivar dict auto_paragraph_affixes: dict ref of ``self.config["auto_paragraph_affixes"]``
@@ -60,11 +63,16 @@ class PloverCATEditor(QTextEdit):
     :ivar list spell_ignore: words to ignore in spellcheck, session only
     :ivar dictionary: ``spylls`` dictionary 
     :ivar dictionary_name: name of ``dictionary``, usually the language code
+    :ivar dict spell_verdicts: ``word: bool`` memoized lookups in ``dictionary``
+    :ivar dict spell_paragraphs: ``paragraph text: misspellings`` from last spellcheck pass
+    :ivar layout_cache: ``text_layout_cache`` of paragraph layouts from last text export
     :ivar audio_file: path to file being played/recorded
     :ivar player: ``QMediaPlayer``
     :ivar recorder: ``QMediaRecorder``
     :ivar int audio_position: current position of media being played
     :ivar int audio_delay: offset to subtract from ``audio_position``
+    :ivar heading_model: ``headingModel`` of heading paragraphs for navigation
+    :ivar element_registry: ``element_registry`` of paragraphs holding fields, indexes, images and automatic text
 
     """
     send_message = Signal(str)
@@ -99,6 +107,7 @@ class PloverCATEditor(QTextEdit):
         self.styles = {}
         self.txt_formats = {}
         self.par_formats = {}
+        self.style_table = resolved_style_table()
         self.highlight_colors = {}
         self.user_field_dict = {}
         self.auto_paragraph_affixes = {}    
@@ -114,6 +123,9 @@ class PloverCATEditor(QTextEdit):
         self.spell_ignore = []
         self.dictionary = Dictionary.from_files('en_US')
         self.dictionary_name = "en_US"
+        self.spell_verdicts = {}
+        self.spell_paragraphs = {}
+        self.layout_cache = text_layout_cache()
         self._completer = None
         # media
         self.audio_file = ""
@@ -123,6 +135,8 @@ class PloverCATEditor(QTextEdit):
         self.recorder = QMediaRecorder()
         self.audio_position = 0
         self.audio_delay = 0
+        self.heading_model = headingModel(self)
+        self.element_registry = element_registry()
 
     def setCompleter(self, c):
         """Set autocompletion for transcript."""
@@ -227,6 +241,7 @@ class PloverCATEditor(QTextEdit):
         else:
             self.backup_document = import_version_two(json_document)
         self.clear()
+        self.element_registry.reset()
         self.moveCursor(QTextCursor.Start)
         document_cursor = self.textCursor()
         ef = element_factory()
@@ -242,6 +257,7 @@ class PloverCATEditor(QTextEdit):
             block_data["strokes"] = element_collection()
             document_cursor.block().setUserData(block_data)
             block_data["strokes"] = element_collection(el_list)
+            self.element_registry.refresh_block(document_cursor.blockNumber(), block_data["strokes"])
             if block_data["style"] not in self.par_formats:
                 block_data["style"] = next(iter(self.par_formats))
             document_cursor.setBlockFormat(self.par_formats[block_data["style"]])
@@ -273,6 +289,7 @@ class PloverCATEditor(QTextEdit):
             document_cursor.block().setUserData(BlockUserData())
             self.to_next_style()
         self.undo_stack.clear()
+        self.heading_model.reset_headings()
         self.send_message.emit("Loaded transcript.")   
 
     def load_tape(self):
@@ -392,6 +409,8 @@ class PloverCATEditor(QTextEdit):
         """
         self.clear()
         self.backup_document = {}
+        self.heading_model.reset_headings()
+        self.element_registry.reset()
 
     def dulwich_save(self, message = "autosave"):
         """Commit transcript files to ``dulwich`` repo.
@@ -443,12 +462,7 @@ class PloverCATEditor(QTextEdit):
         self.send_message.emit(f"Loading configuration file from {str(config_path)}")
         with open(config_path, "r") as f:
             config_contents = json.loads(f.read())
-        new_vals = {"page_line_numbering": False, "page_linenumbering_increment": 1, "page_timestamp": False, "page_max_char": 0, "page_max_line": 0, 
-                    "header_left": "", "header_center": "", "header_right": "", 
-                    "footer_left": "", "footer_center": "", "footer_right": "", "enable_automatic_affix": False,
-                    "user_field_dict": user_field_dict, "auto_paragraph_affixes": {}}
-        new_vals.update(config_contents)
-        self.config = new_vals
+        self.config = config_with_defaults(config_contents)
         self.user_field_dict = self.config["user_field_dict"]
         self.auto_paragraph_affixes = self.config["auto_paragraph_affixes"]
 
@@ -478,6 +492,9 @@ class PloverCATEditor(QTextEdit):
         """
         self.dictionary = Dictionary.from_files(dic_path)
         self.dictionary_name = pathlib.Path(dic_path).stem
+        # verdicts are only valid for the dictionary that made them
+        self.spell_verdicts = {}
+        self.spell_paragraphs = {}
 
     def load_dicts(self, engine, dictionaries = None):
         """Load dictionaries for transcript.
@@ -629,18 +646,16 @@ class PloverCATEditor(QTextEdit):
 
     def gen_style_formats(self):
         """Generate ``QText*Format`` objects from style dictionary.
+
+        Makes a new ``style_table`` for the next style revision. This is only
+        called when the style file is loaded or a style is updated.
         """
-        styles_json = self.styles
-        txt_formats = {}
-        par_formats = {}
         log.debug("Creating block and text formats from styles.")
-        for k, v in styles_json.items():
-            style_par = recursive_style_format(styles_json, k, prop = "paragraphproperties")
-            style_txt = recursive_style_format(styles_json, k, prop = "textproperties")
-            par_formats[k] = parprop_to_blockformat(style_par)
-            txt_formats[k] = txtprop_to_textformat(style_txt)
-        self.txt_formats = txt_formats
-        self.par_formats = par_formats        
+        self.style_table = resolved_style_table(self.styles, self.style_table.revision + 1)
+        self.par_formats = {k: self.style_table.block_format(k) for k in self.styles}
+        self.txt_formats = {k: self.style_table.char_format(k) for k in self.styles}
+        # outline levels may have changed with the styles
+        self.heading_model.reset_headings()
 
     def set_style_property(self, name, attribute, value, paragraph = False, text = False):
         """Set a style attribute given name, and type of property.
@@ -1065,29 +1080,23 @@ class PloverCATEditor(QTextEdit):
         :return: dictionary of indices with nested entries
         """
         index_dict = {}
-        current_cursor = self.textCursor()
-        block = self.document().begin()
-        # if len(self.toPlainText()) == 0:
-        #     return(index_dict)
-        for i in range(self.document().blockCount()):
-            # print(block.blockNumber())
-            if block.userData():
-                block_strokes = block.userData()["strokes"]
-                for ind, el in enumerate(block_strokes):
-                    # print(ind)
-                    if el.element == "index":
-                        if el.indexname not in index_dict:
-                            index_dict[el.indexname] = {}
-                        if "prefix" not in index_dict[el.indexname]:
-                            index_dict[el.indexname]["prefix"] = el.prefix
-                        if "hidden" not in index_dict[el.indexname]:
-                            index_dict[el.indexname]["hidden"] = el.hidden
-                        if "entries" not in index_dict[el.indexname]:
-                            index_dict[el.indexname]["entries"] = {}
-                        index_dict[el.indexname]["entries"][el.data] = el.description
-            if block == self.document().lastBlock():
-                break
-            block = block.next()
+        # only paragraphs with index entries, in document order
+        for block_number in self.element_registry.blocks_with("index"):
+            block = self.document().findBlockByNumber(block_number)
+            if not block.userData():
+                continue
+            block_strokes = block.userData()["strokes"]
+            for el in block_strokes:
+                if el.element == "index":
+                    if el.indexname not in index_dict:
+                        index_dict[el.indexname] = {}
+                    if "prefix" not in index_dict[el.indexname]:
+                        index_dict[el.indexname]["prefix"] = el.prefix
+                    if "hidden" not in index_dict[el.indexname]:
+                        index_dict[el.indexname]["hidden"] = el.hidden
+                    if "entries" not in index_dict[el.indexname]:
+                        index_dict[el.indexname]["entries"] = {}
+                    index_dict[el.indexname]["entries"][el.data] = el.description
         return(index_dict)       
 
     def insert_index_entry(self, el):
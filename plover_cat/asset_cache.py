@@ -0,0 +1,97 @@
+import os
+import pathlib
+import mimetypes
+from hashlib import blake2b
+from plover import log
+from plover_cat.steno_objects import image_to_rtf
+
+class image_asset_cache:
+    """Cache of encoded images for export, keyed by a hash of the image file contents.
+
+    The RTF encoding of each unique image is saved as ``<hash>.pict`` in the
+    ``cache`` folder of the project ``assets``, so an image is only decoded and
+    re-encoded as PNG the first time it is exported, or after the file changes.
+    In ODF export, every unique image is embedded once, under a name made from
+    its hash, and all occurrences refer to that copy.
+
+    The cache is a shared service for elements, so copies of an element share
+    the same cache. It can be sent to a process pool, each process then keeps
+    its own hashes and reads encodings saved by the others.
+
+    :param asset_dir: path to project ``assets`` folder
+    :ivar dict digests: ``path: (modified time, size, hash)`` of image files hashed in this export
+    :ivar dict encodings: ``hash: RTF string`` read or made in this export
+    :ivar int hits: encodings taken from the cache
+    :ivar int misses: images encoded, including images that cannot be read
+    """
+    def __init__(self, asset_dir):
+        self.cache_dir = pathlib.Path(asset_dir) / "cache"
+        self.digests = {}
+        self.encodings = {}
+        self.hits = 0
+        self.misses = 0
+    def __deepcopy__(self, memo):
+        return(self)
+    def digest(self, path):
+        """Return hash of image file contents, hashing each file once while it is unchanged."""
+        stat = os.stat(path)
+        known = self.digests.get(str(path))
+        if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+            return(known[2])
+        file_hash = blake2b(digest_size = 16)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                file_hash.update(chunk)
+        digest = file_hash.hexdigest()
+        self.digests[str(path)] = (stat.st_mtime_ns, stat.st_size, digest)
+        return(digest)
+    def rtf_picture(self, path):
+        """Return RTF ``pict`` group for image, from the cache if the image was encoded before.
+
+        :param path: path to image
+        """
+        try:
+            digest = self.digest(path)
+        except OSError as e:
+            # missing image is exported as an empty picture, as without the cache
+            log.debug(f"Could not read image {path}: {e}")
+            self.misses += 1
+            return(image_to_rtf(path))
+        if digest in self.encodings:
+            self.hits += 1
+            return(self.encodings[digest])
+        # not .rtf, so folders of RTF/CRE files can be searched without finding these
+        cache_file = self.cache_dir / f"{digest}.pict"
+        if cache_file.exists():
+            self.hits += 1
+            encoding = cache_file.read_text(encoding = "utf-8")
+        else:
+            self.misses += 1
+            encoding = image_to_rtf(path)
+            try:
+                self.cache_dir.mkdir(parents = True, exist_ok = True)
+                # write under a temporary name so other processes never read a partial file
+                temp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+                temp_file.write_text(encoding, encoding = "utf-8")
+                os.replace(temp_file, cache_file)
+            except OSError as e:
+                log.debug(f"Could not save image encoding to {cache_file}: {e}")
+        self.encodings[digest] = encoding
+        return(encoding)
+    def odf_picture(self, document, path):
+        """Add image to ODF document once, and return its reference.
+
+        :param document: ``OpenDocument`` being exported
+        :param path: path to image
+        :return: name of picture in the document
+        """
+        path = pathlib.Path(path)
+        digest = self.digest(path)
+        ref = f"Pictures/{digest}{path.suffix.lower()}"
+        if ref in document.Pictures:
+            self.hits += 1
+        else:
+            self.misses += 1
+            mediatype, encoding = mimetypes.guess_type(path.name)
+            document.addPicture(ref, mediatype or "", path.read_bytes())
+        return(ref)
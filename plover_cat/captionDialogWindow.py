@@ -10,6 +10,8 @@ class captionDialogWindow(QDialog, Ui_captionDialog):
     have default values. Caption font is selected through a QFontDialog.
     Based on the endpoint selected, URL, Port and Password fields are 
     enabled and disabled. The settings are fed into ``captionWorker``.
+    More endpoints can be added to a list, captions are sent to all of them
+    and the endpoint selected at the same time.
 
     .. note:: 
         The value set in word buffer is special as it remains outside of ``captionWorker``.
@@ -23,16 +25,22 @@ class captionDialogWindow(QDialog, Ui_captionDialog):
         self.remoteCapHost.activated.connect(self.enable_host_ui)
         self.charOffset.valueChanged.connect(self.enable_char_ui)
         self.timeOffset.valueChanged.connect(self.enable_time_ui)
+        self.remotes = [] #: list, settings of endpoints added to list.
+        self.addRemote.clicked.connect(self.add_remote)
+        self.removeRemote.clicked.connect(self.remove_remote)
     def enable_host_ui(self, index):
         """Enable and disable related fields for endpoints.
 
         Supported endpoints: `None`, Microsoft Teams (untested), Zoom (untested),
         OBS for twitch (tested).  Teams and Zoom both require at least an URL. 
         OBS requires a local port and password. See how-to page for details.
+        The minimum send interval applies to all endpoints.
         """
         if index != 0:
             self.hostURL.setEnabled(True)
             self.hostURL.setPlaceholderText("")
+            self.sendInterval.setEnabled(True)
+            self.addRemote.setEnabled(True)
             self.serverPassword.setEnabled(False) 
             self.serverPort.setEnabled(False)
             self.serverPort.setPlaceholderText("")
@@ -45,9 +53,47 @@ class captionDialogWindow(QDialog, Ui_captionDialog):
                 self.serverPassword.setEnabled(True)
         else:
             self.hostURL.setEnabled(False)
+            self.sendInterval.setEnabled(False)
+            self.addRemote.setEnabled(False)
             self.serverPort.setEnabled(False)
             self.serverPort.setPlaceholderText("")
             self.serverPassword.setEnabled(False)                       
+    def selected_remote(self):
+        """Return settings of endpoint selected in fields, or ``None`` if no endpoint is selected.
+        """
+        if self.remoteCapHost.currentIndex() == 0:
+            return(None)
+        return({"remote": self.remoteCapHost.currentText(), "endpoint": self.hostURL.text(),
+                "port": self.serverPort.text(), "password": self.serverPassword.text(),
+                "send_interval": self.sendInterval.value()})
+    def remote_settings(self):
+        """Return settings of every endpoint to send captions to, for ``captionWorker``.
+        """
+        remotes = list(self.remotes)
+        if self.selected_remote():
+            remotes.append(self.selected_remote())
+        return(remotes)
+    def add_remote(self):
+        """Add endpoint selected in fields to list, and clear fields for the next one.
+        """
+        settings = self.selected_remote()
+        if not settings:
+            return
+        self.remotes.append(settings)
+        self.remoteList.addItem(f"{settings['remote']}: {settings['endpoint'] or self.hostURL.placeholderText()} ({settings['send_interval']} ms)")
+        self.remoteCapHost.setCurrentIndex(0)
+        self.hostURL.clear()
+        self.serverPort.clear()
+        self.serverPassword.clear()
+        self.enable_host_ui(0)
+    def remove_remote(self):
+        """Remove selected endpoint from list.
+        """
+        row = self.remoteList.currentRow()
+        if row < 0:
+            return
+        self.remoteList.takeItem(row)
+        del self.remotes[row]
     def enable_char_ui(self):
         self.enableWordBuffer.setChecked(True)
     def enable_time_ui(self):
@@ -1,12 +1,10 @@
-from urllib import request, parse
-from urllib.error import HTTPError
-from PySide6.QtCore import QObject, Signal
+from PySide6.QtCore import QObject, Signal, Slot, Qt
 from queue import Queue, Empty
 from collections import deque
 from plover_cat.steno_objects import wordsep_simple_re
+from plover_cat.caption_delivery import remote_sink
 from datetime import datetime
-import obsws_python as obs
-from obsws_python.error import OBSSDKRequestError
+from plover import log
 
 class captionWorker(QObject):
     """Generate captions based on user settings and endpoint parameters 
@@ -14,6 +12,14 @@ class captionWorker(QObject):
     
     ``captionWorker`` is put into another thread and doesn't run on the main event thread.
     Text gets ingested and then sent out as formatted caption lines.
+    The editor sends text with ``textIntake`` and stops the worker with ``stopRequested``,
+    both are queued to the worker thread, so formatting and sending captions,
+    even to a slow endpoint, never blocks writing in the editor.
+
+    Each line is formatted once, sent to the caption display for every word, and
+    fanned out to every remote endpoint in ``sinks``. Each endpoint is a
+    ``caption_sink`` with its own queue, thread and send interval, so a slow
+    endpoint never holds up the caption display or the other endpoints.
 
     :param max_length: maximum number of characters for each caption line, 
         suggested value 32, default None
@@ -30,14 +36,23 @@ class captionWorker(QObject):
     :type port: str, optional
     :param password: password to use along with other fields above, default None
     :type password: str, optional
+    :param send_interval: least milliseconds between captions sent to remote endpoint, default 0
+    :type send_interval: int, optional
+    :param remotes: settings for more remote endpoints, dicts with ``remote``, ``endpoint``,
+        ``port``, ``password`` and ``send_interval`` keys as above, default None
+    :type remotes: list, optional
     """    
+    textIntake = Signal(str)
+    """Signal to send text written into editor, queued to ``intake`` on the worker thread."""
+    stopRequested = Signal()
+    """Signal to stop worker, queued to ``clean_and_stop`` after text already sent."""
     capSend = Signal(str)
     """Signal sent with formatted caption line."""
     finished = Signal()
     """Signal sent when worker is done."""
     postMessage = Signal(str)
     """Signal sent with message to display."""
-    def __init__(self, max_length = None, max_lines = None, remote = None, endpoint = None, port = None, password = None):
+    def __init__(self, max_length = None, max_lines = None, remote = None, endpoint = None, port = None, password = None, send_interval = 0, remotes = None):
         QObject.__init__(self)
         self.max_length = max_length
         self.max_lines = max_lines
@@ -45,20 +60,30 @@ class captionWorker(QObject):
         self.endpoint = endpoint
         self.port = port
         self.password = password
-        if self.remote == "OBS":
-            if not self.port:
-                self.port = "4455"
-            if not self.endpoint:
-                self.endpoint = "localhost"
-            self.obs = obs.ReqClient(host=self.endpoint, port=self.port, password=self.password, timeout=3) 
-            self.obs_queue = deque(maxlen = self.max_lines)
+        self.sinks = []
+        """``caption_sink`` for each remote endpoint."""
+        remotes = list(remotes or [])
+        if self.remote and self.remote != "None":
+            remotes.insert(0, {"remote": self.remote, "endpoint": self.endpoint, "port": self.port, 
+                                "password": self.password, "send_interval": send_interval})
+        for settings in remotes:
+            try:
+                sink = remote_sink(message = self.postMessage.emit, **settings)
+            except Exception as e:
+                # endpoint that cannot be set up should not stop the others
+                log.warning(f"Captioning: {e}, captions are not sent to {settings.get('remote')}.")
+                continue
+            if sink:
+                self.sinks.append(sink)
         self.word_queue = Queue()
         """Queue containing text split into word chunks."""
         self.cap_queue = deque(maxlen = max_lines)
         """Queue containing formatted caption lines ready for display."""
         self.next_word = "" 
-        self.zoom_seq = 1
-        """Line number for caption, required for Zoom captions."""
+        self.new_line = False
+        self.textIntake.connect(self.intake, Qt.QueuedConnection)
+        self.stopRequested.connect(self.clean_and_stop, Qt.QueuedConnection)
+    @Slot(str)
     def intake(self, text):
         """Receive text from main editor and create work chunks for captions
         :param text: text written into editor
@@ -82,12 +107,15 @@ class captionWorker(QObject):
             if len(last_cap) + len(self.next_word) > self.max_length:
                 self.cap_queue.append((last_cap, cap_time))
                 self.cap_queue.append((self.next_word, text_time))
+                self.new_line = True
             elif "\u2029" in self.next_word:
                 self.cap_queue.append((last_cap, cap_time))
                 self.cap_queue.append((self.next_word.replace("\u2029", ""), text_time))
+                self.new_line = True
             else:
                 self.cap_queue.append((last_cap + self.next_word, text_time))
             self.send_cap()
+            self.new_line = False
     def send_cap(self):
         """Take caption from queue and send to display, and also if endpoint is defined.
         """
@@ -95,48 +123,17 @@ class captionWorker(QObject):
             last_caps = list(self.cap_queue)
             cap = "\n".join(c[0].lstrip(" ") for c in last_caps if c[0].lstrip(" "))
             self.capSend.emit(cap)
-            if self.endpoint:
-                if self.remote == "Microsoft Teams":
-                    self.send_msteams(cap)
-                elif self.remote == "Zoom":
-                    self.send_zoom(cap)
-                elif self.remote == "OBS":
-                    self.send_obs(cap)
+            for sink in self.sinks:
+                sink.send(cap, self.new_line)
         except Empty:
             pass
+    @Slot()
     def clean_and_stop(self):
-        """Clean up instance and emit signal for finish
+        """Send waiting captions to endpoints, clean up instance and emit signal for finish
         """
+        # close sinks together, so a slow endpoint does not delay sending waiting captions to others
+        for sink in self.sinks:
+            sink.close(timeout = 0)
+        for sink in self.sinks:
+            sink.thread.join(1.0)
         self.finished.emit()
-    def send_msteams(self, cap):
-        """Take caption and send post to Microsoft Teams session
-        """
-        req = request.Request(self.endpoint, method = "POST")
-        req.data = cap.encode()
-        req.add_header('Content-Type', 'text/plain')
-        req.add_header('Content-Length', len(cap)) 
-        try:
-            r = request.urlopen(req)
-        except HTTPError as err:
-            self.postMessage.emit(f"Captioning: send to Microsoft Teams failed with error code {err.code}.")
-    def send_zoom(self, cap):
-        """Take caption and send post to Zoom session
-        """
-        req = request.Request(self.endpoint + f"&seq={self.zoom_seq}&lang=en-US", method = "POST")      
-        self.zoom_seq += 1
-        req.data = cap.encode()  
-        req.add_header('Content-Type', 'text/plain')
-        req.add_header('Content-Length', len(cap)) 
-        try:
-            r = request.urlopen(req)
-        except HTTPError as err:
-            self.postMessage.emit(f"Captioning: send to Zoom failed with error code {err.code}.")  
-    def send_obs(self, cap):
-        """Take caption and send to OBS using obsws_python
-        """
-        try:
-            res = self.obs.send_stream_caption(cap)
-        except OBSSDKRequestError as err:
-            self.postMessage.emit(f"Captioning: send to OBS failed with error code {err.code}")
-        except Exception as e:
-            self.postMessage.emit(f"Captioning: send to OBS failed. Error message is {e}")
@@ -0,0 +1,289 @@
+import ssl
+import threading
+from collections import deque
+from itertools import count
+from time import monotonic
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlsplit
+from plover import log
+import obsws_python as obs
+from obsws_python.error import OBSSDKRequestError
+
+class caption_client:
+    """Send captions to an HTTP endpoint in order, on a thread of its own.
+
+    Captions are posted over one keep-alive connection, which is opened again
+    when the endpoint closes it. ``send`` only queues the caption, so a slow or
+    unreachable endpoint never holds up the caller. When a post fails, the
+    connection is dropped and the same caption is tried again after a delay that
+    doubles on each failure, while new captions wait behind it, so captions
+    written while the endpoint was unreachable are sent in order once it is back.
+    The queue is bounded, the oldest captions are dropped when it is full.
+
+    Endpoint errors other than server errors and ``429 Too Many Requests`` are
+    not retried, as sending the same caption again would fail again.
+
+    :param str url: endpoint URL, ``http`` or ``https``
+    :param str name: name of endpoint for messages
+    :param float timeout: seconds to wait to connect, and for each send and reply
+    :param int max_queue: most captions waiting to be sent
+    :param tuple backoff: seconds before first retry, and most seconds between retries
+    :param message: function called with messages to display, such as ``postMessage.emit``
+    :ivar int sent: captions sent
+    :ivar int failures: failed attempts to send
+    :ivar int dropped: captions dropped from a full queue, or refused by endpoint
+    :ivar bool online: ``False`` from a failed attempt until the next caption is sent
+    """
+    def __init__(self, url, name = "endpoint", timeout = 3.0, max_queue = 100, backoff = (0.5, 30.0), message = None):
+        self.url = urlsplit(url)
+        if self.url.scheme not in ("http", "https") or not self.url.hostname:
+            raise ValueError(f"{url} is not an HTTP or HTTPS URL")
+        self.name = name
+        self.timeout = timeout
+        self.max_queue = max_queue
+        self.backoff = backoff
+        self.message = message or (lambda text: None)
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.connection = None
+        self.closed = False
+        self.sent = 0
+        self.failures = 0
+        self.dropped = 0
+        self.online = True
+        self.thread = threading.Thread(target = self.run, name = f"caption_client {name}", daemon = True)
+        self.thread.start()
+    def send(self, text, query = ""):
+        """Queue caption to send, without waiting for it to be sent.
+
+        :param str text: caption text
+        :param str query: text added to the end of the URL for this caption, such as ``&seq=`` for Zoom
+        :return: ``False`` if the oldest caption was dropped to make room
+        """
+        with self.condition:
+            full = len(self.queue) >= self.max_queue
+            if full:
+                self.queue.popleft()
+                self.dropped += 1
+            self.queue.append((text.encode(), query))
+            self.condition.notify()
+        return(not full)
+    def close(self, timeout = 1.0):
+        """Stop once queued captions are sent, or at the next failure, waiting at most timeout seconds."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(timeout)
+    def connect(self):
+        """Return new connection to endpoint."""
+        if self.url.scheme == "https":
+            return(HTTPSConnection(self.url.hostname, self.url.port, timeout = self.timeout, context = ssl.create_default_context()))
+        return(HTTPConnection(self.url.hostname, self.url.port, timeout = self.timeout))
+    def disconnect(self):
+        """Close connection, the next post opens a new one."""
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+    def post(self, body, query):
+        """Post caption on the open connection, opening one if needed, and return HTTP status."""
+        path = self.url.path or "/"
+        if self.url.query:
+            path += "?" + self.url.query
+        if self.connection is None:
+            self.connection = self.connect()
+        self.connection.request("POST", path + query, body = body, headers = {"Content-Type": "text/plain"})
+        response = self.connection.getresponse()
+        # read whole reply so connection can be used again
+        response.read()
+        return(response.status)
+    def attempt(self, body, query):
+        """Post caption, trying once more on a new connection if a kept-alive connection was closed by the endpoint."""
+        reused = self.connection is not None
+        try:
+            return(self.post(body, query))
+        except (ConnectionError, HTTPException):
+            self.disconnect()
+            if not reused:
+                raise
+            return(self.post(body, query))
+    def run(self):
+        """Send queued captions until closed."""
+        delay = self.backoff[0]
+        while True:
+            with self.condition:
+                while not self.queue and not self.closed:
+                    self.condition.wait()
+                if not self.queue:
+                    break
+                item = self.queue[0]
+            try:
+                status = self.attempt(*item)
+                if status >= 500 or status == 429:
+                    raise HTTPException(f"error code {status}")
+            except (OSError, HTTPException) as e:
+                self.disconnect()
+                self.failures += 1
+                if self.online:
+                    self.online = False
+                    log.debug(f"Captions to {self.name} failed: {e!r}")
+                    self.message(f"Captioning: {self.name} cannot be reached ({e}), captions are kept until it is back.")
+                with self.condition:
+                    if self.closed or self.condition.wait_for(lambda: self.closed, delay):
+                        break
+                delay = min(delay * 2, self.backoff[1])
+                continue
+            delay = self.backoff[0]
+            if status >= 400:
+                self.dropped += 1
+                self.message(f"Captioning: send to {self.name} failed with error code {status}.")
+            else:
+                self.sent += 1
+                if not self.online:
+                    self.online = True
+                    self.message(f"Captioning: {self.name} is back, sending kept captions.")
+            with self.condition:
+                # caption may have been dropped from a full queue while it was sent
+                if self.queue and self.queue[0] is item:
+                    self.queue.popleft()
+        self.disconnect()
+
+class caption_sink:
+    """Send formatted captions to one endpoint at its own pace, on a thread of its own.
+
+    ``send`` only queues the caption, so each sink waits for its own endpoint, and a
+    slow sink never holds up the caption worker or other sinks. A caption arriving
+    when the sink is idle and ``interval`` has passed since the last send is sent at
+    once, then at most one caption is sent every ``interval``. A caption
+    waiting to be sent is replaced by the next one, unless ``keep_lines`` is set, then
+    the last caption of every finished line is kept so no line is skipped. With no
+    interval, every caption is sent.
+    Waiting captions are sent at once when the sink is closed.
+
+    :param str name: name of endpoint for messages
+    :param deliver: function called on the sink thread with each caption to send
+    :param float interval: least seconds between captions sent
+    :param bool keep_lines: keep last caption of each finished line, for Zoom
+    :param int max_queue: most captions waiting to be sent
+    :param on_close: function called on the sink thread after the last caption is sent
+    :param message: function called with messages to display, such as ``postMessage.emit``
+    :ivar int sent: captions sent
+    :ivar int replaced: captions replaced by a later caption before they were sent
+    :ivar int dropped: captions dropped from a full queue
+    """
+    def __init__(self, name, deliver, interval = 0, keep_lines = False, max_queue = 100, on_close = None, message = None):
+        self.name = name
+        self.deliver = deliver
+        self.interval = interval
+        self.keep_lines = keep_lines
+        self.max_queue = max_queue
+        self.on_close = on_close
+        self.message = message or (lambda text: None)
+        self.queue = deque()
+        self.kept = 0
+        self.condition = threading.Condition()
+        self.closed = False
+        self.busy = False
+        self.last_send = None
+        self.sent = 0
+        self.replaced = 0
+        self.dropped = 0
+        self.thread = threading.Thread(target = self.run, name = f"caption_sink {name}", daemon = True)
+        self.thread.start()
+    def send(self, cap, new_line = False):
+        """Queue caption, replacing the waiting caption unless it is kept or there is no interval.
+
+        A caption that can be sent at once is kept, so it is never replaced before the sink thread takes it.
+
+        :param str cap: formatted caption
+        :param bool new_line: caption starts a new line, so the waiting caption ends the previous line
+        """
+        with self.condition:
+            if new_line and self.keep_lines:
+                self.kept = len(self.queue)
+            due = (not self.queue and not self.busy and
+                    (self.last_send is None or monotonic() - self.last_send >= self.interval))
+            if self.interval and not due and len(self.queue) > self.kept:
+                self.queue[-1] = cap
+                self.replaced += 1
+            else:
+                self.queue.append(cap)
+                if due:
+                    self.kept = len(self.queue)
+                if len(self.queue) > self.max_queue:
+                    self.queue.popleft()
+                    self.kept = max(0, self.kept - 1)
+                    self.dropped += 1
+            self.condition.notify()
+    def idle(self):
+        """Return ``True`` if no caption is waiting or being sent."""
+        with self.condition:
+            return(not self.queue and not self.busy)
+    def close(self, timeout = 1.0):
+        """Send waiting captions at once and stop, waiting at most timeout seconds."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join(timeout)
+    def run(self):
+        """Send queued captions, waiting for interval between them, until closed."""
+        while True:
+            with self.condition:
+                while not self.closed:
+                    if self.queue:
+                        wait = 0 if self.last_send is None else self.interval - (monotonic() - self.last_send)
+                        if wait <= 0:
+                            break
+                        self.condition.wait(wait)
+                    else:
+                        self.condition.wait()
+                if not self.queue:
+                    break
+                cap = self.queue.popleft()
+                self.kept = max(0, self.kept - 1)
+                self.busy = True
+                self.last_send = monotonic()
+            try:
+                self.deliver(cap)
+                self.sent += 1
+            except Exception as e:
+                log.debug(f"Captions to {self.name} failed: {e!r}")
+                self.message(f"Captioning: send to {self.name} failed. Error message is {e}")
+            with self.condition:
+                self.busy = False
+        if self.on_close:
+            self.on_close()
+
+def remote_sink(remote, endpoint = None, port = None, password = None, send_interval = 0, message = None):
+    """Return ``caption_sink`` sending captions to a supported remote endpoint.
+
+    Microsoft Teams and Zoom captions are posted by a ``caption_client``, Zoom captions
+    are numbered with ``seq`` in the order they are sent. OBS captions are sent with
+    ``obsws_python``, connecting to localhost on port 4455 by default.
+
+    :param str remote: one of ``Microsoft Teams``, ``Zoom`` or ``OBS``
+    :param str endpoint: URL or authentication token, or host for OBS
+    :param str port: port for OBS
+    :param str password: password for OBS
+    :param int send_interval: least milliseconds between captions sent
+    :param message: function called with messages to display
+    :return: ``caption_sink``, or ``None`` if remote is not supported
+    """
+    message = message or (lambda text: None)
+    if remote in ("Microsoft Teams", "Zoom"):
+        client = caption_client(endpoint, name = remote, message = message)
+        if remote == "Zoom":
+            seq = count(1)
+            deliver = lambda cap: client.send(cap, f"&seq={next(seq)}&lang=en-US")
+        else:
+            deliver = client.send
+        return(caption_sink(remote, deliver, send_interval / 1000, keep_lines = remote == "Zoom",
+                            on_close = client.close, message = message))
+    if remote == "OBS":
+        obs_client = obs.ReqClient(host = endpoint or "localhost", port = port or "4455", password = password, timeout = 3)
+        def deliver(cap):
+            try:
+                obs_client.send_stream_caption(cap)
+            except OBSSDKRequestError as err:
+                message(f"Captioning: send to OBS failed with error code {err.code}")
+        return(caption_sink(remote, deliver, send_interval / 1000, on_close = obs_client.disconnect, message = message))
+    return(None)
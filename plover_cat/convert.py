@@ -0,0 +1,182 @@
+"""Convert RTF/CRE files into transcript folders from the command line, without the editor.
+
+Each file becomes a transcript folder named after the file, holding the
+configuration, styles, transcript, dictionary and version history that the editor
+makes for a new transcript and an RTF/CRE import::
+
+    python -m plover_cat.convert path/to/archive -o path/to/jobs
+
+Folders are searched, including subfolders, for ``.rtf`` files, and transcript
+folders are made in the same subfolders of the output folder. Files are converted
+on a process pool, one file per process, and a summary of throughput and failures
+is printed at the end.
+"""
+import os
+import sys
+import pathlib
+import argparse
+from copy import deepcopy
+from shutil import rmtree
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from plover import log
+from plover_cat.helpers import save_json, save_json_stream, remove_empty_from_dict, init_transcript_repo
+from plover_cat.constants import default_config, default_dict
+from plover_cat.rtf_parsing import rtf_steno, styled_paragraphs
+from plover_cat.export_bundle import count_strokes
+from plover_cat.export import qt_application
+
+# RTF/CRE page control words and the configuration settings they set
+page_settings = {"paperw": "page_width", "paperh": "page_height", "margl": "page_left_margin",
+                "margt": "page_top_margin", "margr": "page_right_margin", "margb": "page_bottom_margin"}
+
+def find_rtfs(paths):
+    """Return RTF/CRE files in paths, with the transcript folder to convert each into.
+
+    Folders and their subfolders are searched, except ``assets`` folders of projects,
+    and ``export`` folders of transcripts. The transcript folder of a file found in a
+    folder has the same path relative to the output folder as the file has to the
+    searched folder, without the suffix, so files with the same name in different
+    subfolders are converted into different transcript folders. A number is added
+    to names that would still clash, such as for files given with the same name.
+
+    :param list paths: RTF/CRE files, or folders holding them
+    :return: list of ``(pathlib.Path of file, pathlib.Path of transcript folder relative to output folder)``
+    """
+    rtfs = []
+    for path in paths:
+        path = pathlib.Path(path)
+        if path.is_file():
+            rtfs.append((path, pathlib.Path(path.stem)))
+        elif path.is_dir():
+            found = []
+            for folder, dirs, files in os.walk(path):
+                folder = pathlib.Path(folder)
+                transcript = (folder / "config.CONFIG").exists()
+                # cached images and exported files are not files to convert
+                dirs[:] = [d for d in dirs if d != "assets" and not (transcript and d == "export")]
+                found.extend(folder / name for name in files if name.lower().endswith(".rtf"))
+            rtfs.extend((rtf, rtf.relative_to(path).with_suffix("")) for rtf in sorted(found))
+        else:
+            log.warning(f"{path} is not a file or folder.")
+    names = set()
+    for index, (rtf, name) in enumerate(rtfs):
+        unique, number = name, 1
+        # compare names as a case-insensitive file system would
+        while str(unique).lower() in names:
+            number += 1
+            unique = name.with_name(f"{name.name}_{number}")
+        names.add(str(unique).lower())
+        rtfs[index] = (rtf, unique)
+    return(rtfs)
+
+def convert_rtf(rtf_path, output_dir, name = None):
+    """Convert one RTF/CRE file into a new transcript folder in output_dir.
+
+    The transcript is written as paragraphs are parsed. If conversion fails, the
+    partly written folder is removed.
+
+    :param rtf_path: RTF/CRE file
+    :param output_dir: folder to make the transcript folder in
+    :param name: path of transcript folder relative to output_dir, the name of the file if ``None``,
+        the transcript folder must not already exist
+    :return: dict with ``rtf``, ``transcript``, ``bytes``, ``paragraphs``, ``strokes`` and ``seconds``
+    """
+    start = perf_counter()
+    qt_application()
+    rtf_path = pathlib.Path(rtf_path)
+    with open(rtf_path, "rb") as f:
+        if f.read(5) != b"{\\rtf":
+            raise ValueError(f"{rtf_path} is not an RTF/CRE file")
+    transcript_dir = pathlib.Path(output_dir) / (name or rtf_path.stem)
+    transcript_dir.mkdir(parents = True)
+    try:
+        counts = {"paragraphs": 0, "strokes": 0}
+        def count(paragraphs):
+            for par_num, par_dict in paragraphs:
+                counts["paragraphs"] += 1
+                counts["strokes"] += count_strokes([par_dict])
+                yield((par_num, par_dict))
+        parser = rtf_steno(str(rtf_path))
+        style_dict = {}
+        transcript = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript")
+        save_json_stream(count(styled_paragraphs(parser, style_dict)), transcript)
+        style_path = pathlib.Path("styles") / rtf_path.with_suffix(".json").name
+        save_json(remove_empty_from_dict(style_dict), transcript_dir / style_path)
+        dict_path = pathlib.Path("dict") / "default.json"
+        save_json(default_dict, transcript_dir / dict_path)
+        config = deepcopy(default_config)
+        config["space_placement"] = "Before Output"
+        config["style"] = str(style_path)
+        config["dictionaries"] = [str(dict_path)]
+        for control, setting in page_settings.items():
+            if control in parser.page:
+                config[setting] = parser.page[control]
+        save_json(config, transcript_dir / "config.CONFIG")
+        (transcript_dir / "export").mkdir()
+        init_transcript_repo(transcript_dir, [transcript, transcript_dir / dict_path], f"convert {rtf_path.name}")
+    except BaseException:
+        rmtree(transcript_dir, ignore_errors = True)
+        raise
+    return({"rtf": str(rtf_path), "transcript": str(transcript_dir), "bytes": rtf_path.stat().st_size,
+            "paragraphs": counts["paragraphs"], "strokes": counts["strokes"], "seconds": perf_counter() - start})
+
+def convert_rtfs(rtf_paths, output_dir, processes = None):
+    """Convert RTF/CRE files into transcript folders in parallel.
+
+    :param list rtf_paths: ``(RTF/CRE file, transcript folder relative to output_dir)`` from ``find_rtfs``
+    :param output_dir: folder to make transcript folders in
+    :param processes: number of processes, ``None`` for number of CPUs, ``0`` to convert on this process
+    :return: generator of ``(RTF/CRE file, result dict or exception)`` as conversions finish
+    """
+    if processes == 0 or len(rtf_paths) < 2:
+        for rtf_path, name in rtf_paths:
+            try:
+                yield((rtf_path, convert_rtf(rtf_path, output_dir, name)))
+            except Exception as e:
+                yield((rtf_path, e))
+        return
+    # each process starts its own Qt application for fonts, fork would copy this one
+    with ProcessPoolExecutor(max_workers = processes, mp_context = get_context("spawn")) as pool:
+        futures = {pool.submit(convert_rtf, rtf_path, output_dir, name): rtf_path for rtf_path, name in rtf_paths}
+        for future in as_completed(futures):
+            try:
+                yield((futures[future], future.result()))
+            except Exception as e:
+                yield((futures[future], e))
+
+def main(argv = None):
+    """Run command line conversion, return exit code, ``1`` if any file failed."""
+    parser = argparse.ArgumentParser(prog = "python -m plover_cat.convert", description = "Convert RTF/CRE files into Plover2CAT transcripts without the editor.")
+    parser.add_argument("paths", nargs = "+", help = "RTF/CRE files, or folders holding them")
+    parser.add_argument("-o", "--output", default = ".", help = "folder to make transcript folders in (default: current folder)")
+    parser.add_argument("-j", "--jobs", type = int, default = None, help = "number of processes (default: number of CPUs, 0 for none)")
+    args = parser.parse_args(argv)
+    rtf_paths = find_rtfs(args.paths)
+    if not rtf_paths:
+        print("No RTF/CRE files found.", file = sys.stderr)
+        return(1)
+    start = perf_counter()
+    failures = []
+    totals = {"bytes": 0, "paragraphs": 0, "strokes": 0}
+    for rtf_path, result in convert_rtfs(rtf_paths, args.output, args.jobs):
+        if isinstance(result, Exception):
+            failures.append((rtf_path, result))
+            print(f"FAILED {rtf_path}: {result!r}", file = sys.stderr)
+        else:
+            for key in totals:
+                totals[key] += result[key]
+            print(f"{rtf_path}: {result['paragraphs']} paragraphs, {result['strokes']} strokes in {result['seconds']:.2f}s")
+    seconds = perf_counter() - start
+    print(f"Converted {len(rtf_paths) - len(failures)} of {len(rtf_paths)} files in {seconds:.2f}s: "
+            f"{totals['paragraphs']} paragraphs, {totals['strokes']} strokes, "
+            f"{totals['bytes'] / 1e6 / seconds:.2f} MB/s, {totals['strokes'] / seconds:.0f} strokes/s.")
+    if failures:
+        print(f"{len(failures)} failed:", file = sys.stderr)
+        for rtf_path, error in failures:
+            print(f"  {rtf_path}: {error!r}", file = sys.stderr)
+    return(1 if failures else 0)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,19 @@
 import pathlib
+import json
 import xml.etree.ElementTree as ET
 import html
 from datetime import datetime
 from dulwich.repo import Repo
 from math import trunc
 from PySide6.QtCore import QObject, Signal
-from PySide6.QtGui import QFontMetrics
-from time import sleep
+from time import sleep, perf_counter
 from plover import log
 from plover_cat.helpers import save_json, ms_to_hours, return_commits, inch_to_spaces, write_command
 from plover_cat.steno_objects import *
 from plover_cat.rtf_parsing import *
 from plover_cat.export_helpers import *
+from plover_cat.export_bundle import *
+from plover_cat.asset_cache import image_asset_cache
 from odf.opendocument import OpenDocumentText, load
 from odf.office import FontFaceDecls, Styles
 from odf.style import (Style, TextProperties, ParagraphProperties, FontFace, PageLayout, 
@@ -31,12 +33,14 @@ class documentWorker(QObject):
     :param styles: dict of style parameters
     :param config: transcript configuration
     :param home_dir: transcript home directory
+    :param layout_cache: ``text_layout_cache`` of the transcript, to reuse paragraph layouts across exports
+    :param style_table: ``resolved_style_table`` of the editor, made from ``styles`` if not given
     """
     progress = Signal(int)
     """Signal sent progress based on export of paragraph."""
     finished = Signal()
     """Signal sent when export is finished."""
-    def __init__(self, document, path, config, styles, user_field_dict, home_dir):
+    def __init__(self, document, path, config, styles, user_field_dict, home_dir, layout_cache = None, style_table = None):
         QObject.__init__(self)  
         self.document = document
         self.path = path
@@ -44,138 +48,75 @@ class documentWorker(QObject):
         self.config = config
         self.user_field_dict = user_field_dict
         self.home_dir = home_dir
+        self.layout_cache = layout_cache
+        self.style_table = style_table or resolved_style_table(styles)
+        self.assets = image_asset_cache(pathlib.Path(home_dir) / "assets")
+    def cached_text(self, paragraphs):
+        """Return layout keys and cached text layouts, both empty without ``layout_cache``.
+
+        :param list paragraphs: list of ``(block number, paragraph data)``
+        """
+        if not self.layout_cache:
+            return({}, {})
+        keys = self.layout_cache.keys(paragraphs, self.style_table, self.config, self.user_field_dict)
+        return(keys, self.layout_cache.lookup(keys))
+    def text_layouts(self):
+        """Lay out paragraphs for text as they are read, wrapping only paragraphs not in ``layout_cache``."""
+        paragraphs = list(self.document.items())
+        keys, cached = self.cached_text(paragraphs)
+        layouts = iter_layouts(paragraphs, self.style_table.properties, self.config, self.user_field_dict, ["text"], progress = self.progress.emit, cached = cached)
+        if self.layout_cache:
+            layouts = self.layout_cache.record(layouts, keys)
+        return(layouts)
     def save_ascii(self):
-        """Export to formatted ASCII."""
-        ef = element_factory()
-        doc_lines = {}
-        line = -1
-        for block_num, block_data in self.document.items():
-            style_name = block_data["style"]
-            block_style = {
-                    "paragraphproperties": recursive_style_format(self.styles, style_name),
-                    "textproperties": recursive_style_format(self.styles, style_name, prop = "textproperties")
-                }
-            page_hspan = inch_to_spaces(self.config["page_width"]) - inch_to_spaces(self.config["page_left_margin"]) - inch_to_spaces(self.config["page_right_margin"])
-            page_vspan = inch_to_spaces(self.config["page_height"], 6) - inch_to_spaces(self.config["page_top_margin"], 6) - inch_to_spaces(self.config["page_bottom_margin"], 6)
-            if self.config["page_max_char"] != 0:
-                page_hspan = self.config["page_max_char"]
-            if self.config["page_max_line"] != 0:
-                page_vspan = self.config["page_max_line"]
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
-            par_dict = format_text(el_list, block_style, page_hspan, line)
-            doc_lines.update(par_dict)
-            line = line + len(par_dict)
-            self.progress.emit(int(block_num))
-        if self.config["page_line_numbering"]:
-            page_line_num = 1
-            for key, line in doc_lines.items():
-                if page_line_num > page_vspan:
-                    page_line_num = 1
-                num_line = str(page_line_num).rjust(2)
-                text_line = doc_lines[key]["text"]
-                doc_lines[key]["text"] = f"{num_line} {text_line}"
-                page_line_num += 1
-        if self.config["page_timestamp"]:
-            for key, line in doc_lines.items():
-                text_line = doc_lines[key]["text"]
-                line_time = datetime.strptime(line["time"], "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')
-                doc_lines[key]["text"] = f"{line_time} {text_line}"
-        file_path = pathlib.Path(self.path)
-        with open(file_path, "w", encoding="utf-8") as f:
-            for key, line in doc_lines.items():
-                if key % page_vspan == 0:
-                    # header
-                    quotient, mod = divmod(key, page_vspan)
-                    header_left = self.config["header_left"].replace("%p", str(quotient + 1))
-                    header_center = self.config["header_center"].replace("%p", str(quotient + 1))
-                    header_right = self.config["header_right"].replace("%p", str(quotient + 1))
-                    header_text = header_center.center(page_hspan)
-                    header_text = header_left + header_text[len(header_left):]
-                    header_text = header_text[:(len(header_text)-len(header_right))] + header_right
-                    f.write(f"{header_text}\n")
-                text_line = line["text"]
-                f.write(f"{text_line}\n")
-                if key % page_vspan == (page_vspan - 1):
-                    quotient, mod = divmod(key, page_vspan)
-                    footer_left = self.config["footer_left"].replace("%p", str(quotient + 1))
-                    footer_center = self.config["footer_center"].replace("%p", str(quotient + 1))
-                    footer_right = self.config["footer_right"].replace("%p", str(quotient + 1))
-                    footer_text = footer_center.center(page_hspan)
-                    footer_text = footer_left + footer_text[len(footer_left):]
-                    footer_text = footer_text[:(len(footer_text)-len(footer_right))] + footer_right
-                    f.write(f"{footer_text}\n")  
+        """Export to formatted ASCII, with ``layout_cache`` only pages changed since the last export to the file are written."""
+        if self.layout_cache:
+            self.write_ascii_incremental()
+        else:
+            write_ascii(self.path, text_page_lines(self.text_layouts(), self.config))
         self.finished.emit()      
+    def write_ascii_incremental(self):
+        """Write formatted ASCII, copying pages unchanged since the export in the ``export_manifest`` of the file."""
+        paragraphs = list(self.document.items())
+        keys, cached = self.cached_text(paragraphs)
+        layouts = iter_layouts(paragraphs, self.style_table.properties, self.config, self.user_field_dict, ["text"], progress = self.progress.emit, cached = cached)
+        layouts = list(self.layout_cache.record(layouts, keys))
+        key_list = [keys[block_num] for block_num, block_data in paragraphs]
+        line_starts = line_map(layouts)
+        page_hspan, page_vspan = page_spans(self.config)
+        context = json.dumps(self.config, sort_keys = True, default = str)
+        path = str(self.path)
+        manifest = self.layout_cache.manifests.get(path)
+        changed = manifest.changed_pages(path, context, key_list, line_starts, page_vspan) if manifest else None
+        splice = None
+        first_page, last_page = changed or (1, None)
+        if changed:
+            old_pages = len(manifest.page_offsets) - 1
+            tail_start = manifest.page_offsets[last_page] if last_page is not None and last_page < old_pages else None
+            splice = (manifest.page_offsets[first_page - 1], tail_start)
+        start_par = bisect_right(line_starts, (first_page - 1) * page_vspan) - 1
+        pages = text_pages(layouts[start_par:], self.config, line_starts[start_par], first_page, last_page)
+        offsets, tail_offset, size = write_ascii_pages(path, pages, splice)
+        page_offsets = manifest.page_offsets[:first_page - 1] if splice else []
+        page_offsets += [offsets[page] for page in sorted(offsets)]
+        if splice and splice[1] is not None:
+            page_offsets += [offset - splice[1] + tail_offset for offset in manifest.page_offsets[last_page:-1]]
+        page_offsets.append(size)
+        self.layout_cache.manifests[path] = export_manifest(context, key_list, line_starts, page_offsets, pathlib.Path(path).stat().st_mtime_ns)
+        log.debug(f"ASCII export: wrote {len(offsets)} of {len(page_offsets) - 1} pages.")
     def save_html(self):
         """Export to formatted HTML."""
-        ef = element_factory()
-        doc_lines = {}
-        line = -1
-        for block_num, block_data in self.document.items():
-            style_name = block_data["style"]
-            block_style = {
-                    "paragraphproperties": recursive_style_format(self.styles, style_name),
-                    "textproperties": recursive_style_format(self.styles, style_name, prop = "textproperties")
-                }
-            page_hspan = inch_to_spaces(self.config["page_width"]) - inch_to_spaces(self.config["page_left_margin"]) - inch_to_spaces(self.config["page_right_margin"])
-            page_vspan = inch_to_spaces(self.config["page_height"], 6) - inch_to_spaces(self.config["page_top_margin"], 6) - inch_to_spaces(self.config["page_bottom_margin"], 6)
-            if self.config["page_max_char"] != 0:
-                page_hspan = self.config["page_max_char"]
-            if self.config["page_max_line"] != 0:
-                page_vspan = self.config["page_max_line"]
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
-            par_dict = format_text(el_list, block_style, page_hspan, line)
-            doc_lines.update(par_dict)
-            line = line + len(par_dict)
-            self.progress.emit(int(block_num))
-        if self.config["page_line_numbering"]:
-            page_line_num = 1
-            for key, line in doc_lines.items():
-                if page_line_num > page_vspan:
-                    page_line_num = 1
-                num_line = str(page_line_num).rjust(2)
-                text_line = doc_lines[key]["text"]
-                doc_lines[key]["text"] = f"{num_line} {text_line}"
-                page_line_num += 1
-        if self.config["page_timestamp"]:
-            for key, line in doc_lines.items():
-                text_line = doc_lines[key]["text"]
-                line_time = datetime.strptime(line["time"], "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')
-                doc_lines[key]["text"] = f"{line_time} {text_line}"
-        file_path = pathlib.Path(self.path)
-        root = ET.Element("html")
-        head = ET.SubElement(root, "head")
-        body = ET.SubElement(root, "body")
-        pre = ET.SubElement(body, "pre")
-        for_html = []
-        for k, v in doc_lines.items():
-            if k % page_vspan == 0:
-                # header
-                quotient, mod = divmod(k, page_vspan)
-                header_left = self.config["header_left"].replace("%p", str(quotient + 1))
-                header_center = self.config["header_center"].replace("%p", str(quotient + 1))
-                header_right = self.config["header_right"].replace("%p", str(quotient + 1))
-                header_text = header_center.center(page_hspan)
-                header_text = header_left + header_text[len(header_left):]
-                header_text = header_text[:(len(header_text)-len(header_right))] + header_right
-                for_html.append(header_text)
-            for_html.append(doc_lines[k]["text"])
-            if k % page_vspan == (page_vspan - 1):
-                quotient, mod = divmod(k, page_vspan)
-                footer_left = self.config["footer_left"].replace("%p", str(quotient + 1))
-                footer_center = self.config["footer_center"].replace("%p", str(quotient + 1))
-                footer_right = self.config["footer_right"].replace("%p", str(quotient + 1))
-                footer_text = footer_center.center(page_hspan)
-                footer_text = footer_left + footer_text[len(footer_left):]
-                footer_text = footer_text[:(len(footer_text)-len(footer_right))] + footer_right
-                for_html.append(footer_text)
-        for_html_string = "\n".join(for_html)
-        pre.text = for_html_string
-        html_string = ET.tostring(element = root, encoding = "unicode", method = "html")
-        with open(file_path, "w+", encoding="utf-8") as f:
-            f.write(html_string)
+        write_html(self.path, text_page_lines(self.text_layouts(), self.config))
         self.finished.emit()
     def save_odf(self):
         """Export to ODF Text Document."""
+        self.write_odf(self.path)
+        self.finished.emit()
+    def write_odf(self, path):
+        """Build and save ODF Text Document, without sending ``finished``.
+
+        :param path: file path
+        """
         ef = element_factory()
         set_styles = self.styles
         if self.config["style"].endswith(".json"):
@@ -283,12 +224,8 @@ class documentWorker(QObject):
         text_height = float(page_height.replace("in", "")) - float(page_tmarg.replace("in", "")) - float(page_bmarg.replace("in", ""))    
         for block_num, block_data in self.document.items():
             style_name = block_data["style"]
-            block_style = {
-                    "paragraphproperties": recursive_style_format(self.styles, style_name),
-                    "textproperties": recursive_style_format(self.styles, style_name, prop = "textproperties")
-                }
-            txt_format = txtprop_to_textformat(block_style["textproperties"])
-            font_metrics = QFontMetrics(txt_format.font())
+            block_style = self.style_table[style_name]
+            font_metrics = self.style_table.font_metrics(style_name)
             chars_in_inch = round(1 / pixel_to_in(font_metrics.averageCharWidth()))
             height_in_inch = round(1 / pixel_to_in(font_metrics.lineSpacing()))
             page_hspan = inch_to_spaces(text_width, chars_in_inch)
@@ -296,7 +233,7 @@ class documentWorker(QObject):
             if self.config["page_max_char"] != 0:
                 if page_vspan > self.config["page_max_char"]:
                     text_width = self.config["page_max_char"] / chars_in_inch
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
+            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict, assets = self.assets) for i in block_data["strokes"]])
             par_dict = format_odf_text(el_list, block_style, chars_in_inch, text_width, line)
             doc_lines.update(par_dict)
             line = line + len(par_dict)
@@ -357,33 +294,108 @@ class documentWorker(QObject):
         hf_properties.addElement(hf_tabstops)
         hf_style.addElement(hf_properties)
         s.addElement(hf_style)
-        textdoc.save(self.path)
+        textdoc.save(path)
+        log.debug(f"ODF images: {self.assets.hits} repeated, {self.assets.misses} embedded.")
+    def save_bundle(self, formats = None, processes = None, chunk_size = 200):
+        """Export several formats together from one layout pass.
+
+        Paragraphs are decoded and laid out once for all the text based formats,
+        in chunks on a process pool when one can be used. Meanwhile the ODF document,
+        which needs Qt font metrics, is built on this thread. The laid out paragraphs
+        are then passed to the writers, which also run on the pool.
+        ``path`` is used without suffix, each file gets its suffix from ``bundle_formats``.
+
+        :param list formats: formats to export, all of ``bundle_formats`` if ``None``
+        :param processes: number of processes, ``None`` for number of CPUs, ``0`` to use this thread only
+        :param int chunk_size: number of paragraphs laid out by each pool task
+        """
+        formats = formats or list(bundle_formats)
+        base = pathlib.Path(self.path)
+        paths = {fmt: base.with_name(base.name + bundle_formats[fmt]) for fmt in formats}
+        layout_formats = []
+        if "ascii" in formats or "html" in formats:
+            layout_formats.append("text")
+        if "srt" in formats:
+            layout_formats.append("srt")
+        if "rtf" in formats:
+            layout_formats.append("rtf")
+        paragraphs = list(self.document.items())
+        keys, cached = self.cached_text(paragraphs) if "text" in layout_formats else ({}, {})
+        chunks = [paragraphs[i:i + chunk_size] for i in range(0, len(paragraphs), chunk_size)]
+        pool = bundle_pool(processes) if layout_formats else None
+        try:
+            futures = []
+            if pool:
+                futures = [pool.submit(layout_paragraphs, chunk, self.style_table.properties, self.config, self.user_field_dict, layout_formats, 
+                                        cached = {block_num: cached[block_num] for block_num, block_data in chunk if block_num in cached}, assets = self.assets) for chunk in chunks]
+            if "odt" in formats:
+                self.write_odf(paths["odt"])
+            layouts = []
+            try:
+                for chunk, future in zip(chunks, futures):
+                    layouts.extend(future.result())
+                    self.progress.emit(int(chunk[-1][0]))
+            except BrokenProcessPool as e:
+                log.debug(f"Export process pool failed, laying out on this thread: {e}")
+                pool.shutdown(cancel_futures = True)
+                pool = None
+                futures = []
+            if not futures and layout_formats:
+                layouts = layout_paragraphs(paragraphs, self.style_table.properties, self.config, self.user_field_dict, layout_formats, progress = self.progress.emit, cached = cached, assets = self.assets)
+            if keys:
+                self.layout_cache.store(layouts, keys)
+            writers = []
+            if "text" in layout_formats:
+                # layouts are kept for the other formats, so pages are listed for the pool
+                page_lines = list(text_page_lines(layouts, self.config))
+                if "ascii" in formats:
+                    writers.append((write_ascii, paths["ascii"], page_lines))
+                if "html" in formats:
+                    writers.append((write_html, paths["html"], page_lines))
+            if "srt" in formats:
+                writers.append((write_srt, paths["srt"], list(srt_cues(layouts, audio_timeline(paragraphs)))))
+            if "rtf" in formats:
+                writers.append((write_rtf, paths["rtf"], *self.rtf_layout(layouts)))
+            if pool:
+                for future in [pool.submit(*writer) for writer in writers]:
+                    future.result()
+            else:
+                for writer, *args in writers:
+                    writer(*args)
+        finally:
+            if pool:
+                pool.shutdown()
+        log.debug(f"Exported bundle of {', '.join(formats)} to {base.parent}")
         self.finished.emit()
     def save_plain_ascii(self):
         """Export to plain text."""
-        ef = element_factory() 
-        wrapped_text = []
-        for block_num, block_data in self.document.items():
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
-            wrapped_text += textwrap.wrap(el_list.to_text())
-        self.progress.emit(int(block_num))
-        page_number = 1
-        max_lines = 25 # this could be adjustable
-        doc_lines = []
-        for i in range(0, len(wrapped_text), max_lines):
-            doc_lines += [f'{page_number:04}']
-            page_number +=1
-            # padding space, column 2 is start of line number (left justified), column 7 is start of text
-            # <space> number{1,2} [space]{3,4}
-            doc_lines += [str(line_num).ljust(5).rjust(6) + text for line_num, text in zip(range(1, max_lines), wrapped_text[i: i + max_lines])]
-        file_path = pathlib.Path(self.path)
-        with open(file_path, "w", encoding="utf-8") as f:
-            for line in doc_lines:
-                f.write(f"{line}\n") 
+        # max_lines could be adjustable
+        write_ascii(self.path, plain_page_lines(self.document.items(), self.user_field_dict, max_lines = 25, progress = self.progress.emit))
         self.finished.emit()       
     def save_rtf(self):
-        """Export to RTF file with RTF/CRE."""
-        ef = element_factory()
+        """Export to RTF file with RTF/CRE, writing each paragraph as it is laid out."""
+        start = perf_counter()
+        fonttbl_string, stylesheet_string = self.rtf_styles()
+        stroke_count = count_strokes(self.document.values())
+        head = self.rtf_head(fonttbl_string, stylesheet_string, stroke_count)
+        paragraphs = list(self.document.items())
+        keys = self.layout_cache.rtf_keys(paragraphs, self.user_field_dict) if self.layout_cache else {}
+        cached_rtf = self.layout_cache.lookup(keys, "rtf") if self.layout_cache else {}
+        layouts = iter_layouts(paragraphs, self.style_table.properties, self.config, self.user_field_dict, ["rtf"], progress = self.progress.emit, 
+                                assets = self.assets, cached_rtf = cached_rtf)
+        if self.layout_cache:
+            layouts = self.layout_cache.record(layouts, keys, "rtf")
+        write_rtf(self.path, head, self.rtf_body(layouts))
+        elapsed = max(perf_counter() - start, 1e-6)
+        size = pathlib.Path(self.path).stat().st_size
+        log.debug(f"RTF images: {self.assets.hits} from cache, {self.assets.misses} encoded.")
+        log.info(f"RTF/CRE export: {stroke_count} strokes, {size / 1e6:.1f} MB in {elapsed:.2f} s, {stroke_count / elapsed:.0f} strokes/s, {size / 1e6 / elapsed:.1f} MB/s")
+        self.finished.emit()
+    def rtf_styles(self):
+        """Number fonts and styles, and add RTF commands to ``styles``.
+
+        :return: tuple of font table and stylesheet strings
+        """
         font_list = []
         for k, v in self.styles.items():
             if "textproperties" in v and "fontfamily" in v["textproperties"]:
@@ -461,26 +473,26 @@ class documentWorker(QObject):
                 single_style += write_command("sbasedon", value = v["sbasedon"])
             single_style += v["rtf_par_style"]
             stylesheet_string += "{" + single_style + " " + k + ";}\n"
-        steno_string = []
-        stroke_count = 0
-        for block_num, block_data in self.document.items():
-            steno_string.append("\n")
-            steno_string.append(write_command("par"))
-            steno_string.append(write_command("pard"))
-            if not block_data["style"]:
-                log.debug("Paragraph has no style, setting to first style %s" % next(iter(self.styles)))
-                par_style = next(iter(self.styles))
-            else:
-                par_style = block_data["style"]                                
-            par_style_string = write_command("s", value = self.styles[par_style]["styleindex"])
-            par_style_string += self.styles[par_style]["rtf_par_style"]
-            par_style_string += self.styles[par_style]["rtf_txt_style"]
-            steno_string.append(par_style_string)
-            # strokes = block_data["strokes"]
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
-            stroke_count += el_list.stroke_count()
-            steno_string.append(el_list.to_rtf())
-            self.progress.emit(int(block_num))
+        return(fonttbl_string, stylesheet_string)
+    def rtf_par_style(self, style_name):
+        """Return RTF commands starting a paragraph in a style, after ``rtf_styles``.
+
+        :param str style_name: name of paragraph style, first style if empty
+        """
+        if not style_name:
+            log.debug("Paragraph has no style, setting to first style %s" % next(iter(self.styles)))
+            style_name = next(iter(self.styles))
+        par_style_string = write_command("s", value = self.styles[style_name]["styleindex"])
+        par_style_string += self.styles[style_name]["rtf_par_style"]
+        par_style_string += self.styles[style_name]["rtf_txt_style"]
+        return(par_style_string)
+    def rtf_head(self, fonttbl_string, stylesheet_string, stroke_count):
+        """Return RTF document start, with info, font table, stylesheet and page setup.
+
+        :param str fonttbl_string: font table from ``rtf_styles``
+        :param str stylesheet_string: stylesheet from ``rtf_styles``
+        :param int stroke_count: number of strokes in transcript
+        """
         document_string = []
         document_string.append("{")
         # meta
@@ -518,34 +530,28 @@ class documentWorker(QObject):
         document_string.append(write_command("margr", value = in_to_twip(self.config["page_right_margin"])))
         document_string.append(write_command("margt", value = in_to_twip(self.config["page_top_margin"])))
         document_string.append(write_command("margb", value = in_to_twip(self.config["page_bottom_margin"])))
-        document_string.append("".join(steno_string))
-        document_string.append("}")
-        with open(self.path, "w", encoding = "utf8") as f:
-            f.write("".join(document_string))
-        self.finished.emit()
+        return("".join(document_string))
+    def rtf_body(self, layouts):
+        """Return generator of RTF paragraph strings from laid out paragraphs, after ``rtf_styles``.
+
+        :param layouts: iterable of paragraph layouts with ``rtf``
+        """
+        par_start = "\n" + write_command("par") + write_command("pard")
+        for par in layouts:
+            yield(par_start + self.rtf_par_style(par["style"]) + par["rtf"])
+    def rtf_layout(self, layouts):
+        """Return RTF document head and paragraph strings from laid out paragraphs.
+
+        :param list layouts: paragraph layouts with ``rtf`` and ``strokes``
+        """
+        fonttbl_string, stylesheet_string = self.rtf_styles()
+        body = list(self.rtf_body(layouts))
+        head = self.rtf_head(fonttbl_string, stylesheet_string, sum(par["strokes"] for par in layouts))
+        return(head, body)
     def save_srt(self):
         """Export to SRT captions."""
-        ef = element_factory()
-        line_num = 1
-        doc_lines = []
         log.debug(f"Exporting in SRT to {self.path}")
-        for block_num, block_data in self.document.items():
-            if "audioendtime" not in block_data:
-                if str(int(block_num) + 1) in self.document and "audiostarttime" in self.document[str(int(block_num) + 1)]:
-                    block_data["audioendtime"] = self.document[str(int(block_num) + 1)]["audiostarttime"]
-                else:
-                    block_data["audioendtime"] = None
-            el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = self.user_field_dict) for i in block_data["strokes"]])
-            par_dict = format_srt_text(el_list, line_num = line_num, audiostarttime = block_data["audiostarttime"], audioendtime = block_data["audioendtime"])
-            line_num += len(par_dict)
-            for k, v in par_dict.items():
-                doc_lines += [k]
-                doc_lines += [ms_to_hours(v["starttime"]).replace(".", ",") + " --> " + ms_to_hours(v["endtime"]).replace(".", ",")]
-                doc_lines += ["".join([el.to_text() for el in v["text"]])]
-                doc_lines += [""]
-            self.progress.emit(int(block_num))
-        file_path = pathlib.Path(self.path)
-        with open(file_path, "w", encoding="utf-8") as f:
-            for line in doc_lines:
-                f.write(f"{line}\n")
-        self.finished.emit()
\ No newline at end of file
+        timeline = audio_timeline(self.document.items())
+        layouts = iter_layouts(self.document.items(), self.style_table.properties, self.config, self.user_field_dict, ["srt"], progress = self.progress.emit)
+        write_srt(self.path, srt_cues(layouts, timeline))
+        self.finished.emit()
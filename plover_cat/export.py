@@ -0,0 +1,168 @@
+"""Export transcripts from the command line, without the editor.
+
+Transcript folders are read from disk and exported on a process pool, one
+transcript per process::
+
+    python -m plover_cat.export path/to/transcript path/to/jobs -f ascii,rtf -o exports
+
+A folder holding ``config.CONFIG`` is a transcript, any other folder is searched
+one level down for transcripts. Files are named after the transcript, and are put
+in the transcript ``export`` folder unless an output folder is given. Qt uses the
+offscreen platform unless ``QT_QPA_PLATFORM`` is set, so no display is needed.
+"""
+import os
+import sys
+import json
+import pathlib
+import argparse
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from plover import log
+from plover_cat.helpers import config_with_defaults
+from plover_cat.constants import default_styles
+from plover_cat.rtf_parsing import import_version_one, import_version_two
+from plover_cat.export_helpers import load_odf_styles
+from plover_cat.export_bundle import bundle_formats
+from plover_cat.documentWorker import documentWorker
+
+def find_transcripts(paths):
+    """Return transcript folders in paths, looking one level into folders that are not transcripts.
+
+    :param list paths: transcript folders, or folders of transcript folders
+    :return: list of ``pathlib.Path``
+    """
+    transcripts = []
+    for path in paths:
+        path = pathlib.Path(path)
+        if (path / "config.CONFIG").exists():
+            transcripts.append(path)
+        elif path.is_dir():
+            transcripts.extend(sorted(sub for sub in path.iterdir() if (sub / "config.CONFIG").exists()))
+        else:
+            log.warning(f"{path} is not a transcript folder.")
+    return(transcripts)
+
+def read_transcript(transcript_dir):
+    """Read transcript data, configuration and styles of a transcript folder, as the editor loads them.
+
+    :param transcript_dir: transcript folder
+    :return: tuple of ``(document, config, styles)``
+    """
+    transcript_dir = pathlib.Path(transcript_dir)
+    with open(transcript_dir / "config.CONFIG", "r") as f:
+        config = config_with_defaults(json.loads(f.read()))
+    style_path = transcript_dir / config.get("style", "styles/default.json")
+    if not style_path.is_file():
+        log.debug(f"Style file {style_path} does not exist. Using default styles.")
+        styles = default_styles
+    elif style_path.suffix == ".odt":
+        styles = load_odf_styles(style_path)
+    else:
+        with open(style_path, "r") as f:
+            styles = json.loads(f.read())
+    document = {}
+    transcript = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript")
+    if transcript.is_file():
+        with open(transcript, "r") as f:
+            json_document = json.loads(f.read())
+        if json_document and "data" in json_document[next(iter(json_document))]:
+            json_document = import_version_one(json_document)
+        else:
+            json_document = import_version_two(json_document)
+        document = {key: value for key, value in json_document.items() if key.isdigit()}
+    for block_data in document.values():
+        if block_data.get("style") not in styles:
+            block_data["style"] = next(iter(styles))
+    return((document, config, styles))
+
+def qt_application():
+    """Return the Qt application, making one on the offscreen platform if there is none.
+
+    Font metrics for ODF export need a ``QGuiApplication``.
+    """
+    from PySide6.QtGui import QGuiApplication
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return(QGuiApplication.instance() or QGuiApplication([]))
+
+def export_transcript(transcript_dir, formats, output_dir = None):
+    """Export one transcript folder to formats.
+
+    Layout runs on this process only, as transcripts are already spread over processes.
+
+    :param transcript_dir: transcript folder
+    :param list formats: formats from ``bundle_formats``
+    :param output_dir: folder for exported files, the transcript ``export`` folder if ``None``
+    :return: dict with ``transcript``, ``files``, ``paragraphs`` and ``seconds``
+    """
+    start = perf_counter()
+    qt_application()
+    transcript_dir = pathlib.Path(transcript_dir)
+    document, config, styles = read_transcript(transcript_dir)
+    output_dir = pathlib.Path(output_dir) if output_dir else transcript_dir / "export"
+    output_dir.mkdir(parents = True, exist_ok = True)
+    base = output_dir / transcript_dir.name
+    worker = documentWorker(document, str(base), config, styles, config["user_field_dict"], str(transcript_dir))
+    worker.save_bundle(formats, processes = 0)
+    files = [str(base.with_name(base.name + bundle_formats[fmt])) for fmt in formats]
+    return({"transcript": str(transcript_dir), "files": files, "paragraphs": len(document), "seconds": perf_counter() - start})
+
+def export_transcripts(transcript_dirs, formats, output_dir = None, processes = None):
+    """Export transcript folders in parallel.
+
+    :param list transcript_dirs: transcript folders
+    :param list formats: formats from ``bundle_formats``
+    :param output_dir: folder for exported files, the ``export`` folder of each transcript if ``None``
+    :param processes: number of processes, ``None`` for number of CPUs, ``0`` to export on this process
+    :return: generator of ``(transcript folder, result dict or exception)`` as exports finish
+    """
+    if processes == 0 or len(transcript_dirs) < 2:
+        for transcript_dir in transcript_dirs:
+            try:
+                yield((transcript_dir, export_transcript(transcript_dir, formats, output_dir)))
+            except Exception as e:
+                yield((transcript_dir, e))
+        return
+    # each process starts its own Qt application, fork would copy this one
+    with ProcessPoolExecutor(max_workers = processes, mp_context = get_context("spawn")) as pool:
+        futures = {pool.submit(export_transcript, transcript_dir, formats, output_dir): transcript_dir for transcript_dir in transcript_dirs}
+        for future in as_completed(futures):
+            try:
+                yield((futures[future], future.result()))
+            except Exception as e:
+                yield((futures[future], e))
+
+def parse_formats(text):
+    """Return list of formats from comma separated text, for ``argparse``."""
+    formats = [fmt.strip() for fmt in text.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in bundle_formats]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"formats must be from {', '.join(bundle_formats)}")
+    return(formats)
+
+def main(argv = None):
+    """Run command line export, return exit code, ``1`` if any transcript failed."""
+    parser = argparse.ArgumentParser(prog = "python -m plover_cat.export", description = "Export Plover2CAT transcripts without the editor.")
+    parser.add_argument("paths", nargs = "+", help = "transcript folders, or folders holding transcript folders")
+    parser.add_argument("-f", "--formats", type = parse_formats, default = list(bundle_formats),
+                        help = f"comma separated formats, from {', '.join(bundle_formats)} (default: all)")
+    parser.add_argument("-o", "--output", help = "folder for exported files (default: export folder of each transcript)")
+    parser.add_argument("-j", "--jobs", type = int, default = None, help = "number of processes (default: number of CPUs, 0 for none)")
+    args = parser.parse_args(argv)
+    transcript_dirs = find_transcripts(args.paths)
+    if not transcript_dirs:
+        print("No transcript folders found.", file = sys.stderr)
+        return(1)
+    start = perf_counter()
+    failed = 0
+    for transcript_dir, result in export_transcripts(transcript_dirs, args.formats, args.output, args.jobs):
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"FAILED {transcript_dir}: {result!r}", file = sys.stderr)
+        else:
+            print(f"{transcript_dir}: {result['paragraphs']} paragraphs in {result['seconds']:.2f}s")
+    print(f"Exported {len(transcript_dirs) - failed} of {len(transcript_dirs)} transcripts in {perf_counter() - start:.2f}s.")
+    return(1 if failed else 0)
+
+if __name__ == "__main__":
+    sys.exit(main())
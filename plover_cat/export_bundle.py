@@ -0,0 +1,580 @@
+import os
+import sys
+import json
+import html
+import textwrap
+from hashlib import blake2b
+from bisect import bisect_left, bisect_right
+import pathlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from plover import log
+from plover_cat.helpers import ms_to_hours, hours_to_ms, inch_to_spaces
+from plover_cat.steno_objects import *
+from plover_cat.export_helpers import *
+
+bundle_formats = {"ascii": ".txt", "html": ".html", "srt": ".srt", "rtf": ".rtf", "odt": ".odt"}
+"""Formats made by an export bundle, and the suffix of each file."""
+
+def page_spans(config):
+    """Return characters per line and lines per page for text exports.
+
+    :param dict config: transcript configuration
+    :return: tuple of ``(page_hspan, page_vspan)``
+    """
+    page_hspan = inch_to_spaces(config["page_width"]) - inch_to_spaces(config["page_left_margin"]) - inch_to_spaces(config["page_right_margin"])
+    page_vspan = inch_to_spaces(config["page_height"], 6) - inch_to_spaces(config["page_top_margin"], 6) - inch_to_spaces(config["page_bottom_margin"], 6)
+    if config["page_max_char"] != 0:
+        page_hspan = config["page_max_char"]
+    if config["page_max_line"] != 0:
+        page_vspan = config["page_max_line"]
+    return(page_hspan, page_vspan)
+
+def audio_ms(value):
+    """Return audio time in milliseconds, from milliseconds or a ``HH:MM:SS.zzz`` string, ``None`` if not set."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return(int(value))
+    if isinstance(value, str) and value:
+        try:
+            return(hours_to_ms(value) if ":" in value else int(value))
+        except ValueError:
+            return None
+    return None
+
+class audio_timeline:
+    """Audio time of every element in a transcript, in milliseconds.
+
+    Elements without ``audiotime``, such as text typed in, get a time interpolated
+    between the nearest elements before and after with times, found by binary
+    search. A paragraph ``audiostarttime`` is used for its first element if the
+    element has no time. Paragraphs end at ``audioendtime``, or else where the
+    next paragraph starts, and the last paragraph ends at its latest element.
+    Paragraph times of zero are taken as not set, as in the paragraph editor.
+
+    :param paragraphs: iterable of ``(block number, paragraph data)``
+    :ivar dict times: ``block number: [time, ...]``, one time for each element
+    :ivar dict ends: ``block number: time`` end of each paragraph
+    """
+    def __init__(self, paragraphs):
+        paragraphs = list(paragraphs)
+        flat = []
+        spans = []
+        for block_num, block_data in paragraphs:
+            start = len(flat)
+            flat.extend(audio_ms(el.get("audiotime")) for el in block_data["strokes"])
+            if len(flat) > start and flat[start] is None:
+                flat[start] = audio_ms(block_data.get("audiostarttime")) or None
+            spans.append((start, len(flat)))
+        known = [ind for ind, time in enumerate(flat) if time is not None]
+        for ind, time in enumerate(flat):
+            if time is not None:
+                continue
+            after = bisect_left(known, ind)
+            if not known:
+                flat[ind] = 0
+            elif after == 0:
+                flat[ind] = flat[known[0]]
+            elif after == len(known):
+                flat[ind] = flat[known[-1]]
+            else:
+                before, after = known[after - 1], known[after]
+                flat[ind] = flat[before] + (flat[after] - flat[before]) * (ind - before) // (after - before)
+        self.times = {}
+        self.ends = {}
+        next_start = None
+        for (block_num, block_data), (start, end) in reversed(list(zip(paragraphs, spans))):
+            times = flat[start:end]
+            self.times[block_num] = times
+            par_end = audio_ms(block_data.get("audioendtime"))
+            if not par_end:
+                par_end = next_start if next_start is not None else max(times, default = 0)
+            self.ends[block_num] = par_end
+            if times:
+                next_start = times[0]
+
+def srt_cues(layouts, timeline):
+    """Time laid out SRT lines from the audio timeline.
+
+    A cue starts at the earliest time of the elements on its line and ends at the
+    latest, except the last cue of a paragraph, which ends with the paragraph.
+    Cues end no later than the next cue starts, so cues never overlap.
+
+    :param layouts: iterable of paragraph layouts from ``iter_layouts`` with ``srt``
+    :param timeline: ``audio_timeline`` of the transcript
+    :return: generator of ``(start, end, text)``, times in milliseconds
+    """
+    pending = None
+    for par in layouts:
+        block_num = str(par["block"])
+        times = timeline.times[block_num]
+        for num, (first, last, text) in enumerate(par["srt"]):
+            line_times = times[first:last + 1] or [timeline.ends[block_num]]
+            start = min(line_times)
+            end = timeline.ends[block_num] if num == len(par["srt"]) - 1 else max(line_times)
+            if pending:
+                yield((pending[0], max(pending[0], min(pending[1], start)), pending[2]))
+            pending = (start, end, text)
+    if pending:
+        yield((pending[0], max(pending[0], pending[1]), pending[2]))
+
+class text_layout_cache:
+    """Cache of paragraph layouts for formatted ASCII, HTML and RTF export.
+
+    Layouts are keyed by a hash of the paragraph strokes, the resolved paragraph
+    style, the line width and the user field values, so after a few corrections
+    only the changed paragraphs are wrapped again. RTF strings of paragraphs
+    are keyed by strokes and user field values. The cache belongs to the
+    transcript, and only one export uses it at a time.
+
+    :ivar dict layouts: ``key: [(text, time), ...]`` wrapped lines of a paragraph
+    :ivar dict rtf: ``key: (RTF string, stroke count)`` of a paragraph
+    :ivar dict manifests: ``path: export_manifest`` of formatted ASCII exports
+    :ivar int hits: paragraphs taken from cache by the latest export
+    :ivar int misses: paragraphs wrapped by the latest export
+    """
+    def __init__(self):
+        self.layouts = {}
+        self.rtf = {}
+        self.manifests = {}
+        self.hits = 0
+        self.misses = 0
+    def keys(self, paragraphs, style_table, config, user_field_dict):
+        """Return layout key of each paragraph.
+
+        :param list paragraphs: list of ``(block number, paragraph data)``
+        :param style_table: ``resolved_style_table`` of the transcript styles
+        :return: dict of ``{block number: key}``
+        """
+        page_hspan, page_vspan = page_spans(config)
+        context = json.dumps([page_hspan, user_field_dict], sort_keys = True, default = str)
+        keys = {}
+        for block_num, block_data in paragraphs:
+            digest = blake2b(digest_size = 16)
+            digest.update(json.dumps(block_data["strokes"], sort_keys = True, default = str).encode())
+            digest.update(style_table.style_key(block_data["style"]).encode())
+            digest.update(context.encode())
+            keys[block_num] = digest.hexdigest()
+        return(keys)
+    def rtf_keys(self, paragraphs, user_field_dict):
+        """Return RTF key of each paragraph, paragraphs with images are left out as the image file may change.
+
+        :param list paragraphs: list of ``(block number, paragraph data)``
+        :return: dict of ``{block number: key}``
+        """
+        context = json.dumps(user_field_dict, sort_keys = True, default = str)
+        keys = {}
+        for block_num, block_data in paragraphs:
+            if any(el["element"] == "image" for el in block_data["strokes"]):
+                continue
+            digest = blake2b(digest_size = 16)
+            digest.update(json.dumps(block_data["strokes"], sort_keys = True, default = str).encode())
+            digest.update(context.encode())
+            keys[block_num] = digest.hexdigest()
+        return(keys)
+    def lookup(self, keys, fmt = "text"):
+        """Return cached layouts for paragraphs, and count hits and misses.
+
+        :param dict keys: ``{block number: key}`` from ``keys`` or ``rtf_keys``
+        :param str fmt: ``text`` or ``rtf``
+        :return: dict of ``{block number: layout}`` for cached paragraphs
+        """
+        table = self.rtf if fmt == "rtf" else self.layouts
+        cached = {block_num: table[key] for block_num, key in keys.items() if key in table}
+        self.hits = len(cached)
+        self.misses = len(keys) - len(cached)
+        return(cached)
+    def record(self, layouts, keys, fmt = "text"):
+        """Pass layouts through while keeping them, replacing the cache once all have passed.
+
+        Paragraphs that no longer exist are dropped, as only layouts of the
+        latest export are kept.
+
+        :param layouts: iterable of paragraph layouts from ``iter_layouts``
+        :param dict keys: ``{block number: key}`` used for the export
+        :param str fmt: ``text`` or ``rtf``
+        """
+        new_layouts = {}
+        for par in layouts:
+            key = keys.get(str(par["block"]))
+            if key:
+                new_layouts[key] = (par["rtf"], par["strokes"]) if fmt == "rtf" else par["text"]
+            yield(par)
+        if fmt == "rtf":
+            self.rtf = new_layouts
+        else:
+            self.layouts = new_layouts
+        log.debug(f"Layout cache ({fmt}): {self.hits} paragraphs reused, {self.misses} laid out.")
+    def store(self, layouts, keys, fmt = "text"):
+        """Keep layouts of latest export, dropping paragraphs that no longer exist.
+
+        :param list layouts: paragraph layouts from ``layout_paragraphs``
+        :param dict keys: ``{block number: key}`` used for the export
+        :param str fmt: ``text`` or ``rtf``
+        """
+        for par in self.record(layouts, keys, fmt):
+            pass
+
+class export_manifest:
+    """Paragraph keys, line map and page offsets of a formatted ASCII export.
+
+    The next export to the same file compares paragraph keys. Pages before the
+    first changed paragraph are copied from the file, and once the unchanged
+    paragraphs at the end start on the same line as before, page breaks have
+    converged and the remaining pages are copied as well.
+
+    :param str context: transcript configuration the export was made with
+    :param list keys: layout key of each paragraph, in order
+    :param list line_starts: first line of each paragraph, then the total number of lines
+    :param list page_offsets: byte offset of each page in the file, then the file size
+    :param int mtime: modification time of the file in ns, copying is skipped if the file changed since
+    """
+    def __init__(self, context, keys, line_starts, page_offsets, mtime):
+        self.context = context
+        self.keys = keys
+        self.line_starts = line_starts
+        self.page_offsets = page_offsets
+        self.mtime = mtime
+    def changed_pages(self, path, context, keys, line_starts, page_vspan):
+        """Return first and last page number to write again.
+
+        :param path: export file
+        :param str context: transcript configuration of new export
+        :param list keys: layout key of each paragraph in new export
+        :param list line_starts: line map of new export, as for ``line_map``
+        :param int page_vspan: lines in a page
+        :return: tuple of ``(first page, last page)``, last page is ``None`` to write to the end, ``None`` to write the whole file
+        """
+        path = pathlib.Path(path)
+        if context != self.context or not path.exists():
+            return None
+        stat = path.stat()
+        if stat.st_mtime_ns != self.mtime or stat.st_size != self.page_offsets[-1]:
+            return None
+        shared = min(len(keys), len(self.keys))
+        first = next((i for i in range(shared) if keys[i] != self.keys[i]), shared)
+        same_tail = 0
+        while same_tail < shared - first and keys[-1 - same_tail] == self.keys[-1 - same_tail]:
+            same_tail += 1
+        first_page = line_starts[first] // page_vspan + 1
+        tail_line = line_starts[len(keys) - same_tail]
+        if tail_line != self.line_starts[len(self.keys) - same_tail]:
+            return((first_page, None))
+        # last page holding lines before the unchanged tail
+        return((first_page, -(-tail_line // page_vspan)))
+
+def line_map(layouts):
+    """Return first line of each laid out paragraph, then the total number of lines."""
+    line_starts = [0]
+    for par in layouts:
+        line_starts.append(line_starts[-1] + len(par["text"]))
+    return(line_starts)
+
+def iter_layouts(paragraphs, style_props, config, user_field_dict, formats, progress = None, cached = None, assets = None, cached_rtf = None):
+    """Decode and lay out paragraphs once for all requested text formats, one paragraph at a time.
+
+    Each paragraph is decoded into one ``element_collection``. Formats that only read the elements are done
+    first, as wrapping for SRT and text trims and expands the elements in place.
+
+    :param list paragraphs: list of ``(block number, paragraph data)``
+    :param dict style_props: resolved styles, ``properties`` of a ``resolved_style_table``
+    :param dict config: transcript configuration
+    :param dict user_field_dict: user field values
+    :param formats: formats to lay out, any of ``text``, ``srt`` and ``rtf``
+    :param progress: function called with each block number after it is laid out
+    :param dict cached: ``{block number: text layout}`` of paragraphs that do not need wrapping
+    :param assets: ``image_asset_cache`` used for images in RTF
+    :param dict cached_rtf: ``{block number: (RTF string, stroke count)}`` of paragraphs that do not need encoding
+    :return: generator of dicts, one per paragraph, with a key for each format
+    """
+    ef = element_factory()
+    page_hspan, page_vspan = page_spans(config)
+    cached = cached or {}
+    cached_rtf = cached_rtf or {}
+    for block_num, block_data in paragraphs:
+        par = {"block": int(block_num), "style": block_data["style"]}
+        text_formats = set(formats)
+        if block_num in cached:
+            par["text"] = cached[block_num]
+            text_formats.discard("text")
+        if block_num in cached_rtf:
+            par["rtf"], par["strokes"] = cached_rtf[block_num]
+            text_formats.discard("rtf")
+        if not text_formats:
+            yield(par)
+            if progress:
+                progress(int(block_num))
+            continue
+        el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = user_field_dict, assets = assets) for i in block_data["strokes"]])
+        if "rtf" in text_formats:
+            par["rtf"] = el_list.to_rtf()
+            par["strokes"] = el_list.stroke_count()
+        if "srt" in formats:
+            cues = format_srt_text(el_list, line_num = 0)
+            par["srt"] = [(*v["elements"], "".join([el.to_text() for el in v["text"]])) for v in cues.values()]
+        if "text" in text_formats:
+            par_dict = format_text(el_list, style_props[block_data["style"]], page_hspan, -1)
+            par["text"] = [(v["text"], v["time"]) for v in par_dict.values()]
+        yield(par)
+        if progress:
+            progress(int(block_num))
+
+def layout_paragraphs(paragraphs, style_props, config, user_field_dict, formats, progress = None, cached = None, assets = None):
+    """Lay out paragraphs with ``iter_layouts`` and return all layouts.
+
+    Used where the layouts are needed for more than one format. This is a
+    module function so it can run in a process pool.
+
+    :return: list of dicts, one per paragraph, with a key for each format
+    """
+    return(list(iter_layouts(paragraphs, style_props, config, user_field_dict, formats, progress = progress, cached = cached, assets = assets)))
+
+def line_records(layouts, config, start_line = 0):
+    """Place laid out paragraph lines on pages.
+
+    :param layouts: iterable of paragraph layouts from ``iter_layouts``
+    :param dict config: transcript configuration
+    :param int start_line: line in document of first line in ``layouts``, counting from 0
+    :return: generator of dicts ``{text, time, page, line}``, ``page`` and ``line`` count from 1
+    """
+    page_hspan, page_vspan = page_spans(config)
+    count = start_line
+    for par in layouts:
+        for text, time in par["text"]:
+            page, line = divmod(count, page_vspan)
+            count += 1
+            yield({"text": text, "time": time, "page": page + 1, "line": line + 1})
+
+def number_lines(records):
+    """Add line number in page to start of each line record."""
+    for record in records:
+        record["text"] = f"{str(record['line']).rjust(2)} {record['text']}"
+        yield(record)
+
+def timestamp_lines(records):
+    """Add time of first stroke to start of each line record."""
+    for record in records:
+        line_time = datetime.strptime(record["time"], "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')
+        record["text"] = f"{line_time} {record['text']}"
+        yield(record)
+
+def margin_text(config, position, page, page_hspan):
+    """Return header or footer line for a page.
+
+    :param dict config: transcript configuration
+    :param str position: ``header`` or ``footer``
+    :param int page: page number, replaces ``%p``
+    :param int page_hspan: characters in line
+    """
+    left = config[f"{position}_left"].replace("%p", str(page))
+    center = config[f"{position}_center"].replace("%p", str(page))
+    right = config[f"{position}_right"].replace("%p", str(page))
+    margin = center.center(page_hspan)
+    margin = left + margin[len(left):]
+    return(margin[:(len(margin)-len(right))] + right)
+
+def text_page_lines(layouts, config):
+    """Lines for formatted ASCII and HTML, with numbering, timestamps, headers and footers.
+
+    Each stage is a generator, so lines are paginated as paragraphs are laid
+    out, and only one line is held at a time.
+
+    :param layouts: iterable of paragraph layouts from ``iter_layouts``
+    :param dict config: transcript configuration
+    :return: generator of lines, including headers and footers
+    """
+    page_hspan, page_vspan = page_spans(config)
+    records = line_records(layouts, config)
+    if config["page_line_numbering"]:
+        records = number_lines(records)
+    if config["page_timestamp"]:
+        records = timestamp_lines(records)
+    for record in records:
+        if record["line"] == 1:
+            yield(margin_text(config, "header", record["page"], page_hspan))
+        yield(record["text"])
+        if record["line"] == page_vspan:
+            yield(margin_text(config, "footer", record["page"], page_hspan))
+
+def text_pages(layouts, config, start_line = 0, first_page = 1, last_page = None):
+    """Pages for formatted ASCII, as ``text_page_lines`` grouped by page.
+
+    :param layouts: iterable of paragraph layouts from ``iter_layouts``
+    :param dict config: transcript configuration
+    :param int start_line: line in document of first line in ``layouts``
+    :param int first_page: first page to return, ``start_line`` must not be after its first line
+    :param int last_page: last page to return, ``None`` for all pages
+    :return: generator of ``(page number, list of lines)``
+    """
+    page_hspan, page_vspan = page_spans(config)
+    records = line_records(layouts, config, start_line)
+    if config["page_line_numbering"]:
+        records = number_lines(records)
+    if config["page_timestamp"]:
+        records = timestamp_lines(records)
+    page_lines = []
+    for record in records:
+        if record["page"] < first_page:
+            continue
+        if last_page is not None and record["page"] > last_page:
+            break
+        if record["line"] == 1:
+            page_lines = [margin_text(config, "header", record["page"], page_hspan)]
+        page_lines.append(record["text"])
+        if record["line"] == page_vspan:
+            page_lines.append(margin_text(config, "footer", record["page"], page_hspan))
+            yield((record["page"], page_lines))
+            page_lines = []
+    if page_lines:
+        yield((record["page"], page_lines))
+
+def write_ascii_pages(path, pages, splice = None):
+    """Write formatted ASCII pages, copying unchanged pages from the existing file.
+
+    The file is written under a temporary name and replaces the existing file at the end.
+    Lines end in ``os.linesep``, as written by ``write_ascii``.
+
+    :param path: file path
+    :param pages: iterable of ``(page number, list of lines)`` to write
+    :param splice: ``(head end, tail start)`` byte offsets of the existing file to keep before and after ``pages``,
+        tail start is ``None`` to keep no tail, ``None`` to write only ``pages``
+    :return: tuple of ``{page number: byte offset}`` of written pages, offset of kept tail, file size
+    """
+    path = pathlib.Path(path)
+    temp_path = path.with_name(path.name + ".tmp")
+    offsets = {}
+    with open(temp_path, "wb", buffering = 1 << 20) as f:
+        old = open(path, "rb") if splice else None
+        try:
+            if old:
+                copy_bytes(old, f, 0, splice[0])
+            for page, lines in pages:
+                offsets[page] = f.tell()
+                f.write("".join(line + os.linesep for line in lines).encode("utf-8"))
+            tail_offset = f.tell()
+            if old and splice[1] is not None:
+                old.seek(0, os.SEEK_END)
+                copy_bytes(old, f, splice[1], old.tell())
+        finally:
+            if old:
+                old.close()
+        size = f.tell()
+    os.replace(temp_path, path)
+    return((offsets, tail_offset, size))
+
+def copy_bytes(source, target, start, end, chunk_size = 1 << 20):
+    """Copy bytes from ``start`` to ``end`` of source file to target file."""
+    source.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = source.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        target.write(chunk)
+        remaining -= len(chunk)
+
+def plain_page_lines(paragraphs, user_field_dict, max_lines = 25, progress = None):
+    """Lines for plain ASCII, wrapped to 70 characters, with page numbers and line numbers.
+
+    :param paragraphs: iterable of ``(block number, paragraph data)``
+    :param dict user_field_dict: user field values
+    :param int max_lines: lines in a page
+    :param progress: function called with each block number after it is wrapped
+    :return: generator of lines
+    """
+    ef = element_factory()
+    count = 0
+    for block_num, block_data in paragraphs:
+        el_list = element_collection([ef.gen_element(element_dict = i, user_field_dict = user_field_dict) for i in block_data["strokes"]])
+        for text in textwrap.wrap(el_list.to_text()):
+            page, line = divmod(count, max_lines)
+            count += 1
+            if line == 0:
+                yield(f'{page + 1:04}')
+            # padding space, column 2 is start of line number (left justified), column 7 is start of text
+            # <space> number{1,2} [space]{3,4}
+            yield(str(line + 1).ljust(5).rjust(6) + text)
+        if progress:
+            progress(int(block_num))
+
+def write_ascii(path, page_lines):
+    """Write paginated lines as formatted ASCII, as they are made.
+
+    :param path: file path
+    :param page_lines: iterable of lines, such as from ``text_page_lines``
+    """
+    with open(pathlib.Path(path), "w", encoding="utf-8") as f:
+        for line in page_lines:
+            f.write(f"{line}\n")
+    return(path)
+
+def write_html(path, page_lines):
+    """Write paginated lines as preformatted HTML, as they are made.
+
+    Gives the same markup as serializing an ``<html>`` tree with one ``<pre>``
+    element, without holding the whole text in memory.
+
+    :param path: file path
+    :param page_lines: iterable of lines, such as from ``text_page_lines``
+    """
+    with open(pathlib.Path(path), "w+", encoding="utf-8") as f:
+        f.write("<html><head></head><body><pre>")
+        for line_num, line in enumerate(page_lines):
+            if line_num:
+                f.write("\n")
+            f.write(html.escape(line, quote = False))
+        f.write("</pre></body></html>")
+    return(path)
+
+def write_srt(path, cues):
+    """Write timed cues as SRT captions.
+
+    :param path: file path
+    :param cues: iterable of ``(start, end, text)``, such as from ``srt_cues``
+    """
+    with open(pathlib.Path(path), "w", encoding="utf-8") as f:
+        for cue_num, (start, end, text) in enumerate(cues, start = 1):
+            f.write(f"{cue_num}\n")
+            f.write(ms_to_hours(start).replace(".", ",") + " --> " + ms_to_hours(end).replace(".", ",") + "\n")
+            f.write(f"{text}\n\n")
+    return(path)
+
+def count_strokes(paragraphs):
+    """Return number of strokes in paragraph data, same as ``stroke_count`` of the decoded paragraphs.
+
+    :param paragraphs: iterable of paragraph data
+    """
+    return(sum(el["stroke"].count("/") + 1 for block_data in paragraphs for el in block_data["strokes"] if el["element"] == "stroke"))
+
+def write_rtf(path, head, body, buffer_size = 1 << 20):
+    """Write RTF/CRE document from header and paragraph strings, as they are made.
+
+    :param path: file path
+    :param str head: document header up to and including page setup
+    :param body: iterable of strings for paragraphs, including paragraph style commands
+    :param int buffer_size: bytes buffered before writing to disk
+    """
+    with open(path, "w", encoding = "utf8", buffering = buffer_size) as f:
+        f.write(head)
+        for par_string in body:
+            f.write(par_string)
+        f.write("}")
+    return(path)
+
+def bundle_pool(processes = None):
+    """Return a process pool for export, ``None`` if processes can not be used.
+
+    Frozen installs start a new copy of the application for each process,
+    so layout is done in the current thread instead.
+
+    :param processes: number of processes, ``None`` for number of CPUs, ``0`` for no pool
+    """
+    if processes == 0 or getattr(sys, "frozen", False):
+        return None
+    try:
+        # fork is not safe with the Qt threads already running
+        return ProcessPoolExecutor(max_workers = processes, mp_context = get_context("spawn"))
+    except (OSError, ValueError) as e:
+        log.debug(f"Process pool not available for export: {e}")
+        return None
@@ -1,10 +1,13 @@
-import bisect
 import re 
-from PySide6.QtGui import QTextBlockFormat, QFont, QTextCharFormat, QTextOption
+import os
+import json
+from PySide6.QtGui import QTextBlockFormat, QFont, QFontMetrics, QTextCharFormat, QTextOption
 from PySide6.QtCore import Qt
 from plover_cat.steno_objects import *
 from plover_cat.helpers import *
 from copy import deepcopy
+# after the wildcard imports, which bring in the ``bisect`` function
+import bisect
 from odf.style import (Style, TextProperties, ParagraphProperties, FontFace, PageLayout, 
 PageLayoutProperties, MasterPage, TabStops, TabStop, GraphicProperties, Header, Footer)
 
@@ -166,27 +169,16 @@ def format_text(block_data, style, max_char = 80, line_num = 0):
         par_text[k]["text"] = par_text[k]["text"] + "\n" * line_spaces
     return(par_text)
 
-def format_srt_text(block_data, line_num = 0, audiostarttime = "", audioendtime = ""):
+def format_srt_text(block_data, line_num = 0):
     """Wrap steno data for SRT.
 
+    Cue times are not set here, see ``audio_timeline`` and ``srt_cues`` in ``export_bundle``.
+
     :param block_data: an ``element_collection`` for a paragraph
     :param int line_num: starting line number
-    :param audiostarttime: paragraph's ``audiostarttime``
-    :param audioendtime: paragraph's ``audioendtime``
-    :return: dict of dicts ``{line_number: {line_text, line_timestamp}}``
+    :return: dict of dicts ``{line_number: {text, elements}}``
     """
     par_text = steno_wrap_srt(block_data, max_char = 47, starting_line_num = line_num)
-    # line_times = []
-    # if audiostarttime and audioendtime:
-    #     for line, data in par_txt.items():
-    #         line_times.append(data["starttime"])
-    #         line_times.append(data["endtime"])
-    #     if all([t >= audiostarttime and t <= audioendtime for t in line_times]):
-    #         return(par_text)
-    #     else:
-    #         audiostarttime = hours_to_ms(audiostarttime)
-    #         audioendtime = hours_to_ms(audioendtime)
-    #         # not complete
     return(par_text)
 
 def steno_wrap_plain(text, block_data, max_char = 80, tab_space = 4, first_line_indent = "", 
@@ -209,24 +201,51 @@ def steno_wrap_plain(text, block_data, max_char = 80, tab_space = 4, first_line_
     # uses text string instead of block_data because text has pre-expanded tabs 
     wrapped = textwrap.wrap(text, width = max_char - 1, initial_indent= first_line_indent,
                 subsequent_indent= par_indent, expand_tabs = False, tabsize = tab_space, replace_whitespace=False)
-    begin_pos = 0
     par_dict = {}
-    for ind, i in enumerate(wrapped):
-        matches = block_data.extract_steno(begin_pos, len(block_data)).search_text(i.strip())
-        # matches = re.finditer(re.escape(i.strip()), text[begin_pos:])
-        for i in matches:
-            if i.start() >= 0:
-                match = i
-                break
-        end_pos = match.end()
-        ## try very desperately to recover
-        if end_pos == begin_pos:
-            end_pos = begin_pos + len(wrapped[ind]) - 1
-        line_time = block_data.extract_steno(begin_pos, end_pos).collection_time()
-        begin_pos = match.end()
-        par_dict[starting_line_num + ind + 1] = {"text": wrapped[ind], "time": line_time}
+    for ind, (line, line_time) in enumerate(zip(wrapped, align_line_times(text, wrapped, block_data))):
+        par_dict[starting_line_num + ind + 1] = {"text": line, "time": line_time}
     return(par_dict)
 
+def align_line_times(text, wrapped, block_data):
+    """Yield earliest element time for each wrapped line, in one pass over lines and elements.
+
+    Wrapping only drops whitespace, so each stripped line is found in ``text`` after
+    the end of the line before. Line positions are translated to functional positions
+    the same way as ``element_collection.extract_steno``, and a running pointer
+    over the cumulative element lengths finds the elements under each line.
+
+    :param str text: text that was wrapped, may have first tab expanded
+    :param list wrapped: wrapped lines
+    :param block_data: an ``element_collection`` for a paragraph
+    """
+    el_text = block_data.to_text()
+    # text can differ from elements by an expanded tab, map positions after it back
+    diff_pos = len(os.path.commonprefix([text, el_text]))
+    shift = len(text) - len(el_text)
+    cum_len = [0] + list(accumulate(block_data.lens()))
+    cum_lengths = [0] + list(accumulate(block_data.lengths()))
+    el_lengths = cum_lengths[1:]
+    times = [el.time for el in block_data]
+    pointer = 0
+    text_pos = 0
+    for line in wrapped:
+        content = line.strip()
+        line_start = text.index(content, text_pos)
+        text_pos = line_start + len(content)
+        start, end = [pos if pos <= diff_pos else max(diff_pos, pos - shift) for pos in (line_start, text_pos)]
+        start = translate_coords(cum_len, cum_lengths, start)
+        end = translate_coords(cum_len, cum_lengths, end)
+        # same elements as element_collection slicing, first and last may be partial
+        while pointer < len(el_lengths) and el_lengths[pointer] < start:
+            pointer += 1
+        first = pointer
+        last = first
+        while last < len(el_lengths) and el_lengths[last] < end:
+            last += 1
+        if first != last and el_lengths[first] == start:
+            first += 1
+        yield(min(times[first:last + 1]))
+
 def steno_wrap_odf(block_data, max_char = 80, tab_space = 4, first_line_indent = "", 
                         par_indent = "", starting_line_num = 0):
     """Wrap steno data properly for ODF.
@@ -265,20 +284,37 @@ def steno_wrap_srt(block_data, max_char = 47, tab_space = 0, first_line_indent =
     :param str first_line_indent: string to place at beginning of first line
     :param str par_indent: string to place at beginning of every line except first
     :param int starting_line_num: line number to add to beginning of each line
-    :return: dict of dicts ``{line_number: {line_text, starttime, endtime}}``
+    :return: dict of dicts ``{line_number: {text, elements}}``, ``elements`` is a tuple of
+        the indices in ``block_data`` of the first and last element with text on the line
     
     """                        
+    par_dict = {}
+    if not block_data.data:
+        return(par_dict)
     # change from other wrapper here, tabs are expanded into 0 spaces
     wrapper = steno_wrapper(width = max_char - 1, initial_indent= first_line_indent,
                 subsequent_indent= par_indent, expand_tabs = True, tabsize = tab_space, replace_whitespace=False)
-    wrapped = wrapper.wrap(text = block_data)
-    begin_pos = 0
-    par_dict = {}
-    for ind, i in enumerate(wrapped):
-        ec = element_collection(i)
-        start_time = ec.audio_time()
-        end_time = ec.audio_time(reverse = True)
-        par_dict[starting_line_num + ind + 1] = {"text": wrapped[ind], "starttime": start_time, "endtime": end_time}
+    # split into chunks as the wrapper does, keeping the elements each chunk came from
+    block_data.remove_end()
+    sources = []
+    merged = block_data.merge_elements(sources)
+    chunks = []
+    chunk_sources = []
+    chunk_starts = [0]
+    for el, source in zip(merged, sources):
+        for chunk in el.split():
+            chunks.append(chunk)
+            chunk_sources.append(source)
+            chunk_starts.append(chunk_starts[-1] + len(chunk))
+    wrapped = wrapper._wrap_chunks(chunks)
+    last_chunk = len(chunk_sources) - 1
+    line_start = 0
+    for ind, line in enumerate(wrapped):
+        line_end = line_start + sum(map(len, line))
+        first = chunk_sources[min(bisect.bisect_right(chunk_starts, line_start) - 1, last_chunk)][0]
+        last = chunk_sources[min(max(bisect.bisect_left(chunk_starts, line_end) - 1, 0), last_chunk)][1]
+        par_dict[starting_line_num + ind + 1] = {"text": line, "elements": (first, max(first, last))}
+        line_start = line_end
     return(par_dict)
 
 def load_odf_styles(path):
@@ -384,3 +420,75 @@ def txtprop_to_textformat(txt_dict):
     txt_format.setFont(potential_font, QTextCharFormat.FontPropertiesAll)
     return(txt_format)
 
+def resolve_styles(style_dict):
+    """Resolve inheritance of all styles at once.
+
+    Gives the same result as calling ``recursive_style_format`` for each
+    style and property, but every parent is only resolved once.
+
+    :param dict style_dict: transcript styles
+    :return: dict of ``{style name: {"paragraphproperties": dict, "textproperties": dict}}``
+    """
+    resolved = {}
+    def resolve(name):
+        if name in resolved:
+            return(resolved[name])
+        style = style_dict[name]
+        if "parentstylename" in style:
+            parent = resolve(style["parentstylename"])
+            props = {prop: {**parent[prop], **style.get(prop, {})} for prop in ["paragraphproperties", "textproperties"]}
+        else:
+            props = {prop: dict(style.get(prop, {})) for prop in ["paragraphproperties", "textproperties"]}
+        resolved[name] = props
+        return(props)
+    for name in style_dict:
+        resolve(name)
+    return(resolved)
+
+class resolved_style_table:
+    """Fully inherited style properties, formats and font metrics for one style revision.
+
+    Properties are resolved for all styles when the table is made. Qt formats
+    and font metrics are made the first time each style asks for them. A table
+    is never changed after a style edit, a new table is made instead, so an
+    export that holds the old table keeps a consistent view of the styles.
+    The resolved dicts are shared, and must not be modified.
+
+    :param dict styles: transcript styles, copied into the table
+    :param int revision: style revision, counts up with each new table in the editor
+    :ivar dict properties: ``{style name: {"paragraphproperties": dict, "textproperties": dict}}``
+    """
+    def __init__(self, styles = None, revision = 0):
+        self.styles = deepcopy(styles or {})
+        self.revision = revision
+        self.properties = resolve_styles(self.styles)
+        self.style_keys = {}
+        self.block_formats = {}
+        self.char_formats = {}
+        self.metrics = {}
+    def __contains__(self, name):
+        return(name in self.properties)
+    def __getitem__(self, name):
+        return(self.properties[name])
+    def style_key(self, name):
+        """Return resolved properties of style as a JSON string, for hashing."""
+        if name not in self.style_keys:
+            props = self.properties[name]
+            self.style_keys[name] = json.dumps([props["paragraphproperties"], props["textproperties"]], sort_keys = True)
+        return(self.style_keys[name])
+    def block_format(self, name):
+        """Return ``QTextBlockFormat`` for style."""
+        if name not in self.block_formats:
+            self.block_formats[name] = parprop_to_blockformat(self.properties[name]["paragraphproperties"])
+        return(self.block_formats[name])
+    def char_format(self, name):
+        """Return ``QTextCharFormat`` for style."""
+        if name not in self.char_formats:
+            self.char_formats[name] = txtprop_to_textformat(self.properties[name]["textproperties"])
+        return(self.char_formats[name])
+    def font_metrics(self, name):
+        """Return ``QFontMetrics`` of style font."""
+        if name not in self.metrics:
+            self.metrics[name] = QFontMetrics(self.char_format(name).font())
+        return(self.metrics[name])
+
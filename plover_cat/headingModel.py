@@ -0,0 +1,138 @@
+from bisect import bisect_left
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from plover import log
+
+class headingModel(QAbstractListModel):
+    """List model of the paragraphs in a transcript that are headings.
+
+    A paragraph is a heading if its style has a ``defaultoutlinelevel``.
+    Only the sorted block numbers of heading paragraphs are stored, text is
+    read from the ``QTextBlock`` when a view asks for it. The editor and the
+    commands that change paragraph styles or the number of paragraphs keep the
+    model in sync, so the navigation dock does not have to walk the document
+    on every cursor movement.
+
+    :param editor: ``PloverCATEditor`` holding the transcript
+    """
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.headings = []
+        """Sorted list of block numbers for heading paragraphs."""
+        self.editor.document().contentsChange.connect(self.contents_changed)
+
+    def rowCount(self, parent = QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.headings)
+
+    def data(self, index, role = Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.headings):
+            return None
+        block_number = self.headings[index.row()]
+        if role == Qt.UserRole:
+            return block_number
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            block = self.editor.document().findBlockByNumber(block_number)
+            if not block.isValid():
+                return None
+            level = self.heading_level(block)
+            if role == Qt.ToolTipRole:
+                return f"Paragraph {block_number}"
+            return " " * (level or 0) + block.text()
+        return None
+
+    def heading_level(self, block):
+        """Return outline level of a block, ``None`` if block is not a heading.
+
+        :param block: ``QTextBlock`` instance
+        """
+        block_data = block.userData()
+        if not block_data:
+            return None
+        style = self.editor.styles.get(block_data["style"])
+        if not style or not style.get("defaultoutlinelevel"):
+            return None
+        try:
+            return int(style["defaultoutlinelevel"])
+        except ValueError:
+            return None
+
+    def reset_headings(self):
+        """Rebuild the model by walking all blocks, use only after loading or style changes."""
+        self.beginResetModel()
+        self.headings = []
+        block = self.editor.document().begin()
+        while block.isValid():
+            if self.heading_level(block) is not None:
+                self.headings.append(block.blockNumber())
+            block = block.next()
+        self.endResetModel()
+        log.debug(f"Navigation model rebuilt with {len(self.headings)} headings.")
+
+    def update_block(self, block_number):
+        """Check whether a single block is a heading and update its row.
+
+        :param int block_number: ``blockNumber`` of block to check
+        """
+        block = self.editor.document().findBlockByNumber(block_number)
+        is_heading = block.isValid() and self.heading_level(block) is not None
+        row = bisect_left(self.headings, block_number)
+        present = row < len(self.headings) and self.headings[row] == block_number
+        if is_heading and not present:
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.headings.insert(row, block_number)
+            self.endInsertRows()
+        elif present and not is_heading:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.headings[row]
+            self.endRemoveRows()
+        elif present:
+            model_index = self.index(row)
+            self.dataChanged.emit(model_index, model_index)
+
+    def insert_block(self, block_number):
+        """Shift headings after a new block is inserted at ``block_number``.
+
+        The new block and the block before it are then re-checked.
+
+        :param int block_number: ``blockNumber`` of the new block
+        """
+        row = bisect_left(self.headings, block_number)
+        for i in range(row, len(self.headings)):
+            self.headings[i] += 1
+        if row < len(self.headings):
+            self.dataChanged.emit(self.index(row), self.index(len(self.headings) - 1), [Qt.UserRole])
+        if block_number > 0:
+            self.update_block(block_number - 1)
+        self.update_block(block_number)
+
+    def remove_block(self, block_number):
+        """Drop a removed block and shift headings after it.
+
+        :param int block_number: ``blockNumber`` the block had before removal
+        """
+        row = bisect_left(self.headings, block_number)
+        if row < len(self.headings) and self.headings[row] == block_number:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.headings[row]
+            self.endRemoveRows()
+        for i in range(row, len(self.headings)):
+            self.headings[i] -= 1
+        if row < len(self.headings):
+            self.dataChanged.emit(self.index(row), self.index(len(self.headings) - 1), [Qt.UserRole])
+        if block_number > 0:
+            self.update_block(block_number - 1)
+
+    def contents_changed(self, position, chars_removed, chars_added):
+        """Repaint a heading row when the text of its block changes.
+
+        :param int position: document position where the change happened
+        """
+        if not self.headings:
+            return
+        block_number = self.editor.document().findBlock(position).blockNumber()
+        row = bisect_left(self.headings, block_number)
+        if row < len(self.headings) and self.headings[row] == block_number:
+            model_index = self.index(row)
+            self.dataChanged.emit(model_index, model_index, [Qt.DisplayRole])
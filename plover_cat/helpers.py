@@ -5,7 +5,10 @@ import time
 from plover.config import Config, DictionaryConfig
 from plover.oslayer.keyboardcontrol import KeyboardEmulation
 from plover import log
+from dulwich.repo import Repo
+from dulwich import porcelain
 from dulwich.porcelain import open_repo_closing
+from plover_cat.constants import user_field_dict
 
 
 class mock_output(KeyboardEmulation):
@@ -52,6 +55,18 @@ def return_commits(repo, max_entries = 100):
             commit_strs.append(commit_info)
     return(commit_strs)
 
+def init_transcript_repo(transcript_dir, paths, message):
+    """Make ``dulwich`` repo in a new transcript folder and commit files, as the editor does when it first loads a transcript.
+
+    :param transcript_dir: transcript folder
+    :param list paths: files to commit
+    :param str message: commit message
+    """
+    repo = Repo.init(str(transcript_dir))
+    porcelain.add(repo.path, paths = paths)
+    porcelain.commit(repo, message = message, author = "plover2CAT <fake_email@fakedomain.com>", committer = "plover2CAT <fake_email@fakedomain.com>")
+    repo.close()
+
 def ms_to_hours(millis):
     """Convert milliseconds to formatted hour:min:sec.milli."""
     seconds, milliseconds = divmod(millis, 1000)
@@ -62,8 +77,8 @@ def ms_to_hours(millis):
 def hours_to_ms(hour_str):
     """Convert formatted hour:min:sec.milli to milliseconds."""
     hours, minutes, sec_ms = hour_str.split(":")
-    seconds, milliseconds = sec_md.split(".")
-    total_ms = milliseconds + seconds * 1000 + minutes * 60000 + hours * 3600000
+    seconds, sep, milliseconds = sec_ms.partition(".")
+    total_ms = int(milliseconds or 0) + int(seconds) * 1000 + int(minutes) * 60000 + int(hours) * 3600000
     return(total_ms)
 
 def in_to_pt(inch):
@@ -99,6 +114,37 @@ def save_json(json_dict, file_path):
         json.dump(json_dict, f, indent = 4)
         log.debug(f"Data saved in {str(file_path)}.")
 
+def save_json_stream(items, file_path):
+    """Save ``(key, value)`` pairs to json file as a dict, in the same format as ``save_json``.
+
+    Each value is written as it is taken from items, so items can be a generator
+    and the whole dict is never in memory.
+    """
+    file_path = pathlib.Path(file_path)
+    if not file_path.parent.exists():
+        file_path.parent.mkdir()
+    with open(file_path, "w") as f:
+        empty = True
+        for key, value in items:
+            f.write("{\n" if empty else ",\n")
+            # value is indented one level more, as it is nested in the dict
+            f.write(f"    {json.dumps(key)}: " + json.dumps(value, indent = 4).replace("\n", "\n    "))
+            empty = False
+        f.write("{}" if empty else "\n}")
+        log.debug(f"Data saved in {str(file_path)}.")
+
+def config_with_defaults(config_contents):
+    """Return transcript configuration, with defaults for settings missing in older configuration files.
+
+    :param dict config_contents: contents of ``config.CONFIG``
+    """
+    config = {"page_line_numbering": False, "page_linenumbering_increment": 1, "page_timestamp": False, "page_max_char": 0, "page_max_line": 0, 
+                "header_left": "", "header_center": "", "header_right": "", 
+                "footer_left": "", "footer_center": "", "footer_right": "", "enable_automatic_affix": False,
+                "user_field_dict": user_field_dict, "auto_paragraph_affixes": {}}
+    config.update(config_contents)
+    return(config)
+
 def add_custom_dicts(custom_dict_paths, dictionaries):
     """Takes list of dictionary paths, returns Plover dict config."""
     dictionaries = dictionaries[:]
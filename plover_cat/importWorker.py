@@ -0,0 +1,67 @@
+import pathlib
+from PySide6.QtCore import QObject, Signal
+from plover import log
+from plover_cat.helpers import save_json_stream
+from plover_cat.rtf_parsing import rtf_steno, styled_paragraphs
+from plover_cat.export_bundle import count_strokes
+
+class importWorker(QObject):
+    """Parse an RTF/CRE transcript file for import.
+
+    The file is parsed by ``rtf_steno`` off the GUI thread, and each paragraph
+    is written to a temporary file next to the transcript as it is parsed, so
+    only one paragraph is in memory at a time. The transcript itself is not
+    touched, the temporary file is sent with ``imported`` so the import can be
+    previewed before the transcript is replaced.
+
+    :param str path: path to RTF/CRE file
+    :param transcript_path: path to transcript file that the import will replace
+    :param float progress_interval: least seconds between ``progress`` signals
+    """
+    progress = Signal(int, int)
+    """Signal sent with characters read and size of file."""
+    imported = Signal(object)
+    """Signal sent with dict of ``path``, ``transcript`` (temporary file), ``styles``, ``page``,
+    and ``paragraphs`` and ``strokes`` counts when file is parsed."""
+    finished = Signal()
+    """Signal sent when import is done, cancelled or failed."""
+    postMessage = Signal(str)
+    """Signal sent with message to display."""
+    def __init__(self, path, transcript_path, progress_interval = 0.1):
+        QObject.__init__(self)
+        self.path = path
+        self.temp_path = pathlib.Path(transcript_path).with_suffix(".import")
+        self.parser = rtf_steno(path, progress = self.progress.emit)
+        self.parser.progress_interval = progress_interval
+        self.paragraphs = 0
+        self.strokes = 0
+    def cancel(self):
+        """Stop parsing at next paragraph, safe to call from another thread."""
+        self.parser.cancel()
+    def count(self, paragraphs):
+        """Pass on paragraphs, counting paragraphs and strokes, as counted for export."""
+        for par_num, par_dict in paragraphs:
+            self.paragraphs += 1
+            self.strokes += count_strokes([par_dict])
+            yield((par_num, par_dict))
+    def run(self):
+        """Parse file to temporary transcript file and send results, unless cancelled."""
+        style_dict = {}
+        try:
+            save_json_stream(self.count(styled_paragraphs(self.parser, style_dict)), self.temp_path)
+        except Exception as e:
+            log.warning(f"Import of {self.path} failed: {e!r}")
+            self.temp_path.unlink(missing_ok = True)
+            self.postMessage.emit(f"RTF import failed: {e}")
+            self.finished.emit()
+            return
+        if self.parser.cancelled:
+            log.debug(f"Import of {self.path} cancelled.")
+            self.temp_path.unlink(missing_ok = True)
+            self.postMessage.emit("RTF import cancelled.")
+            self.finished.emit()
+            return
+        log.debug(f"Parsed {self.paragraphs} paragraphs and {self.strokes} strokes from {self.path}.")
+        self.imported.emit({"path": self.path, "transcript": str(self.temp_path), "styles": style_dict, "page": self.parser.page,
+                            "paragraphs": self.paragraphs, "strokes": self.strokes})
+        self.finished.emit()
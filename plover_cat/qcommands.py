@@ -105,6 +105,8 @@ class steno_insert(QUndoCommand):
         block_data["strokes"].insert_steno(self.position_in_block, self.steno)
         block_data = update_user_data(block_data, "edittime")
         current_block.setUserData(block_data)
+        if self.document.element_registry.contains_tracked(self.steno):
+            self.document.element_registry.refresh_block(self.block, block_data["strokes"])
         cursor_format = self.document.txt_formats[block_data["style"]]
         for el in self.steno:
             cursor_format.setForeground(self.document.highlight_colors[el.element])
@@ -127,6 +129,8 @@ class steno_insert(QUndoCommand):
         res = block_data["strokes"].remove_steno(self.position_in_block, self.position_in_block + len(self.steno.to_text()))
         block_data = update_user_data(block_data, "edittime")
         current_block.setUserData(block_data)
+        if self.document.element_registry.contains_tracked(res):
+            self.document.element_registry.refresh_block(self.block, block_data["strokes"])
         current_cursor.removeSelectedText()
         log_dict = {"action": "remove", "block": self.block, "position_in_block": self.position_in_block, "end": self.position_in_block + len(self.steno.to_text())}
         log.info(f"Insert (undo): {log_dict}")
@@ -163,6 +167,8 @@ class steno_remove(QUndoCommand):
         current_cursor.setPosition(start_pos + len(self.steno), QTextCursor.KeepAnchor)
         self.document.setTextCursor(current_cursor)        
         current_block.setUserData(block_data)
+        if self.document.element_registry.contains_tracked(self.steno):
+            self.document.element_registry.refresh_block(self.block, block_data["strokes"])
         current_cursor.removeSelectedText()
         current_block.setUserState(1)
         self.document.setTextCursor(current_cursor)
@@ -180,6 +186,8 @@ class steno_remove(QUndoCommand):
         res = block_data["strokes"].insert_steno(self.position_in_block, self.steno)
         block_data = update_user_data(block_data, "edittime")
         current_block.setUserData(block_data)
+        if self.document.element_registry.contains_tracked(self.steno):
+            self.document.element_registry.refresh_block(self.block, block_data["strokes"])
         cursor_format = self.document.txt_formats[block_data["style"]]
         for el in self.steno:
             cursor_format.setForeground(self.document.highlight_colors[el.element])
@@ -231,6 +239,7 @@ class image_insert(QUndoCommand):
         self.image_element.height = image.height()
         current_block = self.cursor.block()
         current_block.userData()["strokes"].insert_steno(self.position_in_block, self.image_element)
+        self.document.element_registry.refresh_block(self.block, current_block.userData()["strokes"])
         self.block_state = current_block.userState()
         current_cursor = self.cursor
         current_cursor.setPosition(current_block.position() + self.position_in_block)
@@ -246,6 +255,7 @@ class image_insert(QUndoCommand):
         current_cursor.setPosition(current_block.position() + self.position_in_block)
         current_cursor.setPosition(current_block.position() + self.position_in_block + 1, QTextCursor.KeepAnchor)
         current_block.userData()["strokes"].remove_steno(self.position_in_block, self.position_in_block + 1)
+        self.document.element_registry.refresh_block(self.block, current_block.userData()["strokes"])
         current_cursor.removeSelectedText()
         log_dict = {"action": "remove", "block": self.block, "position_in_block": self.position_in_block, "end": self.position_in_block + 1}
         log.info(f"Insert image (undo): {log_dict}")        
@@ -332,6 +342,8 @@ class split_steno_par(QUndoCommand):
         log.info(f"Split: {log_dict}")
         self.block_state = current_block.userState()
         current_block.setUserState(1)
+        self.document.heading_model.insert_block(self.block + 1)
+        self.document.element_registry.split_block(self.block, first_data["strokes"], second_data["strokes"])
         current_cursor.movePosition(QTextCursor.StartOfBlock)
         self.document.setTextCursor(current_cursor)       
     def undo(self):
@@ -350,6 +362,8 @@ class split_steno_par(QUndoCommand):
         for key, item in self.block_data.items():
             restore_data = update_user_data(restore_data, key = key, value = item)
         current_block.setUserData(restore_data)
+        self.document.heading_model.remove_block(self.block + 1)
+        self.document.element_registry.merge_block(self.block, restore_data["strokes"])
         log_dict = {"action": "merge", "block": self.block}
         log.info(f"Split (undo): {log_dict}")
         self.document.setTextCursor(current_cursor)
@@ -425,6 +439,8 @@ class merge_steno_par(QUndoCommand):
         log.info(f"Merge: {log_dict}")
         self.document.setTextCursor(current_cursor)
         self.document.refresh_par_style(first_block)
+        self.document.heading_model.remove_block(second_block_num)
+        self.document.element_registry.merge_block(first_block_num, first_data["strokes"])
         self.setText("Merge: paragraphs %d & %d" % (first_block_num, second_block_num))
     def undo(self):
         current_cursor = self.document.textCursor()
@@ -457,6 +473,8 @@ class merge_steno_par(QUndoCommand):
         log.info(f"Merge (undo): {log_dict}")        
         self.document.setTextCursor(current_cursor)
         self.document.refresh_par_style(second_block)
+        self.document.heading_model.insert_block(second_block_num)
+        self.document.element_registry.split_block(first_block_num, first_data["strokes"], second_data["strokes"])
 
 class set_par_style(QUndoCommand):
     """Set paragraph style.
@@ -497,6 +515,7 @@ class set_par_style(QUndoCommand):
         current_block.setUserData(block_data)
         self.setText(f"Format: set paragraph {self.block} style to {self.style}")
         self.document.refresh_par_style(current_block)
+        self.document.heading_model.update_block(self.block)
         self.block_state = current_block.userState()
         current_block.setUserState(1)
         log_dict = {"action": "set_style", "block": self.block, "style": self.style}
@@ -508,6 +527,7 @@ class set_par_style(QUndoCommand):
             block_data = update_user_data(block_data, "style", self.old_style)
             current_block.setUserData(block_data)
             self.document.refresh_par_style(current_block)      
+            self.document.heading_model.update_block(self.block)
             log_dict = {"action": "set_style", "block": self.block, "style": self.old_style}
             log.info(f"Style: {log_dict}")
 
@@ -631,28 +651,23 @@ class update_field(QUndoCommand):
     def redo(self):
         current_cursor = self.cursor
         current_block = self.document.document().findBlockByNumber(self.block)
-        block = self.document.document().begin()
         self.document.user_field_dict = self.new_dict
         self.document.set_config_value("user_field_dict", self.new_dict)
-        for i in range(self.document.document().blockCount()):     
+        # only visit paragraphs the registry knows contain fields
+        for block_number in self.document.element_registry.blocks_with("field"):
+            block = self.document.document().findBlockByNumber(block_number)
             block_strokes = block.userData()["strokes"]
-            if any([el.element == "field" for el in block_strokes]):
-                block.setUserState(1)
-                for ind, el in enumerate(block_strokes):
-                    # print(ind)
-                    if el.element == "field":
-                        start_pos, end_pos = block_strokes.element_pos(ind)
-                        # print(block.position() + start_pos)
-                        current_cursor.setPosition(block.position() + start_pos)
-                        current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
-                        current_cursor.removeSelectedText()
-                        el.user_dict = self.new_dict
-                        cursor_format = self.document.txt_formats[block.userData()["style"]]
-                        cursor_format.setForeground(self.document.highlight_colors["index"])
-                        current_cursor.insertText(el.to_text(), cursor_format)
-            if block == self.document.document().lastBlock():
-                break
-            block = block.next()
+            block.setUserState(1)
+            for ind, el in enumerate(block_strokes):
+                if el.element == "field":
+                    start_pos, end_pos = block_strokes.element_pos(ind)
+                    current_cursor.setPosition(block.position() + start_pos)
+                    current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
+                    current_cursor.removeSelectedText()
+                    el.user_dict = self.new_dict
+                    cursor_format = self.document.txt_formats[block.userData()["style"]]
+                    cursor_format.setForeground(self.document.highlight_colors["index"])
+                    current_cursor.insertText(el.to_text(), cursor_format)
         current_cursor.setPosition(current_block.position() + self.position_in_block)
         self.setText("Fields: update fields")
         log_dict = {"action": "field", "field": self.new_dict}
@@ -660,27 +675,21 @@ class update_field(QUndoCommand):
     def undo(self):
         current_cursor = self.document.textCursor()
         current_block = self.document.document().findBlockByNumber(self.block)
-        block = self.document.document().begin()
         self.document.user_field_dict = self.store_dict
         self.document.set_config_value("user_field_dict", self.store_dict)
-        for i in range(self.document.document().blockCount()):   
+        for block_number in self.document.element_registry.blocks_with("field"):
+            block = self.document.document().findBlockByNumber(block_number)
             block_strokes = block.userData()["strokes"]
             for ind, el in enumerate(block_strokes):
-                # print(ind)
                 if el.element == "field":
                     start_pos, end_pos = block_strokes.element_pos(ind)
-                    # print(block.position() + start_pos)
                     current_cursor.setPosition(block.position() + start_pos)
                     current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
                     current_cursor.removeSelectedText()
                     el.user_dict = self.user_field_dict
                     cursor_format = self.document.txt_formats[block.userData()["style"]]
                     cursor_format.setForeground(self.document.highlight_colors["index"])
-                    # current_cursor.setCharFormat(cursor_format)  
                     current_cursor.insertText(el.to_text(), cursor_format)
-            if block == self.document.document().lastBlock():
-                break
-            block = block.next()
         current_cursor.setPosition(current_block.position() + self.position_in_block)
         log_dict = {"action": "field", "field": self.store_dict}
         log.info(f"Field: {log_dict}")        
@@ -699,7 +708,7 @@ class update_entries(QUndoCommand):
         super().__init__()
         self.document = document
         self.block = block
-        self.position_in_block = position
+        self.position_in_block = position_in_block
         self.new_dict = deepcopy(new_dict)
         # second one is the copy to be kept for undos
         self.store_dict = deepcopy(old_dict)
@@ -707,28 +716,23 @@ class update_entries(QUndoCommand):
     def redo(self):
         current_cursor = self.cursor
         current_block = self.document.document().findBlockByNumber(self.block)
-        block = self.document.document().begin()
-        for i in range(self.document.document().blockCount()):    
+        # only visit paragraphs the registry knows contain index entries
+        for block_number in self.document.element_registry.blocks_with("index"):
+            block = self.document.document().findBlockByNumber(block_number)
             block_strokes = block.userData()["strokes"]
-            if any([el.element == "index" for el in block_strokes]):
-                block.setUserState(1)
-                for ind, el in enumerate(block_strokes):
-                    # print(ind)
-                    if el.element == "index":
-                        start_pos, end_pos = block_strokes.element_pos(ind)
-                        current_cursor.setPosition(block.position() + start_pos)
-                        current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
-                        current_cursor.removeSelectedText()
-                        el.prefix = self.new_dict[el.indexname]["prefix"]
-                        el.hidden = self.new_dict[el.indexname]["hidden"]
-                        el.description = self.new_dict[el.indexname]["entries"][el.data]
-                        cursor_format = self.document.txt_formats[block.userData()["style"]]
-                        cursor_format.setForeground(self.document.highlight_colors["index"])
-                        # current_cursor.setCharFormat(cursor_format)                        
-                        current_cursor.insertText(el.to_text(), cursor_format)
-            if block == self.document.document().lastBlock():
-                break
-            block = block.next()
+            block.setUserState(1)
+            for ind, el in enumerate(block_strokes):
+                if el.element == "index":
+                    start_pos, end_pos = block_strokes.element_pos(ind)
+                    current_cursor.setPosition(block.position() + start_pos)
+                    current_cursor.setPosition(block.position() + end_pos, QTextCursor.KeepAnchor)
+                    current_cursor.removeSelectedText()
+                    el.prefix = self.new_dict[el.indexname]["prefix"]
+                    el.hidden = self.new_dict[el.indexname]["hidden"]
+                    el.description = self.new_dict[el.indexname]["entries"][el.data]
+                    cursor_format = self.document.txt_formats[block.userData()["style"]]
+                    cursor_format.setForeground(self.document.highlight_colors["index"])
+                    current_cursor.insertText(el.to_text(), cursor_format)
         current_cursor.setPosition(current_block.position() + self.position_in_block)
         self.setText("Indices: update indices.")
         log_dict = {"action": "index", "index": self.new_dict}
@@ -736,11 +740,10 @@ class update_entries(QUndoCommand):
     def undo(self):
         current_cursor = self.document.textCursor()
         current_block = self.document.document().findBlockByNumber(self.block)
-        block = self.document.document().begin()
-        for i in range(self.document.document().blockCount()):    
+        for block_number in self.document.element_registry.blocks_with("index"):
+            block = self.document.document().findBlockByNumber(block_number)
             block_strokes = block.userData()["strokes"]
             for ind, el in enumerate(block_strokes):
-                # print(ind)
                 if el.element == "index":
                     start_pos, end_pos = block_strokes.element_pos(ind)
                     current_cursor.setPosition(block.position() + start_pos)
@@ -752,9 +755,6 @@ class update_entries(QUndoCommand):
                     cursor_format = self.document.txt_formats[block.userData()["style"]]
                     cursor_format.setForeground(self.document.highlight_colors["index"])
                     current_cursor.insertText(el.to_text(), cursor_format)
-            if block == self.document.document().lastBlock():
-                break
-            block = block.next()
         current_cursor.setPosition(current_block.position() + self.position_in_block)
         log_dict = {"action": "index", "index": self.store_dict}
         log.info(f"Index: {log_dict}")
\ No newline at end of file
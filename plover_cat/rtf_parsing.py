@@ -1,125 +1,187 @@
 import codecs
-import struct
+import os
 import re
 from PySide6.QtGui import QFont, QFontDatabase
 from PySide6.QtWidgets import QProgressBar, QApplication
 from copy import deepcopy
 from datetime import datetime
-from pyparsing import (
-    Literal, 
-    Word, 
-    printables, 
-    alphas, 
-    nums, 
-    hexnums,
-    common,
-    White,
-    replace_with,
-    Opt, 
-    Or,
-    one_of,
-    Combine, 
-    OneOrMore, 
-    Group,
-    Suppress,
-    Forward,
-    ParseResults
-)
-
+from time import perf_counter
 from plover import log
 
 from plover_cat.steno_objects import *
 
-# control chars \ { }
-
-
-LBRACE, RBRACE, BKS = map(Suppress, "{}\\")
-
-
-text_whitespace = Opt(White(" \t")) + Word(printables, exclude_chars="\\{}") + Opt(White(" \t"))
-text_whitespace.set_name("text")
-# text_whitespace.leave_whitespace()
-
-# special chars that exist as control words, should be replaced by actual unicode equivalents, 
-tab_char = Literal("\\tab").set_parse_action(replace_with("\N{CHARACTER TABULATION}")) # "\t" or "\N{CHARACTER TABULATION}"
-emdash_char = Literal("\\emdash").set_parse_action(replace_with("\N{EM DASH}")) # "\u2014" or "\N{EM DASH}"
-endash_char = Literal("\\endash").set_parse_action(replace_with("\N{EN DASH}")) # "\u2013" or "\N{EN DASH}"
-emspace_char = Literal("\\emspace").set_parse_action(replace_with("\N{EM SPACE}")) # "\u2003" or "\N{EM SPACE}"
-enspace_char = Literal("\\enspace").set_parse_action(replace_with("\N{EN SPACE}")) # "\u2002" or "\N{EN SPACE}"
-nonbreaking_space = Literal("\\~").set_parse_action(replace_with("\N{NO-BREAK SPACE}")) # "\u00A0" or "\N{NO-BREAK SPACE}"
-soft_hyphen = Literal("\\-").set_parse_action(replace_with("\N{SOFT HYPHEN}")) # "\u00AD" or "\N{SOFT HYPHEN}"
-nonbreaking_hyphen = Literal("\\_").set_parse_action(replace_with("\N{HYPHEN}")) # "\u2010" or "\N{HYPHEN}"
-bullet_char = Literal("\\bullet").set_parse_action(replace_with("\N{BULLET}"))
-lquote_char = Literal("\\lquote").set_parse_action(replace_with("\N{LEFT SINGLE QUOTATION MARK}"))
-rquote_char = Literal("\\rquote").set_parse_action(replace_with("\N{RIGHT SINGLE QUOTATION MARK}"))
-ldblquote_char = Literal("\\ldblquote").set_parse_action(replace_with("\N{LEFT DOUBLE QUOTATION MARK}"))
-rdblquote_char = Literal("\\rdblquote").set_parse_action(replace_with("\N{RIGHT DOUBLE QUOTATION MARK}"))
-open_brace = Literal("\\{")
-close_brace = Literal("\\}")
-
-def pa(s, l, t):
-    hex_val = [int(tokn, 16) for tokn in t]
-    byte_val = struct.pack('B', int(hex_val[0]))
-    return(byte_val.decode("cp437"))
-
-hex_char = Group(Suppress(BKS + "'") + Word(hexnums).set_parse_action(pa).set_results_name("hex_char")) # hex in form \'xx
-hex_char.set_name("Hexadecimal character")
-
-def paste_text(s, l, t):
-    command_dict = {}
-    command_dict["control"] = "text"
-    command_dict["value"] = "".join(t[0])
-    return(command_dict)
-
-text_and_chars = Group(OneOrMore(text_whitespace ^ tab_char ^ emdash_char ^ endash_char ^ 
-    emspace_char ^ enspace_char ^ nonbreaking_space ^ soft_hyphen ^ 
-    nonbreaking_hyphen ^ hex_char ^ open_brace ^ close_brace ^ bullet_char ^ 
-    lquote_char ^ rquote_char ^ ldblquote_char ^ rdblquote_char))
-text_and_chars.set_name("text")
-text_and_chars.set_name("Plain text")
-text_and_chars.set_parse_action(paste_text)
-
-expr = Forward()
-
-def control_parse(s, l, t):
-    command_dict = {}
-    command_dict["control"] = t[0]["control"]
-    try:
-        command_dict["value"] = t[0]["num"]
-    except KeyError:
-        pass
-    try:
-        t[0]["ending"]
-        command_dict["ending"] = True
-    except KeyError:
-        pass
-    return(command_dict)
-
-control = Group(
-    BKS + 
-    Combine(
-        Word(alphas)("control") + 
-        Opt(Word(nums + '-').set_parse_action(common.convert_to_integer))("num") + 
-        Opt(White(" ", max=1)) + 
-        Opt(Literal(";"))("ending")
-        )
-    )
-control.set_name("control")
-control.set_parse_action(control_parse)
-
-def control_parse_ignore(s, l, t):
-    command_dict = t[0][1]
-    command_dict["ignore"] = True
-    return(command_dict)
-
-ignore = Group(Literal("\\*")("ignore") + control)
-ignore.set_name("ignore")
-ignore.set_parse_action(control_parse_ignore)
-
-expr <<= OneOrMore(ignore("ignore*") | hex_char("hex_char*") | control("control*") | text_and_chars("text*") | Group(LBRACE + expr + RBRACE)("group*"))
-expr.set_name("RTF")
-
-style_string = Suppress(Literal("\\par\\pard")) + OneOrMore(control("control*"))
+# control word with number, delimiter space and ";" | hex char | \* | control symbol | brace | text | newlines
+rtf_token = re.compile(r"\\([a-zA-Z]+)(-?\d+)? ?(;)?|\\'([0-9a-fA-F]{2})|\\(\*)|\\(.)|([{}])|([^\\{}\r\n]+)|([\r\n]+)", re.S)
+
+# control words and symbols that are characters in text
+rtf_special_chars = {
+    "tab": "\N{CHARACTER TABULATION}",
+    "emdash": "\N{EM DASH}",
+    "endash": "\N{EN DASH}",
+    "emspace": "\N{EM SPACE}",
+    "enspace": "\N{EN SPACE}",
+    "bullet": "\N{BULLET}",
+    "lquote": "\N{LEFT SINGLE QUOTATION MARK}",
+    "rquote": "\N{RIGHT SINGLE QUOTATION MARK}",
+    "ldblquote": "\N{LEFT DOUBLE QUOTATION MARK}",
+    "rdblquote": "\N{RIGHT DOUBLE QUOTATION MARK}",
+    "~": "\N{NO-BREAK SPACE}",
+    "-": "\N{SOFT HYPHEN}",
+    "_": "\N{HYPHEN}",
+    "{": "{",
+    "}": "}",
+    "\\": "\\"
+}
+
+# groups in the document group read by rtf_steno, by first control word
+rtf_read_groups = {"stylesheet", "fonttbl", "info", "cxframes", "cxt", "cxs", "cxa"}
+
+def rtf_token_groups(chunks, lookahead = 64):
+    """Yield groups of each ``rtf_token`` match in text read in chunks.
+
+    Tokens ending within ``lookahead`` characters of the end of a chunk are
+    matched again with the next chunk, so no token is split between chunks.
+
+    :param chunks: iterable of strings
+    :param int lookahead: longer than any token but text
+    """
+    rest = ""
+    for chunk in chunks:
+        text = rest + chunk
+        safe_end = len(text) - lookahead
+        pos = len(text)
+        for match in rtf_token.finditer(text):
+            if match.end() > safe_end:
+                pos = match.start()
+                break
+            yield match.groups()
+        rest = text[pos:]
+    for match in rtf_token.finditer(rest):
+        yield match.groups()
+
+def rtf_items(data, read_groups = rtf_read_groups):
+    """Yield the items of the document group of RTF text, in one pass over the text.
+
+    Control words are dicts with ``control``, ``value`` if the word has a number,
+    and ``ignore`` if the word follows ``\\*``. Runs of text, with special, hex and
+    unicode characters, are dicts with ``control`` as ``"text"``. Newlines are not
+    text, and runs of only spaces and tabs are dropped.
+
+    Groups starting with a control word in ``read_groups`` are lists of items,
+    with nested groups as lists. Other groups are skipped, only counting braces.
+
+    :param data: RTF text, or iterable of chunks of RTF text
+    :param read_groups: control words of groups to read
+    :return: generator of dicts and lists
+    """
+    depth = 0
+    # lists of groups being read, innermost last
+    groups = []
+    # a group opened in the document group, read if its first control word is in read_groups
+    deciding = False
+    skipping = False
+    # unicode fallback characters to skip, for each open group
+    uc_stack = [1]
+    skip_chars = 0
+    run = []
+    run_text = False
+    ignore = False
+    def add(item):
+        # add item to the group being read, True if it is an item of the document group
+        if groups:
+            groups[-1].append(item)
+            return(False)
+        return(depth == 1)
+    if isinstance(data, str):
+        data = (data,)
+    for word, num, ending, hex_code, star, symbol, brace, text, newline in rtf_token_groups(data):
+        if deciding and not star and not newline:
+            deciding = False
+            if brace == "}":
+                # empty group
+                groups.pop()
+                depth -= 1
+                uc_stack.pop()
+                ignore = False
+                continue
+            if word not in read_groups:
+                groups.pop()
+                skipping = True
+                ignore = False
+        if skipping:
+            if brace == "{":
+                depth += 1
+            elif brace == "}":
+                depth -= 1
+                if depth == 1:
+                    skipping = False
+                    uc_stack.pop()
+            continue
+        if text:
+            if skip_chars:
+                text = text[skip_chars:]
+                skip_chars = 0
+            run.append(text)
+            run_text = run_text or bool(text.strip(" \t"))
+            continue
+        if hex_code:
+            if skip_chars:
+                skip_chars -= 1
+            else:
+                run.append(bytes([int(hex_code, 16)]).decode("cp437"))
+                run_text = True
+            continue
+        special = symbol or word
+        if special in rtf_special_chars:
+            run.append(rtf_special_chars[special] + (ending or ""))
+            run_text = True
+            continue
+        if word == "u" and num:
+            run.append(chr(int(num) % 0x10000))
+            run_text = True
+            skip_chars = uc_stack[-1]
+            continue
+        if newline:
+            # newlines do not end runs of text
+            continue
+        skip_chars = 0
+        if run:
+            if run_text:
+                item = {"control": "text", "value": "".join(run)}
+                if add(item):
+                    yield item
+            run = []
+            run_text = False
+        if star:
+            ignore = True
+        elif brace == "{":
+            depth += 1
+            uc_stack.append(uc_stack[-1])
+            deciding = depth == 2
+            if deciding or groups:
+                groups.append([])
+        elif brace == "}":
+            depth -= 1
+            uc_stack.pop()
+            if groups:
+                group = groups.pop()
+                if add(group):
+                    yield group
+            if depth == 0:
+                return
+        else:
+            item = {"control": "par" if symbol in ("\n", "\r") else special}
+            if num:
+                item["value"] = int(num)
+                if word == "uc":
+                    uc_stack[-1] = int(num)
+            if ending:
+                item["ending"] = True
+            if ignore:
+                item["ignore"] = True
+                ignore = False
+            if add(item):
+                yield item
 
 def twip_to_in(twips):
     return(twips / 1440)
@@ -147,6 +209,9 @@ def append_value(dict_obj, key, value):
 def collapse_dict(element):
     new_dict = {}
     for i in element:
+        if not isinstance(i, dict):
+            # nested group
+            continue
         if "value" in i:
             append_value(new_dict, i["control"], i["value"])
         else:
@@ -154,11 +219,11 @@ def collapse_dict(element):
     return(new_dict)
 
 # with rtf_steno parsing, each control word parses as a dict, and text as a dict
-# each group parses as a list (ParseResults), and so results in a list with control words as dicts, more groups as lists, and text as dicts
+# each group read parses as a list, with control words as dicts, more groups as lists, and text as dicts
 class rtf_steno:
-    def __init__(self, file_name, progress_bar = None):
+    def __init__(self, file_name, progress_bar = None, progress = None):
         self.rtf_file = file_name
-        self.parse_results = None
+        # formatting of each paragraph with a style, from the control words after \par\pard
         self.scanned_styles = {}
         self.framerate = 30
         self.fonts = {}
@@ -178,6 +243,15 @@ class rtf_steno:
         self.defaultfont = ""
         self.fonts = {}
         self.progress_bar = progress_bar
+        # called with characters read and size of file, at most every progress_interval seconds
+        self.progress = progress
+        self.progress_interval = 0.1
+        self.progress_read = 0
+        self.progress_total = 0
+        self.progress_time = 0
+        self.cancelled = False
+        self.par_count = 0
+        self.scanned_count = 0
     def parse_framerate(self, element):
         element_dict = element[0]
         self.framerate = element_dict["value"]
@@ -248,7 +322,7 @@ class rtf_steno:
         milli = 1000 * frames / self.framerate
         return(milli)
     def set_new_paragraph(self):
-        par_num = str(len(self.paragraphs))
+        par_num = str(self.par_count)
         # par_text = "".join([stroke[2] for stroke in self.par])
         # this last stroke should capture the stroke emitting \par
         timestamp = "%sT%s:%s:%s.%s" % (self.date, self.timecode["hour"], self.timecode["min"], self.timecode["sec"], self.timecode["milli"])
@@ -259,14 +333,64 @@ class rtf_steno:
         par_dict["strokes"] = strokes
         par_dict["creationtime"] = strokes[0]["time"]
         par_dict["style"] = self.par_style
-        self.paragraphs[par_num] = par_dict
         self.par = []
-    def parse_document(self):
-        parse_results = expr.parse_file(self.rtf_file)
+        self.par_count += 1
+        return((par_num, par_dict))
+    def cancel(self):
+        """Stop parsing at next paragraph, safe to call from another thread."""
+        self.cancelled = True
+    def report_progress(self):
+        """Report characters read to progress bar and callback, at most once every ``progress_interval`` seconds."""
+        now = perf_counter()
+        if now - self.progress_time < self.progress_interval:
+            return
+        self.progress_time = now
+        if self.progress_bar:
+            self.progress_bar.setValue(self.progress_read)
+            QApplication.processEvents()
+        if self.progress:
+            self.progress(self.progress_read, self.progress_total)
+    def read_chunks(self, chunk_size = 1 << 20):
+        """Yield text of file in chunks, decoded as UTF-8, counting bytes read for progress.
+
+        Bytes that are not UTF-8 are replaced with U+FFFD instead of stopping the import.
+        """
+        self.progress_total = os.path.getsize(self.rtf_file)
         if self.progress_bar:
-            self.progress_bar.setMaximum(len(parse_results[0]))
-        self.parse_results = parse_results
-        for num, i in enumerate(parse_results[0]):
+            self.progress_bar.setMaximum(self.progress_total)
+        # incremental decoder keeps characters split across chunks
+        decoder = codecs.getincrementaldecoder("utf-8")(errors = "replace")
+        with open(self.rtf_file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                self.progress_read = min(self.progress_read + len(chunk), self.progress_total)
+                yield decoder.decode(chunk)
+        tail = decoder.decode(b"", final = True)
+        if tail:
+            yield tail
+    def parse_document(self):
+        """Parse file into ``paragraphs``, return ``False`` if cancelled before the end."""
+        for par_num, par_dict in self.iter_paragraphs():
+            self.paragraphs[par_num] = par_dict
+        return(not self.cancelled)
+    def iter_paragraphs(self):
+        """Parse file, yielding ``(paragraph number, paragraph dict)`` as each paragraph ends.
+
+        Only the paragraph being parsed is kept, and the file is read in chunks.
+        Stops at next paragraph if cancelled.
+        """
+        # control words following \par\pard, until the first text or group
+        par_controls = None
+        previous = None
+        for i in rtf_items(self.read_chunks()):
+            if par_controls is not None:
+                if isinstance(i, dict) and i["control"] != "text":
+                    par_controls.append(i)
+                else:
+                    self.add_par_style(par_controls)
+                    par_controls = None
+            elif previous == "par" and isinstance(i, dict) and i["control"] == "pard":
+                par_controls = []
+            previous = i["control"] if isinstance(i, dict) else None
             if isinstance(i, dict):
                 command_name = i["control"]
                 if command_name in ["paperh", "paperw", "margt", "margb", "margl", "margr"]:
@@ -277,13 +401,16 @@ class rtf_steno:
                     if not self.start_parsing_text:
                         self.start_parsing_text = True
                     else:
-                        self.set_new_paragraph()
+                        yield(self.set_new_paragraph())
+                        if self.cancelled:
+                            return
+                        self.report_progress()
                 if command_name == "s":
                     self.parse_par_style(i)
                 if command_name == "text" and self.start_parsing_text:
                     self.parse_text(i)
                     self.append_stroke()
-            elif isinstance(i, ParseResults):
+            elif isinstance(i, list):
                 command_name = i[0]["control"]
                 if command_name == "stylesheet":
                     self.parse_styles(i)
@@ -299,28 +426,15 @@ class rtf_steno:
                     self.parse_steno(i)
                 if command_name == "cxa":
                     self.parse_cxa(i)
-            else:
-                pass
-            if self.progress_bar:
-                self.progress_bar.setValue(num)
-                QApplication.processEvents()
-        self.set_new_paragraph()
-        self.scan_par_styles()
-    def scan_par_styles(self):
-        with open(self.rtf_file, 'r') as f:
-            data = f.read().rstrip()
-        style_list = []
-        for i in style_string.scanString(data):
-            style_list.append(i[0].asList())
-        # print(len(style_list))
-        par_style_index = 0
-        for ind, el in enumerate(style_list):
-            new_style_dict = collapse_dict(el)
-            # print(new_style_dict)
-            if "s" in new_style_dict:
-                self.scanned_styles[str(par_style_index)] = new_style_dict
-                par_style_index += 1
-                
+        if par_controls:
+            self.add_par_style(par_controls)
+        yield(self.set_new_paragraph())
+    def add_par_style(self, controls):
+        new_style_dict = collapse_dict(controls)
+        if "s" in new_style_dict:
+            self.scanned_styles[str(self.scanned_count)] = new_style_dict
+            self.scanned_count += 1
+
 # test_string = """
 # {\\rtf1\\ansi\\deff1
 # {\\fonttbl
@@ -332,11 +446,10 @@ class rtf_steno:
 # test_string = r"{\par\pard\s0\f0\fs24{\*\cxt 20:46:25:00}{\*\cxs WELG}Welcome{\*\cxt 20:46:26:00}{\*\cxs TOT} to the{\*\cxt 20:46:27:00}{\*\cxs SROEUS} Voice{\*\cxt 20:46:27:00}{\*\cxs -F} of{\*\cxt 20:46:27:00}{\*\cxs PHERBG} America{\xe{\*\cxexnum 1}Exhibit 1:  A knife }{\*\cxt 20:46:28:00}{\*\cxs AES}'s{\*\cxt 20:46:29:00}{\*\cxs TPHUS} News{\*\cxt 20:46:30:00}{\*\cxs WORDZ} Words{\*\cxt 20:46:30:00}{\*\cxs TP-PL}.}"
 
 
-# res = expr.parse_string(test_string)
+# res = list(rtf_items(test_string))
 # test_rtf = rtf_steno("plover_cat/test.rtf")
 # test_rtf.parse_document()
-# test_rtf.scan_par_styles()
-# test_rtf.parse_results[0][9]
+# test_rtf.scanned_styles
 
 def rtf_to_qfont(font):
     font_dict = {}
@@ -417,6 +530,12 @@ def extract_par_style(style_dict):
 
 def load_rtf_styles(parse_results):
     log.debug(f"Loading RTF styles from {parse_results.rtf_file}")
+    style_dict = rtf_document_styles(parse_results)
+    renamed_indiv_style = [name_par_style(style_dict, par_style, parse_results.fonts) for par_style in parse_results.scanned_styles.values()]
+    return(style_dict, renamed_indiv_style)
+
+def rtf_document_styles(parse_results):
+    """Return styles from stylesheet of parsed RTF/CRE file, keyed by style name."""
     style_dict = {}
     for k, v in parse_results.styles.items():
         style_name = v["text"]
@@ -429,56 +548,68 @@ def load_rtf_styles(parse_results):
     for k, v in style_dict.items():
         styles.append(k)
     style_dict = modify_styleindex_to_name(style_dict, styles)
-    font_names = []
-    for i, font in parse_results.fonts.items():
-        font_names.append(font["text"])
-    indiv_style = {}
-    for key, par_style in parse_results.scanned_styles.items():
-        par_dict = extract_par_style(par_style)
-        # indiv_style[key] = extract_par_style(par_style)
-        if "textproperties" in par_dict and "fontindex" in par_dict["textproperties"]:
-            fontindex = str(par_dict["textproperties"]["fontindex"])
-            font_dict = parse_results.fonts[fontindex]
-            if "text" in font_dict:
-                par_dict["textproperties"]["fontname"] = font_dict["text"].replace(";", "")
-                par_dict["textproperties"]["fontfamily"] = font_dict["text"].replace(";", "")
-            if "froman" in font_dict:
-                par_dict["textproperties"]["fontfamilygeneric"] = "roman"
-            if "fswiss" in font_dict:
-                par_dict["textproperties"]["fontfamilygeneric"] = "swiss"
-            if "fmodern" in font_dict:
-                par_dict["textproperties"]["fontfamilygeneric"] = "modern"
-            if "fscript" in font_dict:
-                par_dict["textproperties"]["fontfamilygeneric"] = "script"
-            if "fdecor" in font_dict:
-                par_dict["textproperties"]["fontfamilygeneric"] = "decorative"
-        indiv_style[key] = par_dict
-    renamed_indiv_style = []
-    for index, style in indiv_style.items():
-        par_style = style
-        doc_style = deepcopy(list(style_dict.values())[int(style["styleindex"])])
-        doc_style.update(par_style)
-        found_style = False
-        for k, v in style_dict.items():
-            if doc_style == v:
-                renamed_indiv_style.append(k)
-                found_style = True
-                break
-        if found_style:
-            continue
-        style_parent_name = list(style_dict.keys())[int(style["styleindex"])]
-        detect_int = re.search("\\d+$", style_parent_name)
-        if detect_int:
-            style_num = int(detect_int.group()) + 1
-        else:
-            style_num = 0
-        new_style_name = re.sub("\\d+$", "", style_parent_name) + str(style_num)
-        while new_style_name in list(style_dict.keys()):
-            style_num += 1
-            new_style_name = re.sub("\\d+$", "",style_parent_name) + str(style_num)
-        style_dict[new_style_name] = doc_style
-        renamed_indiv_style.append(new_style_name)
-    return(style_dict, renamed_indiv_style)    
+    return(style_dict)
+
+def name_par_style(style_dict, par_style, fonts):
+    """Return name of style matching formatting of a paragraph, adding a new style to style_dict if none match.
+
+    :param dict style_dict: styles from ``rtf_document_styles``, and styles added for earlier paragraphs
+    :param dict par_style: control words of paragraph, from ``rtf_steno.scanned_styles``
+    :param dict fonts: fonts of parsed RTF/CRE file
+    """
+    par_dict = extract_par_style(par_style)
+    if "textproperties" in par_dict and "fontindex" in par_dict["textproperties"]:
+        fontindex = str(par_dict["textproperties"]["fontindex"])
+        font_dict = fonts[fontindex]
+        if "text" in font_dict:
+            par_dict["textproperties"]["fontname"] = font_dict["text"].replace(";", "")
+            par_dict["textproperties"]["fontfamily"] = font_dict["text"].replace(";", "")
+        if "froman" in font_dict:
+            par_dict["textproperties"]["fontfamilygeneric"] = "roman"
+        if "fswiss" in font_dict:
+            par_dict["textproperties"]["fontfamilygeneric"] = "swiss"
+        if "fmodern" in font_dict:
+            par_dict["textproperties"]["fontfamilygeneric"] = "modern"
+        if "fscript" in font_dict:
+            par_dict["textproperties"]["fontfamilygeneric"] = "script"
+        if "fdecor" in font_dict:
+            par_dict["textproperties"]["fontfamilygeneric"] = "decorative"
+    doc_style = deepcopy(list(style_dict.values())[int(par_dict["styleindex"])])
+    doc_style.update(par_dict)
+    for k, v in style_dict.items():
+        if doc_style == v:
+            return(k)
+    style_parent_name = list(style_dict.keys())[int(par_dict["styleindex"])]
+    detect_int = re.search("\\d+$", style_parent_name)
+    if detect_int:
+        style_num = int(detect_int.group()) + 1
+    else:
+        style_num = 0
+    new_style_name = re.sub("\\d+$", "", style_parent_name) + str(style_num)
+    while new_style_name in list(style_dict.keys()):
+        style_num += 1
+        new_style_name = re.sub("\\d+$", "",style_parent_name) + str(style_num)
+    style_dict[new_style_name] = doc_style
+    return(new_style_name)
+
+def styled_paragraphs(parse_results, style_dict):
+    """Yield paragraphs of RTF/CRE file as they are parsed, with styles named as by ``load_rtf_styles``.
+
+    Paragraphs are not kept by ``parse_results``, so only one paragraph is in memory at a time.
+
+    :param parse_results: ``rtf_steno`` of file, not yet parsed
+    :param dict style_dict: empty dict, filled with styles of the file as paragraphs are parsed
+    :return: generator of ``(paragraph number, paragraph dict)``
+    """
+    log.debug(f"Loading RTF styles from {parse_results.rtf_file}")
+    for par_num, par_dict in parse_results.iter_paragraphs():
+        if par_num == "0":
+            # stylesheet comes before the first paragraph
+            style_dict.update(rtf_document_styles(parse_results))
+        par_style = parse_results.scanned_styles.pop(par_num, None)
+        if par_style:
+            par_dict["style"] = name_par_style(style_dict, par_style, parse_results.fonts)
+        yield((par_num, par_dict))
 
 def import_version_one(json_document):
     """Formats JSON file with older transcript format into standard transcript dict form"""
@@ -0,0 +1,126 @@
+import re
+from itertools import accumulate
+from PySide6.QtCore import QObject, Signal
+from plover import log
+
+untrans_pattern = r"(\b|\*)(?=[STKPWHRAO*EUFBLGDZ]{3,})S?T?K?P?W?H?R?A?O?\*?E?U?F?R?P?B?L?G?T?S?D?Z?\b"
+"""Pattern for untranslated steno, same as used by ``untrans_search``."""
+
+def snapshot_paragraphs(document, steno = False):
+    """Copy paragraph text, and strokes if needed, for searching off the GUI thread.
+
+    :param document: ``QTextDocument`` to copy from
+    :param bool steno: also copy ``(stroke, text length)`` of each element
+    :return: list of ``(block number, text, strokes)``, ``strokes`` is ``None`` if not ``steno``
+    """
+    paragraphs = []
+    block = document.begin()
+    while block.isValid():
+        strokes = None
+        if steno and block.userData():
+            strokes = [(el.stroke if el.element == "stroke" else " ", len(el)) for el in block.userData()["strokes"]]
+        paragraphs.append((block.blockNumber(), block.text(), strokes))
+        block = block.next()
+    return(paragraphs)
+
+def match_preview(text, start, end):
+    """Return match with up to two preceding words for display.
+
+    :param str text: paragraph text
+    :param int start: match start in paragraph
+    :param int end: match end in paragraph
+    """
+    before = re.search(r"(\S+\s+){0,2}$", text[:start])
+    return(text[before.start():end])
+
+class searchWorker(QObject):
+    """Find all matches in a snapshot of the transcript.
+
+    The worker only works on the copy made by ``snapshot_paragraphs``, so the
+    editor can keep changing while the search runs on another thread.
+    Matches are sent in chunks as ``(block number, start, end, preview)`` tuples
+    with positions relative to the start of the paragraph.
+
+    :param int search_id: id sent back with each chunk, so results of older searches can be dropped
+    :param list paragraphs: paragraph snapshot from ``snapshot_paragraphs``
+    :param str query: search text, steno outline, or regular expression
+    :param str mode: one of ``text``, ``regex``, ``steno`` or ``untrans``
+    :param bool case: case sensitive, for ``text`` and ``regex``
+    :param bool whole: match whole words only, for ``text`` and ``regex``
+    :param int chunk_size: number of matches to collect before sending
+    """
+    matches = Signal(int, list)
+    """Signal sent with search id and a chunk of matches."""
+    progress = Signal(int)
+    """Signal sent with number of paragraphs searched."""
+    finished = Signal()
+    """Signal sent when search is done or cancelled."""
+    postMessage = Signal(str)
+    """Signal sent with message to display."""
+    def __init__(self, search_id, paragraphs, query, mode = "text", case = False, whole = False, chunk_size = 50):
+        QObject.__init__(self)
+        self.search_id = search_id
+        self.paragraphs = paragraphs
+        self.query = query
+        self.mode = mode
+        self.case = case
+        self.whole = whole
+        self.chunk_size = chunk_size
+        self.cancelled = False
+    def cancel(self):
+        """Stop search at next paragraph, safe to call from another thread."""
+        self.cancelled = True
+    def compile_query(self):
+        """Return compiled regular expression for text modes."""
+        if self.mode == "untrans":
+            return(re.compile(untrans_pattern))
+        pattern = self.query if self.mode == "regex" else re.escape(self.query)
+        if self.whole:
+            pattern = r"\b(?:%s)\b" % pattern
+        flags = 0 if self.case else re.IGNORECASE
+        return(re.compile(pattern, flags))
+    def steno_matches(self, text, strokes, outline):
+        """Yield start, end of every element run matching the outline."""
+        if not strokes:
+            return
+        stroke_list = [s for s, length in strokes]
+        cum_len = [0] + list(accumulate(length for s, length in strokes))
+        n = len(outline)
+        for i in range(len(stroke_list) - n + 1):
+            if tuple(stroke_list[i:i + n]) == outline:
+                yield(cum_len[i], cum_len[i + n])
+    def run(self):
+        """Search all paragraphs and emit matches in chunks."""
+        chunk = []
+        found = 0
+        try:
+            if self.mode == "steno":
+                outline = tuple(self.query.split("/"))
+            else:
+                regex = self.compile_query()
+        except re.error as e:
+            self.postMessage.emit(f"Invalid search expression: {e}")
+            self.finished.emit()
+            return
+        for count, (block_number, text, strokes) in enumerate(self.paragraphs):
+            if self.cancelled:
+                log.debug(f"Search {self.search_id} cancelled.")
+                self.finished.emit()
+                return
+            if self.mode == "steno":
+                spans = self.steno_matches(text, strokes, outline)
+            else:
+                spans = ((m.start(), m.end()) for m in regex.finditer(text) if m.end() > m.start())
+            for start, end in spans:
+                chunk.append((block_number, start, end, match_preview(text, start, end)))
+                found += 1
+            if len(chunk) >= self.chunk_size:
+                self.matches.emit(self.search_id, chunk)
+                chunk = []
+            if count % 100 == 0:
+                self.progress.emit(count)
+        if chunk:
+            self.matches.emit(self.search_id, chunk)
+        self.progress.emit(len(self.paragraphs))
+        self.postMessage.emit(f"Search finished, {found} match(es) found.")
+        self.finished.emit()
@@ -0,0 +1,87 @@
+import re
+from PySide6.QtCore import QObject, Signal
+from plover import log
+
+word_re = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+"""Pattern for a word to spellcheck, letters with inner apostrophes."""
+
+class spellcheckWorker(QObject):
+    """Spellcheck a snapshot of the transcript.
+
+    Each distinct word is looked up in the ``spylls`` dictionary once, and the
+    verdict is kept in ``verdicts``. Misspellings of each paragraph are kept in
+    ``paragraph_cache`` keyed by paragraph text, so a paragraph is only checked
+    again after its text is edited. Both dicts belong to the transcript and
+    are passed in by reference so they are reused across passes.
+
+    :param int check_id: id sent back with each chunk, so results of older passes can be dropped
+    :param list paragraphs: list of ``(block number, text, ...)`` from ``snapshot_paragraphs``
+    :param dictionary: ``spylls`` dictionary
+    :param dict verdicts: ``word: bool`` results of previous lookups
+    :param dict paragraph_cache: ``paragraph text: [(start, end, word), ...]``
+    :param int chunk_size: number of misspellings to collect before sending
+    """
+    misspelled = Signal(int, list)
+    """Signal sent with pass id and a chunk of ``(block number, start, end, word)``."""
+    done = Signal(int)
+    """Signal sent with pass id after all paragraphs are checked."""
+    finished = Signal()
+    """Signal sent when pass is done or cancelled."""
+    postMessage = Signal(str)
+    """Signal sent with message to display."""
+    def __init__(self, check_id, paragraphs, dictionary, verdicts, paragraph_cache, chunk_size = 50):
+        QObject.__init__(self)
+        self.check_id = check_id
+        self.paragraphs = paragraphs
+        self.dictionary = dictionary
+        self.verdicts = verdicts
+        self.paragraph_cache = paragraph_cache
+        self.chunk_size = chunk_size
+        self.cancelled = False
+        self.lookups = 0
+    def cancel(self):
+        """Stop pass at next paragraph, safe to call from another thread."""
+        self.cancelled = True
+    def check_word(self, word):
+        """Return memoized verdict for word."""
+        verdict = self.verdicts.get(word)
+        if verdict is None:
+            verdict = bool(self.dictionary.lookup(word))
+            self.verdicts[word] = verdict
+            self.lookups += 1
+        return(verdict)
+    def check_paragraph(self, text):
+        """Return misspellings in paragraph text, from cache if text is unchanged."""
+        cached = self.paragraph_cache.get(text)
+        if cached is not None:
+            return(cached)
+        result = [(m.start(), m.end(), m.group()) for m in word_re.finditer(text) if not self.check_word(m.group())]
+        self.paragraph_cache[text] = result
+        return(result)
+    def run(self):
+        """Check all paragraphs and emit misspellings in chunks."""
+        chunk = []
+        seen_text = set()
+        found = 0
+        for block_number, text, *rest in self.paragraphs:
+            if self.cancelled:
+                log.debug(f"Spellcheck pass {self.check_id} cancelled.")
+                self.finished.emit()
+                return
+            seen_text.add(text)
+            for start, end, word in self.check_paragraph(text):
+                chunk.append((block_number, start, end, word))
+                found += 1
+            if len(chunk) >= self.chunk_size:
+                self.misspelled.emit(self.check_id, chunk)
+                chunk = []
+        if chunk:
+            self.misspelled.emit(self.check_id, chunk)
+        # drop paragraphs that no longer exist so the cache does not grow with every edit
+        for text in list(self.paragraph_cache):
+            if text not in seen_text:
+                self.paragraph_cache.pop(text, None)
+        log.debug(f"Spellcheck pass {self.check_id}: {found} misspellings, {self.lookups} new lookups, {len(self.verdicts)} words memoized.")
+        self.postMessage.emit(f"Spellcheck finished, {found} possible misspelling(s).")
+        self.done.emit(self.check_id)
+        self.finished.emit()
@@ -1,7 +1,7 @@
 import re
 import textwrap
 from datetime import datetime
-from collections import UserList, UserString
+from collections import UserList, UserString, Counter
 from copy import deepcopy
 from itertools import accumulate
 from bisect import bisect_left, bisect
@@ -17,6 +17,24 @@ _whitespace = '\u2029\t\n\x0b\x0c\r '
 whitespace = r'[%s]' % re.escape(_whitespace)
 wordsep_simple_re = re.compile(r'(%s+)' % whitespace)
 
+def rtf_timecode(time):
+    """Return RTF/CRE timecode ``HH:MM:SS:00`` from element time.
+
+    Element times are ISO strings, so the clock is sliced out directly,
+    other formats are parsed.
+
+    :param str time: time in ``%Y-%m-%dT%H:%M:%S.%f`` format
+    """
+    if len(time) >= 19 and time[10] == "T":
+        return(time[11:19] + ":00")
+    return(datetime.strptime(time, "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S') + ":00")
+
+def rtf_ignored_group(control, text):
+    """Return ``{\\*\\control text}``, same as ``write_command`` with ``visible = False, group = True``."""
+    if text:
+        return("{\\*\\%s %s}" % (control, text))
+    return("{\\*\\%s}" % control)
+
 class text_element(UserString):
     """The base text element used in editor.
 
@@ -118,11 +136,17 @@ class text_element(UserString):
     def to_text(self):
         """Return "text" representation as imagined for ``QTextEdit``."""
         return(self.data)
-    def to_rtf(self):
-        """Return string representation with control groups from RTF/CRE spec as necessary."""
-        time_string = datetime.strptime(self.time, "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')      
-        string = write_command("cxt", time_string + ":00", visible = False, group = True) + write_command("cxs", "", visible = False, group = True) + self.to_text()
-        return(string)
+    def rtf_timecode(self):
+        """Return RTF/CRE timecode written with element, ``None`` if element is written without one."""
+        return(rtf_timecode(self.time))
+    def to_rtf(self, last_timecode = None):
+        """Return string representation with control groups from RTF/CRE spec as necessary.
+
+        :param str last_timecode: timecode last written in paragraph, ``\\cxt`` is left out if it is the same
+        """
+        timecode = self.rtf_timecode()
+        time_string = "" if timecode == last_timecode else rtf_ignored_group("cxt", timecode)
+        return(time_string + rtf_ignored_group("cxs", "") + self.to_text())
     def to_odt(self, paragraph, document):
         """Populate ODF paragraph element with instance text.
         
@@ -217,13 +241,31 @@ class stroke_text(text_element):
         else:
             return NotImplemented
             # raise TypeError("Stroke elements can only combine with other stroke or text elements.")
-    def to_rtf(self):
-        time_string = datetime.strptime(self.time, "%Y-%m-%dT%H:%M:%S.%f").strftime('%H:%M:%S')      
-        string = write_command("cxt", time_string + ":00", visible = False, group = True) + write_command("cxs", self.stroke, visible = False, group = True) + self.data
-        return(string)
+    def to_rtf(self, last_timecode = None):
+        timecode = self.rtf_timecode()
+        time_string = "" if timecode == last_timecode else rtf_ignored_group("cxt", timecode)
+        return(time_string + rtf_ignored_group("cxs", self.stroke) + self.data)
     def to_display(self):
         return("\U0001F162\n%s\n%s" % (self.stroke, self.data))
 
+def image_to_rtf(path):
+    """Return RTF ``pict`` group with image at path encoded as PNG.
+
+    :param path: path to image
+    :return: RTF string
+    """
+    image = QImage(QImageReader(str(path)).read())
+    ba = QByteArray()
+    buffer = QBuffer(ba)
+    buffer.open(QIODevice.WriteOnly)
+    image.save(buffer, "PNG")
+    hex_string = ba.toHex()
+    string = (write_command("pngblip") + write_command("picw", value = image.width())
+             + write_command("pich", value = image.height()) + write_command("picwgoal", value = image.width() * 15)
+             + write_command("pichgoal", value = image.height() * 15))
+    string = write_command("pict", hex_string.data().decode(), value=string, group = True)
+    return(string)
+
 class image_text(text_element):
     """Image element used in editor.
 
@@ -233,8 +275,9 @@ class image_text(text_element):
     :type width: int
     :param height: pixel height of image
     :type height: int
+    :param assets: ``image_asset_cache`` for export, images are encoded on every export if not supplied
     """
-    def __init__(self, path = None, width = None, height = None, **kargs):
+    def __init__(self, path = None, width = None, height = None, assets = None, **kargs):
         super().__init__(**kargs)
         self.data = "\ufffc"
         """Representation of image when image cannot be rendered."""
@@ -243,6 +286,7 @@ class image_text(text_element):
         self.path = path
         self.width = width
         self.height = height
+        self.assets = assets
     def __add__(self, other):
         """Addition of elements to image is not allowed.
         
@@ -257,25 +301,24 @@ class image_text(text_element):
         :rtype: int
         """
         return(1)
+    def to_json(self):
+        return({k: v for k, v in self.__dict__.items() if k != "assets"})
     def to_display(self):
         return("\U0001F158\n%s\n " % self.path)
-    def to_rtf(self):
-        image = QImage(QImageReader(self.path).read())
-        ba = QByteArray()
-        buffer = QBuffer(ba)
-        buffer.open(QIODevice.WriteOnly)
-        image.save(buffer, "PNG")
-        hex_string = ba.toHex()
-        string = (write_command("pngblip") + write_command("picw", value = image.width())
-                 + write_command("pich", value = image.height()) + write_command("picwgoal", value = image.width() * 15)
-                 + write_command("pichgoal", value = image.height() * 15))
-        string = write_command("pict", hex_string.data().decode(), value=string, group = True)
-        return(string)
+    def rtf_timecode(self):
+        return(None)
+    def to_rtf(self, last_timecode = None):
+        if self.assets:
+            return(self.assets.rtf_picture(self.path))
+        return(image_to_rtf(self.path))
     def to_odt(self, paragraph, document):
         width_in = "{0}in".format(pixel_to_in(self.width))
         height_in = "{0}in".format(pixel_to_in(self.height))
         image_frame = Frame(attributes = {"stylename": "Graphics", "anchortype": "as-char", "width": width_in, "height": height_in})
-        image_ref = document.addPicture(self.path)
+        if self.assets:
+            image_ref = self.assets.odf_picture(document, self.path)
+        else:
+            image_ref = document.addPicture(self.path)
         image_frame.addElement(Image(href = image_ref))
         paragraph.addElement(image_frame)
 
@@ -327,7 +370,9 @@ class text_field(text_element):
             self.data = self.user_dict[self.name]
         else:
             self.data = "{%s}" % str(self.name)
-    def to_rtf(self):
+    def rtf_timecode(self):
+        return(None)
+    def to_rtf(self, last_timecode = None):
         self.update()
         rtf_string = write_command("fldinst", "DOCVARIABLE %s" % self.name, visible=False, group=True)
         rtf_string = rtf_string + write_command("fldrslt", self.data)
@@ -389,13 +434,16 @@ class automatic_text(stroke_text):
     def length(self):
         """Return length of data, compare to ``__len__()``."""
         return(len(self.data))
-    def to_rtf(self):
+    def to_rtf(self, last_timecode = None):
         string = ""
         if self.prefix:
-            string = string + write_command("cxa",  self.prefix, visible = False, group = True)
-        string = string + write_command("cxt", self.time + ":00", visible = False, group = True) + write_command("cxs", self.stroke, visible = False, group = True) + self.data
+            string = rtf_ignored_group("cxa", self.prefix)
+        timecode = self.rtf_timecode()
+        if timecode != last_timecode:
+            string += rtf_ignored_group("cxt", timecode)
+        string += rtf_ignored_group("cxs", self.stroke) + self.data
         if self.suffix:
-            string = string + write_command("cxa",  self.suffix, visible = False, group = True)
+            string += rtf_ignored_group("cxa", self.suffix)
         return(string)
     def to_display(self):
         return(f"\U0001F162 \U0001F150\n{self.stroke}\n{self.to_text()}")
@@ -460,7 +508,9 @@ class index_text(text_element):
         paragraph.addElement(index_start)
         addTextToElement(paragraph, self.to_text())
         paragraph.addElement(index_end)
-    def to_rtf(self):
+    def rtf_timecode(self):
+        return(None)
+    def to_rtf(self, last_timecode = None):
         # Exhibit 1{\xe\cxinum1\v Exhibit 1:  A knife}
         # {\xe{\*\cxexnum 1}Exhibit 1:  A knife}
         string = write_command("cxinum", value = self.indexname)
@@ -561,13 +611,14 @@ def backtrack_coord(pos, backspace, text_len, func_len):
 
 class element_factory:
     """Factory for creating elements from data dict"""
-    def gen_element(self, element_dict, user_field_dict = user_field_dict):
+    def gen_element(self, element_dict, user_field_dict = user_field_dict, assets = None):
         """Return element based on type.
         
         :param element_dict: dict of element, likely from dict representation
         :type element_dict: dict
         :param user_field_dict: user field data
         :type user_field_dict: dict
+        :param assets: ``image_asset_cache`` for image elements
         :return: element
         :rtype: `text_element` or subclass
         """
@@ -578,7 +629,7 @@ class element_factory:
         # elif element_dict["element"] == "dummy":
         #     element = dummy_element()
         elif element_dict["element"] == "image":
-            element = image_text()
+            element = image_text(assets = assets)
         elif element_dict["element"] == "field":
             element = text_field(user_dict = user_field_dict)
         elif element_dict["element"] == "automatic":
@@ -675,9 +726,17 @@ class element_collection(UserList):
         text = [i.to_text() for i in self.data]
         return("".join(text))
     def to_rtf(self):
-        """Return string containing RTF representations of elements."""
-        col_string = "".join([i.to_rtf() for i in self.data])
-        return(col_string)
+        """Return string containing RTF representations of elements.
+
+        A ``\\cxt`` timecode is only written when it differs from the one before
+        it in the collection, importers keep the last timecode for later strokes.
+        """
+        last_timecode = None
+        strings = []
+        for el in self.data:
+            strings.append(el.to_rtf(last_timecode = last_timecode))
+            last_timecode = el.rtf_timecode() or last_timecode
+        return("".join(strings))
     def to_odt(self, paragraph, document):
         """Add each element to paragraph in ODF document"""
         for i in self.data:
@@ -948,20 +1007,29 @@ class element_collection(UserList):
             track_len -= len(el)
             if track_len < 0:
                 break
-    def merge_elements(self):
+    def merge_elements(self, sources = None):
         """Collapse collection elements using ``__add__`` method.
+
+        :param list sources: list to fill with ``(first, last)`` indices of the
+            elements collapsed into each new element, optional
         """
         new_ec = []
         last_el_type = ""
         for ind, el in enumerate(self.data):
             if ind == 0:
                 new_ec.append(el)
+                if sources is not None:
+                    sources.append((ind, ind))
                 continue
             try:
                 sum_el = new_ec[-1] + el
                 new_ec[-1] = sum_el
+                if sources is not None:
+                    sources[-1] = (sources[-1][0], ind)
             except (TypeError, ValueError, NotImplementedError):
                 new_ec.append(el)
+                if sources is not None:
+                    sources.append((ind, ind))
         return(self.__class__(new_ec))
 
 # stroke_data = [text_element(text = "ABC"), stroke_text(stroke = "T-", text = "it "), text_element(text = "2 ", time = "2023-08-09T23:02:26.526"), text_element(text = "3 "), stroke_text(stroke = "EUFS ", text = "I was "), stroke_text(stroke = "TAO", text = "too ")]
@@ -995,6 +1063,79 @@ class element_collection(UserList):
 # stroke_collection.insert_steno(7, new_stroke_collection)
 # str(stroke_collection)
 
+class element_registry:
+    """Registry of where field, index, image and automatic elements occur.
+
+    Keeps a count of tracked elements by ``(element type, name)`` for each
+    block number, so that updates of fields and index entries only visit
+    paragraphs that contain them instead of every element in the transcript.
+    The undo commands refresh the counts of the blocks they change, and shift
+    block numbers when paragraphs are split or merged.
+
+    The name is ``name`` for fields, ``indexname`` for index entries,
+    ``path`` for images and ``None`` for automatic text.
+    """
+    tracked = {"field": "name", "index": "indexname", "image": "path", "automatic": None}
+    def __init__(self):
+        self.inventory = {}
+        """``block number: Counter`` of ``(element type, name)`` keys."""
+    def reset(self):
+        """Remove all entries."""
+        self.inventory = {}
+    def key(self, el):
+        """Return ``(element type, name)`` for a tracked element, ``None`` otherwise."""
+        if el.element not in self.tracked:
+            return None
+        attr = self.tracked[el.element]
+        return((el.element, getattr(el, attr) if attr else None))
+    def contains_tracked(self, steno):
+        """Check if element or ``element_collection`` has any tracked element."""
+        elements = steno.data if isinstance(steno, element_collection) else [steno]
+        return(any(el.element in self.tracked for el in elements))
+    def refresh_block(self, block_number, strokes):
+        """Recount tracked elements of one block.
+
+        :param int block_number: block number
+        :param strokes: ``element_collection`` of the block
+        """
+        counts = Counter()
+        for el in strokes:
+            el_key = self.key(el)
+            if el_key:
+                counts[el_key] += 1
+        if counts:
+            self.inventory[block_number] = counts
+        else:
+            self.inventory.pop(block_number, None)
+    def split_block(self, block_number, first_strokes, second_strokes):
+        """Shift blocks after a split of ``block_number``, recount both halves.
+
+        Both halves are always recounted, as the split may add an automatic new line element.
+        """
+        self.inventory = {(b + 1 if b > block_number else b): c for b, c in self.inventory.items()}
+        self.refresh_block(block_number, first_strokes)
+        self.refresh_block(block_number + 1, second_strokes)
+    def merge_block(self, block_number, merged_strokes):
+        """Shift blocks after ``block_number + 1`` is merged into ``block_number``."""
+        had_tracked = block_number in self.inventory or (block_number + 1) in self.inventory
+        self.inventory.pop(block_number + 1, None)
+        self.inventory = {(b - 1 if b > block_number else b): c for b, c in self.inventory.items()}
+        if had_tracked:
+            self.refresh_block(block_number, merged_strokes)
+    def blocks_with(self, element_type, name = None):
+        """Return sorted block numbers containing element type, and name if given."""
+        blocks = []
+        for block_number, counts in self.inventory.items():
+            if any(k[0] == element_type and (name is None or k[1] == name) for k in counts):
+                blocks.append(block_number)
+        return(sorted(blocks))
+    def count(self, element_type, name = None):
+        """Return number of occurrences of element type, and name if given."""
+        total = 0
+        for counts in self.inventory.values():
+            total += sum(v for k, v in counts.items() if k[0] == element_type and (name is None or k[1] == name))
+        return(total)
+
 class steno_wrapper(textwrap.TextWrapper):
     """Wrap text, but adapted for elements in ``element_collection``.
     
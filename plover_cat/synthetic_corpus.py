@@ -0,0 +1,262 @@
+"""Generate synthetic transcripts and RTF/CRE files for benchmarks.
+
+Paragraphs are made from a seeded random generator, so the same settings and seed
+always give the same corpus, as a transcript folder the editor and
+``plover_cat.export`` can open, or as an RTF/CRE file ``rtf_steno`` can import::
+
+    python -m plover_cat.synthetic_corpus path/to/fixtures -p 10,100,1000
+
+Page counts are approximate, from ``paragraphs_per_page``.
+"""
+import sys
+import random
+import pathlib
+import argparse
+from copy import deepcopy
+from datetime import datetime, timedelta
+from PySide6.QtGui import QImage, QColor
+from plover_cat.helpers import save_json, save_json_stream, write_command, ms_to_hours, init_transcript_repo
+from plover_cat.constants import default_config, default_styles, default_dict, user_field_dict
+from plover_cat.steno_objects import text_element, stroke_text, automatic_text, image_text, text_field, index_text, element_collection
+from plover_cat.asset_cache import image_asset_cache
+from plover_cat.rtf_parsing import in_to_twip
+
+#: ``(stroke, text)`` of words written in one stroke
+single_stroke_words = [("-T", "the"), ("WAS", "was"), ("THAT", "that"), ("-D", "had"), ("SAEUD", "said"), ("KORT", "court"),
+                        ("KWRES", "yes"), ("TPHO", "no"), ("EU", "I"), ("WEPB", "when"), ("THR", "there"), ("KAR", "car"),
+                        ("TKAOR", "door"), ("HOUS", "house"), ("TPHAOEUT", "night"), ("TKAEU", "day"), ("SAU", "saw"),
+                        ("TO", "to"), ("-F", "of"), ("SKP", "and"), ("HEU", "him"), ("HER", "her"), ("STPH-R", "Mr.")]
+#: ``(stroke, text)`` of words written in several strokes
+multi_stroke_words = [("WEUT/-PBS", "witness"), ("EBGS/HEUB/EUT", "exhibit"), ("TAOUZ/TKAEU", "Tuesday"),
+                        ("OB/SKWREBGS", "objection"), ("TKEFN/TKAPBT", "defendant"), ("PHRAEUPB/TEUF", "plaintiff"),
+                        ("RE/KHRAUL", "recall"), ("TKOBG/KUPLT", "document"), ("SKWRAOUR/REU", "jury")]
+#: ``(stroke, text)`` of punctuation, attached to the word before
+punctuation = [("-FPLT", "."), ("-RBGS", ","), ("STPH-FPLT", "?")]
+#: automatic text starting paragraphs of a style, ``style: (stroke, prefix)``
+automatic_prefixes = {"Question": ("STKPWHR", "Q.\t"), "Answer": ("SKWRAPBS", "A.\t")}
+#: approximate paragraphs on a page of default page setup and styles
+paragraphs_per_page = 6
+
+class synthetic_corpus:
+    """Seeded generator of transcript paragraphs.
+
+    Probabilities of fields, index entries and images are per paragraph, of
+    multi-stroke words and typed text per word.
+
+    :param int seed: seed of random generator
+    :param int paragraphs: number of paragraphs
+    :param tuple strokes: least and most words in a paragraph
+    :param dict styles: ``style name: weight`` of paragraph styles
+    :param float multi_stroke: probability of a word written in several strokes
+    :param float typed: probability of a word being typed text without a stroke
+    :param float punctuated: probability of punctuation after a word
+    :param float fields: probability of a paragraph starting with a speaker field
+    :param float indexes: probability of a paragraph ending with an exhibit index entry
+    :param float images: probability of a paragraph ending with an image
+    :param bool automatic: start ``Question`` and ``Answer`` paragraphs with automatic ``Q.`` and ``A.`` text
+    :param bool audio: give strokes and paragraphs audio times
+    :param str start: ISO time of the first stroke
+    """
+    def __init__(self, seed = 0, paragraphs = 100, strokes = (1, 60), styles = None, multi_stroke = 0.1, typed = 0.05,
+                    punctuated = 0.1, fields = 0.05, indexes = 0.02, images = 0.0, automatic = True, audio = True, start = "2023-01-01T09:00:00"):
+        self.seed = seed
+        self.paragraph_count = paragraphs
+        self.strokes = strokes
+        self.styles = styles or {"Question": 4, "Answer": 4, "Colloquy": 2, "Normal": 1, "Quote": 0.5, "Parenthetical": 0.5}
+        self.multi_stroke = multi_stroke
+        self.typed = typed
+        self.punctuated = punctuated
+        self.fields = fields
+        self.indexes = indexes
+        self.images = images
+        self.automatic = automatic
+        self.audio = audio
+        self.start = start
+        self.image_size = (64, 48)
+    def paragraphs(self, image_path = None, assets = None):
+        """Yield paragraphs, the same for every call.
+
+        :param image_path: image file for image elements, no images if ``None``
+        :param assets: ``image_asset_cache`` for image elements
+        :return: generator of ``(paragraph number, paragraph dict)``, with elements in ``strokes``
+        """
+        rnd = random.Random(self.seed)
+        time = datetime.fromisoformat(self.start)
+        audio = 0
+        exhibit = 0
+        style_names, weights = list(self.styles), list(self.styles.values())
+        for par_num in range(self.paragraph_count):
+            style = rnd.choices(style_names, weights)[0]
+            audio_start = audio
+            elements = []
+            if self.automatic and style in automatic_prefixes:
+                stroke, prefix = automatic_prefixes[style]
+                elements.append(automatic_text(prefix = prefix, stroke = stroke, time = time.isoformat("T", "milliseconds")))
+            if rnd.random() < self.fields:
+                elements.append(text_field(name = rnd.choice(list(user_field_dict)), time = time.isoformat("T", "milliseconds")))
+                elements.append(text_element(text = ":", time = time.isoformat("T", "milliseconds")))
+            for word_num in range(rnd.randint(*self.strokes)):
+                if rnd.random() < self.multi_stroke:
+                    stroke, word = rnd.choice(multi_stroke_words)
+                else:
+                    stroke, word = rnd.choice(single_stroke_words)
+                if elements:
+                    word = " " + word
+                words = [(stroke, word)]
+                if rnd.random() < self.punctuated:
+                    words.append(rnd.choice(punctuation))
+                for stroke, text in words:
+                    time += timedelta(milliseconds = rnd.randint(100, 900))
+                    audio += rnd.randint(100, 900)
+                    if rnd.random() < self.typed:
+                        elements.append(text_element(text = text, time = time.isoformat("T", "milliseconds")))
+                    else:
+                        elements.append(stroke_text(stroke = stroke, text = text, time = time.isoformat("T", "milliseconds"),
+                                                    audiotime = audio if self.audio else ""))
+            if rnd.random() < self.indexes:
+                exhibit += 1
+                elements.append(text_element(text = " ", time = time.isoformat("T", "milliseconds")))
+                elements.append(index_text(prefix = "Exhibit", indexname = 0, text = str(exhibit), description = ":  synthetic exhibit",
+                                            time = time.isoformat("T", "milliseconds")))
+            if rnd.random() < self.images and image_path:
+                elements.append(image_text(path = str(image_path), width = self.image_size[0], height = self.image_size[1],
+                                            assets = assets, time = time.isoformat("T", "milliseconds")))
+            creationtime = elements[0].time if elements else time.isoformat("T", "milliseconds")
+            par_dict = {"creationtime": creationtime, "edittime": elements[-1].time if elements else creationtime, "style": style, "strokes": elements}
+            if self.audio:
+                par_dict["audiostarttime"] = ms_to_hours(audio_start)
+            yield((str(par_num), par_dict))
+    def style_file(self):
+        """Return styles for the transcript, default styles and a ``Normal`` based style for other style names."""
+        styles = deepcopy(default_styles)
+        for style in self.styles:
+            if style not in styles:
+                styles[style] = {"family": "paragraph", "parentstylename": "Normal", "nextstylename": "Normal"}
+        return(styles)
+    def write_image(self, path):
+        """Write image for image elements, return path.
+
+        :param path: path of PNG file
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents = True, exist_ok = True)
+        image = QImage(*self.image_size, QImage.Format_RGB32)
+        image.fill(QColor("gray"))
+        image.save(str(path))
+        return(path)
+    def write_transcript(self, transcript_dir):
+        """Write corpus as a new transcript folder, with configuration, styles, dictionary and ``dulwich`` repo.
+
+        :param transcript_dir: transcript folder, must not exist
+        :return: path of transcript file
+        """
+        transcript_dir = pathlib.Path(transcript_dir)
+        transcript_dir.mkdir(parents = True)
+        image_path = self.write_image(transcript_dir / "assets" / "synthetic.png") if self.images else None
+        transcript = transcript_dir.joinpath(transcript_dir.stem).with_suffix(".transcript")
+        save_json_stream(((par_num, dict(par_dict, strokes = [el.to_json() for el in par_dict["strokes"]]))
+                            for par_num, par_dict in self.paragraphs(image_path)), transcript)
+        save_json(self.style_file(), transcript_dir / "styles" / "default.json")
+        dict_path = transcript_dir / "dict" / "default.json"
+        save_json(default_dict, dict_path)
+        config = deepcopy(default_config)
+        config["space_placement"] = "Before Output"
+        config["dictionaries"] = ["dict/default.json"]
+        # page settings as numbers, as the page setup dialog saves them
+        config.update({key: float(value) for key, value in default_config.items() if key.startswith("page_") and isinstance(value, str)})
+        save_json(config, transcript_dir / "config.CONFIG")
+        (transcript_dir / "export").mkdir()
+        init_transcript_repo(transcript_dir, [transcript, dict_path], f"synthetic corpus, seed {self.seed}")
+        return(transcript)
+    def rtf_styles(self):
+        """Return RTF commands of styles, in stylesheet order.
+
+        :return: dict of ``style name: RTF commands``, with style number and paragraph formatting
+        """
+        styles = self.style_file()
+        style_names = list(styles)
+        rtf_styles = {}
+        for index, name in enumerate(style_names):
+            style = write_command("s", value = index)
+            par_dict = styles[name].get("paragraphproperties", {})
+            if "marginleft" in par_dict:
+                style += write_command("li", value = in_to_twip(par_dict["marginleft"]))
+            if "textindent" in par_dict:
+                style += write_command("fi", value = in_to_twip(par_dict["textindent"]))
+            if "tabstop" in par_dict:
+                style += write_command("tx", value = in_to_twip(par_dict["tabstop"]))
+            rtf_styles[name] = style
+        return(rtf_styles)
+    def rtf_head(self, rtf_styles):
+        """Return RTF/CRE document start, with creation date from ``start``, font table, stylesheet and default page setup.
+
+        :param dict rtf_styles: styles from ``rtf_styles``
+        """
+        stylesheet = "\n".join("{" + style + " " + name + ";}" for name, style in rtf_styles.items())
+        head = [write_command("rtf", value = 1), write_command("ansi"), write_command("deff", value = 0),
+                write_command("cxsystem", "Plover2CAT", visible = False, group = True)]
+        # date of stroke times, as written by RTF/CRE export
+        start = datetime.fromisoformat(self.start)
+        create_string = write_command("yr", value = start.year) + write_command("mo", value = start.month) + write_command("dy", value = start.day)
+        head += [write_command("info", write_command("creatim", value = create_string, group = True), group = True),
+                write_command("fonttbl", text = "{" + write_command("f", value = 0) + write_command("fmodern", text = "Courier New") + ";}", group = True),
+                write_command("stylesheet", text = stylesheet, group = True)]
+        for control, setting in [("paperw", "page_width"), ("paperh", "page_height"), ("margl", "page_left_margin"),
+                                    ("margr", "page_right_margin"), ("margt", "page_top_margin"), ("margb", "page_bottom_margin")]:
+            head.append(write_command(control, value = in_to_twip(default_config[setting])))
+        return("{" + "".join(head))
+    def write_rtf(self, path):
+        """Write corpus as an RTF/CRE file.
+
+        The image for image elements is written in an ``assets`` folder next to the file.
+
+        :param path: path of RTF/CRE file
+        :return: path of RTF/CRE file
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents = True, exist_ok = True)
+        image_path, assets = None, None
+        if self.images:
+            image_path = self.write_image(path.parent / "assets" / f"{path.stem}.png")
+            assets = image_asset_cache(path.parent / "assets")
+        rtf_styles = self.rtf_styles()
+        par_start = "\n" + write_command("par") + write_command("pard")
+        with open(path, "w", encoding = "utf-8") as f:
+            f.write(self.rtf_head(rtf_styles))
+            for par_num, par_dict in self.paragraphs(image_path, assets):
+                f.write(par_start + rtf_styles[par_dict["style"]] + element_collection(par_dict["strokes"]).to_rtf())
+            f.write("}")
+        return(path)
+
+def parse_pages(text):
+    """Return list of page counts from comma separated text, for ``argparse``."""
+    try:
+        pages = [int(count) for count in text.split(",") if count.strip()]
+    except ValueError:
+        pages = []
+    if not pages or min(pages) < 1:
+        raise argparse.ArgumentTypeError("pages must be positive whole numbers separated by commas")
+    return(pages)
+
+def main(argv = None):
+    """Write synthetic transcript folders and RTF/CRE files, return exit code."""
+    parser = argparse.ArgumentParser(prog = "python -m plover_cat.synthetic_corpus", description = "Write seeded synthetic Plover2CAT transcripts and RTF/CRE files for benchmarks.")
+    parser.add_argument("output", help = "folder for transcript folders and RTF/CRE files")
+    parser.add_argument("-p", "--pages", type = parse_pages, default = [10, 100, 1000], help = "comma separated approximate page counts (default: 10,100,1000)")
+    parser.add_argument("-s", "--seed", type = int, default = 0, help = "seed of random generator (default: 0)")
+    parser.add_argument("--images", type = float, default = 0.0, help = "probability of a paragraph ending with an image (default: 0)")
+    parser.add_argument("--no-transcript", action = "store_true", help = "only write RTF/CRE files")
+    parser.add_argument("--no-rtf", action = "store_true", help = "only write transcript folders")
+    args = parser.parse_args(argv)
+    output = pathlib.Path(args.output)
+    for pages in args.pages:
+        corpus = synthetic_corpus(seed = args.seed, paragraphs = pages * paragraphs_per_page, images = args.images)
+        name = f"synthetic_{pages}"
+        if not args.no_transcript:
+            print(corpus.write_transcript(output / name))
+        if not args.no_rtf:
+            print(corpus.write_rtf(output / f"{name}.rtf"))
+    return(0)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,92 @@
 import unittest
 import pathlib
 import os
+import json
+import random
+import textwrap
+import threading
+from time import perf_counter, sleep
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from tempfile import mkdtemp, mkstemp
 from shutil import rmtree
 from io import StringIO
 from unittest import TextTestRunner
 
 from PySide6.QtWidgets import QDialog, QListWidgetItem
-from PySide6.QtGui import QTextCursor
-from PySide6.QtCore import Qt
+from PySide6.QtGui import QTextCursor, QImage, QColor
+from PySide6.QtCore import Qt, QThread
 from plover.oslayer.config import CONFIG_DIR
 from plover.steno import Stroke, normalize_stroke, normalize_steno
-from plover_cat.helpers import save_json
+from plover_cat.helpers import save_json, return_commits
 from plover_cat.steno_objects import *
+from plover_cat.constants import default_styles
+from plover_cat.export_bundle import text_layout_cache, layout_paragraphs, plain_page_lines, export_manifest, write_ascii_pages, audio_timeline, srt_cues
+from plover_cat.asset_cache import image_asset_cache
+from plover_cat.rtf_parsing import rtf_steno, load_rtf_styles
+from plover_cat.importWorker import importWorker
+from plover_cat.captionWorker import captionWorker
+from plover_cat.caption_delivery import caption_client, caption_sink
+from plover_cat.export import find_transcripts, read_transcript, export_transcript
+from plover_cat.convert import find_rtfs, convert_rtf, convert_rtfs
+from plover_cat.synthetic_corpus import synthetic_corpus
+from plover_cat.export_helpers import steno_wrap_plain, format_text, recursive_style_format, resolved_style_table
 from plover_cat.TextEditor import PloverCATEditor
 from plover_cat.test_dialog_ui import Ui_testDialog
 
+def wait_for(condition, seconds = 5):
+    """Wait until condition is true or seconds pass, return condition."""
+    end = perf_counter() + seconds
+    while not condition() and perf_counter() < end:
+        sleep(0.01)
+    return(condition())
+
+def caption_endpoint(received, connections):
+    """Return keep-alive HTTP server on a free local port recording posts, refusing ``bad`` captions."""
+    class endpoint(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        def setup(self):
+            connections.append(self.client_address)
+            super().setup()
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+            received.append((self.path, body))
+            self.send_response(400 if body == "bad" else 200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        def log_message(self, *args):
+            pass
+    return(endpoint)
+
+def wrap_corpus(seed = 0, paragraphs = 40):
+    """Seeded paragraphs of stroke and text elements with increasing times."""
+    rnd = random.Random(seed)
+    words = "the witness said that on Tuesday Mr. Smith was not in court , yes no I don't recall".split()
+    corpus = []
+    for par in range(paragraphs):
+        elements = []
+        for i in range(rnd.randint(1, 60)):
+            text = (" " if elements else "") + rnd.choice(words)
+            time = "2023-01-01T%02d:%02d:%02d.%03d" % (9 + par // 60, par % 60, i // 1000, i % 1000)
+            if rnd.random() < 0.1:
+                elements.append(text_element(text = text, time = time))
+            else:
+                elements.append(stroke_text(stroke = "S%d" % i, text = text, time = time))
+        corpus.append(elements)
+    return(corpus)
+
+def wrap_plain_reference(text, block_data, max_char = 80, first_line_indent = "", par_indent = ""):
+    """Per line ``extract_steno`` alignment, slow but simple, to compare ``steno_wrap_plain`` with."""
+    wrapped = textwrap.wrap(text, width = max_char - 1, initial_indent = first_line_indent,
+                subsequent_indent = par_indent, expand_tabs = False, tabsize = 4, replace_whitespace = False)
+    begin_pos = 0
+    par_dict = {}
+    for ind, line in enumerate(wrapped):
+        match = next(block_data.extract_steno(begin_pos, len(block_data)).search_text(line.strip()))
+        start_pos = begin_pos + match.start()
+        begin_pos = begin_pos + match.end()
+        par_dict[ind] = {"text": line, "time": block_data.extract_steno(start_pos, begin_pos).collection_time()}
+    return(par_dict)
+
 class TestStenoData(unittest.TestCase):
     def test_text_element_creation(self):
         el = text_element(text = "abc")
@@ -42,6 +113,37 @@ class TestStenoData(unittest.TestCase):
         self.assertEqual(el.element, "image")
         self.assertEqual(len(el), 1)        
         self.assertEqual(el.length(), 1)                
+    def test_element_registry_split(self):
+        registry = element_registry()
+        registry.refresh_block(1, element_collection([index_text(indexname = "0", text = "A")]))
+        first = element_collection([stroke_text(stroke = "S-", text = "ABC"), automatic_text(prefix = ".", stroke = "R-R", text = "\n")])
+        registry.split_block(0, first, element_collection([stroke_text(stroke = "-T", text = "DEF")]))
+        self.assertEqual(registry.blocks_with("automatic"), [0])
+        self.assertEqual(registry.blocks_with("index", "0"), [2])
+        registry.merge_block(0, element_collection([stroke_text(stroke = "S-", text = "ABC")]))
+        self.assertEqual((registry.count("automatic"), registry.blocks_with("index")), (0, [1]))
+    def test_image_asset_cache(self):
+        asset_dir = pathlib.Path(mkdtemp())
+        try:
+            image = QImage(8, 6, QImage.Format_RGB32)
+            image.fill(QColor("red"))
+            image.save(str(asset_dir / "a.png"))
+            image.save(str(asset_dir / "copy.png"))
+            assets = image_asset_cache(asset_dir)
+            el = element_factory().gen_element(image_text(path = str(asset_dir / "a.png"), width = 8, height = 6).to_json(), assets = assets)
+            self.assertNotIn("assets", el.to_json())
+            self.assertEqual(el.to_rtf(), image_to_rtf(asset_dir / "a.png"))
+            self.assertEqual(assets.rtf_picture(asset_dir / "copy.png"), el.to_rtf())
+            self.assertEqual((assets.hits, assets.misses), (2, 1))
+            # encoding is kept in project assets for later exports
+            assets = image_asset_cache(asset_dir)
+            assets.rtf_picture(asset_dir / "a.png")
+            self.assertEqual((assets.hits, assets.misses), (1, 0))
+            self.assertEqual([path.suffix for path in (asset_dir / "cache").iterdir()], [".pict"])
+            # missing image does not stop the export
+            self.assertEqual(assets.rtf_picture(asset_dir / "missing.png"), image_to_rtf(asset_dir / "missing.png"))
+        finally:
+            rmtree(asset_dir)
     def test_automatic_element(self):
         txt = "ABC"
         affix_txt = "Q.\tABC?"
@@ -76,6 +178,396 @@ class TestStenoData(unittest.TestCase):
         self.assertNotEqual(len(el), 1)
         self.assertEqual(el.length(), 1)
         self.assertNotEqual(el.length(), len(correct_txt))
+    def test_text_layout_cache(self):
+        config = {"page_width": 8.5, "page_height": 11, "page_left_margin": 1.75, "page_right_margin": 0.3799,
+                    "page_top_margin": 0.7874, "page_bottom_margin": 0.7874, "page_max_char": 0, "page_max_line": 0}
+        document = {"0": {"style": "Normal", "strokes": [stroke_text(stroke = "T-", text = "it ").to_json()]},
+                    "1": {"style": "Normal", "strokes": [stroke_text(stroke = "-B", text = "be").to_json()]}}
+        style_table = resolved_style_table(default_styles)
+        cache = text_layout_cache()
+        keys = cache.keys(document.items(), style_table, config, {})
+        self.assertEqual(cache.lookup(keys), {})
+        layouts = layout_paragraphs(document.items(), style_table.properties, config, {}, ["text"])
+        cache.store(layouts, keys)
+        document["1"]["strokes"] = [stroke_text(stroke = "-B", text = "been").to_json()]
+        new_keys = cache.keys(document.items(), style_table, config, {})
+        self.assertEqual(new_keys["0"], keys["0"])
+        self.assertNotEqual(new_keys["1"], keys["1"])
+        cached = cache.lookup(new_keys)
+        self.assertEqual(list(cached), ["0"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        relaid = layout_paragraphs(document.items(), style_table.properties, config, {}, ["text"], cached = cached)
+        self.assertEqual(relaid[0]["text"], layouts[0]["text"])
+        self.assertIn("been", relaid[1]["text"][0][0])
+    def test_plain_page_lines(self):
+        document = {str(i): {"style": "Normal", "strokes": [stroke_text(stroke = "-B", text = f"line {i}").to_json()]} for i in range(30)}
+        lines = plain_page_lines(document.items(), {})
+        self.assertEqual(next(lines), "0001")
+        lines = list(lines)
+        self.assertEqual(len(lines), 31)
+        self.assertEqual(lines[24], " 25   line 24")
+        self.assertEqual(lines[25], "0002")
+        self.assertEqual(lines[26], " 1    line 25")
+    def test_export_manifest(self):
+        handle, path = mkstemp(suffix = ".txt")
+        os.close(handle)
+        try:
+            pages = [(1, ["a", "a"]), (2, ["b", "b"]), (3, ["c", "c"])]
+            offsets, tail_offset, size = write_ascii_pages(path, pages)
+            manifest = export_manifest("config", ["a", "b", "c"], [0, 2, 4, 6], [offsets[1], offsets[2], offsets[3], size], os.stat(path).st_mtime_ns)
+            self.assertIsNone(manifest.changed_pages(path, "new config", ["a", "b", "c"], [0, 2, 4, 6], 2))
+            # same number of lines, page breaks converge after the changed page
+            self.assertEqual(manifest.changed_pages(path, "config", ["a", "B", "c"], [0, 2, 4, 6], 2), (2, 2))
+            # changed paragraph is longer, so all later pages move
+            self.assertEqual(manifest.changed_pages(path, "config", ["a", "B", "c"], [0, 2, 5, 7], 2), (2, None))
+            write_ascii_pages(path, [(2, ["B", "B"])], (offsets[2], offsets[3]))
+            self.assertEqual(pathlib.Path(path).read_text(encoding = "utf-8").split(), ["a", "a", "B", "B", "c", "c"])
+        finally:
+            os.remove(path)
+    def test_read_transcript(self):
+        jobs_dir = pathlib.Path(mkdtemp())
+        try:
+            transcript_dir = jobs_dir / "job"
+            transcript_dir.mkdir()
+            save_json({"page_width": 8.5, "style": "styles/default.json"}, transcript_dir / "config.CONFIG")
+            save_json({"0": {"style": "Missing", "strokes": [stroke_text(stroke = "T-", text = "it").to_json()]}}, transcript_dir / "job.transcript")
+            (jobs_dir / "other").mkdir()
+            self.assertEqual(find_transcripts([jobs_dir]), [transcript_dir])
+            document, config, styles = read_transcript(transcript_dir)
+            self.assertEqual(styles, default_styles)
+            self.assertEqual(config["page_max_line"], 0)
+            self.assertEqual(document["0"]["style"], next(iter(default_styles)))
+        finally:
+            rmtree(jobs_dir)
+    def test_audio_timeline(self):
+        document = {"0": {"style": "Normal", "strokes": [stroke_text(stroke = "T-", text = "it", audiotime = 1000).to_json(),
+                        text_element(text = " was").to_json(), stroke_text(stroke = "-B", text = " be", audiotime = 3000).to_json()]},
+                    "1": {"style": "Normal", "audiostarttime": "00:00:05.000", "strokes": [text_element(text = "Yes").to_json(),
+                        stroke_text(stroke = "-B", text = " be", audiotime = 6000).to_json()]}}
+        timeline = audio_timeline(document.items())
+        self.assertEqual(timeline.times, {"0": [1000, 2000, 3000], "1": [5000, 6000]})
+        self.assertEqual(timeline.ends, {"0": 5000, "1": 6000})
+        config = {"page_width": 8.5, "page_left_margin": 1.75, "page_right_margin": 0.3799, "page_max_char": 0, 
+                    "page_height": 11, "page_top_margin": 0.7874, "page_bottom_margin": 0.7874, "page_max_line": 0}
+        layouts = layout_paragraphs(document.items(), resolved_style_table(default_styles).properties, config, {}, ["srt"])
+        self.assertEqual(list(srt_cues(layouts, timeline)), [(1000, 5000, "it was be"), (5000, 6000, "Yes be")])
+    def test_rtf_timecodes(self):
+        elements = element_collection([stroke_text(stroke = "T-", text = "it", time = "2023-01-01T09:00:00.100"),
+                    stroke_text(stroke = "-B", text = " be", time = "2023-01-01T09:00:00.900"),
+                    automatic_text(prefix = "Q.\t", stroke = "STKPWHR", time = "2023-01-01T09:00:01.000"),
+                    stroke_text(stroke = "", text = "!", time = "2023-01-01T09:00:01.500")])
+        rtf = elements.to_rtf()
+        self.assertEqual(rtf.count("\\cxt"), 2)
+        self.assertTrue(rtf.startswith("{\\*\\cxt 09:00:00:00}{\\*\\cxs T-}it{\\*\\cxs -B} be"))
+        self.assertIn("{\\*\\cxa Q.\t}{\\*\\cxt 09:00:01:00}{\\*\\cxs STKPWHR}", rtf)
+        self.assertTrue(rtf.endswith("{\\*\\cxs}!"))
+        self.assertEqual(rtf_timecode("2023-01-01T23:59:59.999"), "23:59:59:00")
+    def test_rtf_steno(self):
+        elements = element_collection([stroke_text(stroke = "T-", text = "It", time = "2023-01-01T09:00:00.100"),
+                    stroke_text(stroke = "-B", text = " be", time = "2023-01-01T09:00:00.900"),
+                    stroke_text(stroke = "KW-GS", text = " \"a\"", time = "2023-01-01T09:00:02.000")])
+        rtf = ("{\\rtf1\\ansi{\\fonttbl{\\f0\\fmodern Courier New{\\*\\falt Courier};}}"
+                "{\\stylesheet{\\s0\\fi720\\tx1440\\tx2160 Normal Par;}{\\s1\\li1440\\sbasedon0 Answer;}}"
+                "{\\info{\\creatim\\yr2023\\mo1\\dy1}}{\\*\\cxframes30}\\paperw12240\r\n"
+                "\\par\\pard\\s1{\\*\\cxa A.\\tab}{\\*\\cxt 09:00:01:15}{\\*\\cxs KAEF}Caf\\'82\\~{\\xe{\\*\\cxexnum 1}Exhibit}"
+                "{\\*\\cxs TKPWAUD}na\\u239?ve \\{x\\}{\\pict\\pngblip 89504e47}\r\n\\par\\pard\\s0" + elements.to_rtf() + "}")
+        rtf_file = pathlib.Path(mkdtemp()) / "test.rtf"
+        try:
+            rtf_file.write_text(rtf)
+            parsed = rtf_steno(str(rtf_file))
+            parsed.parse_document()
+        finally:
+            rmtree(rtf_file.parent)
+        self.assertEqual(parsed.page, {"paperw": 8.5})
+        self.assertEqual(parsed.styles["0"]["tx"], [1440, 2160])
+        self.assertEqual(parsed.styles["1"]["text"], "Answer")
+        self.assertIn("fmodern", parsed.fonts["0"])
+        self.assertEqual(parsed.scanned_styles, {"0": {"s": 1}, "1": {"s": 0}})
+        first, second = parsed.paragraphs["0"], parsed.paragraphs["1"]
+        self.assertEqual(first["style"], "Answer")
+        self.assertEqual(first["strokes"][0]["prefix"], "A.\t")
+        self.assertEqual([(el["stroke"], el["data"]) for el in first["strokes"][1:]],
+                        [("KAEF", "Caf\u00e9\u00a0"), ("TKPWAUD", "na\u00efve {x}"), ("TKPWAUD", "\n")])
+        self.assertEqual(first["strokes"][1]["time"], "2023-1-1T09:00:01.500")
+        self.assertEqual(second["style"], "Normal_20_Par")
+        self.assertEqual([(el["stroke"], el["data"]) for el in second["strokes"][:-1]], [(el.stroke, el.data) for el in elements])
+    def test_rtf_steno_utf8(self):
+        rtf = "{\\rtf1{\\stylesheet{\\s0 Normal;}}\\par\\pard\\s0{\\*\\cxs SKWRAO*E}Zo\u00eb{\\*\\cxs TOEBG}\u6771\u4eac}"
+        rtf_file = pathlib.Path(mkdtemp()) / "test.rtf"
+        try:
+            # bytes that are not UTF-8 do not stop the import
+            rtf_file.write_bytes(rtf.encode("utf-8").replace("Zo".encode(), b"\x81Zo"))
+            parsed = rtf_steno(str(rtf_file))
+            parsed.parse_document()
+        finally:
+            rmtree(rtf_file.parent)
+        self.assertEqual([el["data"] for el in parsed.paragraphs["0"]["strokes"][:-1]], ["\ufffdZo\u00eb", "\u6771\u4eac"])
+        self.assertEqual(parsed.progress_read, parsed.progress_total)
+    def test_import_worker(self):
+        rtf_file = pathlib.Path(mkdtemp()) / "test.rtf"
+        try:
+            rtf_file.write_text("{\\rtf1{\\stylesheet{\\s0 Normal;}}" + "\\par\\pard\\s0{\\*\\cxs T-}it" * 4 + "\\par\\pard\\s0\\qc{\\*\\cxa Q.\\tab}{\\*\\cxs T-/-B}it}")
+            progress, results = [], []
+            worker = importWorker(str(rtf_file), rtf_file.with_suffix(".transcript"), progress_interval = 0)
+            worker.progress.connect(lambda read, total: progress.append((read, total)))
+            worker.imported.connect(results.append)
+            worker.run()
+            imported = json.loads(pathlib.Path(results[0]["transcript"]).read_text())
+            parsed = rtf_steno(str(rtf_file))
+            parsed.parse_document()
+            style_dict, renamed_indiv_style = load_rtf_styles(parsed)
+            cancelled = importWorker(str(rtf_file), rtf_file.parent / "other" / "other.transcript")
+            cancelled.imported.connect(results.append)
+            cancelled.cancel()
+            cancelled.run()
+            self.assertFalse((rtf_file.parent / "other" / "other.import").exists())
+        finally:
+            rmtree(rtf_file.parent)
+        self.assertEqual(len(progress), 4)
+        self.assertEqual(len(results), 1)
+        # automatic text is not a stroke, outlines count each stroke
+        self.assertEqual((results[0]["paragraphs"], results[0]["strokes"]), (5, 12))
+        self.assertEqual(results[0]["styles"], style_dict)
+        self.assertEqual([par["style"] for par in imported.values()], ["Normal"] * 4 + ["Normal0"])
+        self.assertEqual([par["style"] for par in imported.values()], renamed_indiv_style)
+        self.assertEqual([par["strokes"] for par in imported.values()], [par["strokes"] for par in parsed.paragraphs.values()])
+    def test_convert_rtfs(self):
+        archive_dir = pathlib.Path(mkdtemp())
+        try:
+            for folder in ["sub", "other", "sub/assets", "done/export"]:
+                (archive_dir / folder).mkdir(parents = True)
+            (archive_dir / "sub" / "job.rtf").write_text("{\\rtf1{\\stylesheet{\\s0 Normal;}}\\paperw12240" + "\\par\\pard\\s0{\\*\\cxs T-}it" * 2 
+                                                    + "\\par\\pard\\s0{\\*\\cxa Q.\\tab}{\\*\\cxs T-/-B}it}")
+            (archive_dir / "other" / "job.rtf").write_text("{\\rtf1{\\stylesheet{\\s0 Normal;}}\\par\\pard\\s0{\\*\\cxs T-}it}")
+            (archive_dir / "bad.rtf").write_text("not rtf")
+            (archive_dir / "notes.txt").write_text("")
+            (archive_dir / "sub" / "assets" / "old.rtf").write_text("{\\pict}")
+            # export of a transcript folder in the archive
+            (archive_dir / "done" / "config.CONFIG").write_text("{}")
+            (archive_dir / "done" / "export" / "done.rtf").write_text("{\\rtf1}")
+            rtf_paths = find_rtfs([archive_dir])
+            results = dict(convert_rtfs(rtf_paths, archive_dir / "out", processes = 0))
+            document, config, styles = read_transcript(archive_dir / "out" / "sub" / "job")
+            commits = return_commits(str(archive_dir / "out" / "sub" / "job"))
+            converted = sorted(path.parent.relative_to(archive_dir / "out").as_posix() for path in (archive_dir / "out").rglob("config.CONFIG"))
+            rtf_files = find_rtfs([archive_dir / "sub" / "job.rtf", archive_dir / "other" / "job.rtf"])
+        finally:
+            rmtree(archive_dir)
+        self.assertEqual([(path.relative_to(archive_dir).as_posix(), name.as_posix()) for path, name in rtf_paths], 
+                        [("bad.rtf", "bad"), ("other/job.rtf", "other/job"), ("sub/job.rtf", "sub/job")])
+        self.assertEqual([name.as_posix() for path, name in rtf_files], ["job", "job_2"])
+        self.assertIsInstance(results[rtf_paths[0][0]], ValueError)
+        # automatic text is not a stroke, outlines count each stroke
+        self.assertEqual((results[rtf_paths[2][0]]["paragraphs"], results[rtf_paths[2][0]]["strokes"]), (3, 8))
+        self.assertEqual(converted, ["other/job", "sub/job"])
+        self.assertEqual((config["style"], config["page_width"]), ("styles/job.json", 8.5))
+        self.assertEqual([par["style"] for par in document.values()], ["Normal"] * 3)
+        self.assertIn("Normal", styles)
+        self.assertEqual(len(commits), 1)
+    def test_synthetic_corpus(self):
+        settings = {"paragraphs": 30, "fields": 0.3, "indexes": 0.3, "images": 0.3}
+        def corpus_json(corpus):
+            return([(par_num, par["style"], [el.to_json() for el in par["strokes"]]) for par_num, par in corpus.paragraphs("a.png")])
+        corpus = synthetic_corpus(seed = 1, **settings)
+        paragraphs = corpus_json(corpus)
+        self.assertEqual(paragraphs, corpus_json(synthetic_corpus(seed = 1, **settings)))
+        self.assertNotEqual(paragraphs, corpus_json(synthetic_corpus(seed = 2, **settings)))
+        self.assertEqual({el["element"] for par in paragraphs for el in par[2]}, {"automatic", "stroke", "text", "field", "index", "image"})
+        self.assertTrue(any("/" in el.get("stroke", "") for par in paragraphs for el in par[2]))
+        corpus_dir = pathlib.Path(mkdtemp())
+        try:
+            corpus.write_transcript(corpus_dir / "job")
+            rtf_path = corpus.write_rtf(corpus_dir / "job.rtf")
+            document, config, styles = read_transcript(corpus_dir / "job")
+            commits = return_commits(str(corpus_dir / "job"))
+            parsed = rtf_steno(str(rtf_path))
+            parsed.parse_document()
+            style_dict, renamed_indiv_style = load_rtf_styles(parsed)
+            # converted RTF/CRE file can be exported again
+            converted = convert_rtf(rtf_path, corpus_dir / "out")
+            exported = export_transcript(converted["transcript"], ["rtf"])
+        finally:
+            rmtree(corpus_dir)
+        self.assertEqual(parsed.date, "2023-1-1")
+        self.assertEqual(len(exported["files"]), 1)
+        self.assertEqual(len(commits), 1)
+        self.assertEqual([(par_num, par["style"]) for par_num, par in document.items()], [par[:2] for par in paragraphs])
+        self.assertEqual([par[1] for par in paragraphs], renamed_indiv_style)
+        self.assertEqual(sum(el["element"] == "automatic" for par in paragraphs for el in par[2]),
+                        sum(el["element"] == "automatic" for par in parsed.paragraphs.values() for el in par["strokes"]))
+    def test_caption_intake(self):
+        received = []
+        class slow_endpoint(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                sleep(0.2)
+                received.append(body.decode())
+                self.send_response(200)
+                self.end_headers()
+            def log_message(self, *args):
+                pass
+        server = ThreadingHTTPServer(("127.0.0.1", 0), slow_endpoint)
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        caps = []
+        thread = QThread()
+        worker = captionWorker(max_length = 32, max_lines = 3, remote = "Microsoft Teams", endpoint = f"http://127.0.0.1:{server.server_port}/")
+        worker.moveToThread(thread)
+        worker.capSend.connect(caps.append, Qt.DirectConnection)
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        thread.start()
+        try:
+            start = perf_counter()
+            worker.textIntake.emit("It was")
+            worker.stopRequested.emit()
+            elapsed = perf_counter() - start
+            self.assertTrue(thread.wait(5000))
+        finally:
+            server.shutdown()
+            server.server_close()
+        # three chunks are sent, each taking 0.2 seconds on the worker thread
+        self.assertLess(elapsed, 0.1)
+        self.assertEqual(caps, ["It", "It ", "It was"])
+        self.assertEqual(received, caps)
+    def test_caption_send_interval(self):
+        received, connections = [], []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), caption_endpoint(received, connections))
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        def run_worker(texts, **kwargs):
+            caps = []
+            thread = QThread()
+            worker = captionWorker(**kwargs)
+            worker.moveToThread(thread)
+            worker.capSend.connect(caps.append, Qt.DirectConnection)
+            worker.finished.connect(thread.quit, Qt.DirectConnection)
+            thread.start()
+            for text in texts:
+                worker.textIntake.emit(text)
+            self.assertTrue(wait_for(lambda: all(sink.idle() for sink in worker.sinks)))
+            worker.stopRequested.emit()
+            self.assertTrue(thread.wait(5000))
+            return(caps)
+        try:
+            # first caption is sent at once, later ones within interval are replaced by latest
+            caps = run_worker(["It was", " a dark", " night"], max_length = 32, max_lines = 3, 
+                                remotes = [{"remote": "Microsoft Teams", "endpoint": f"http://127.0.0.1:{server.server_port}/caption?token=a", "send_interval": 200}])
+            self.assertEqual(caps[-1], "It was a dark night")
+            self.assertEqual(len(caps), 9)
+            self.assertEqual([body for path, body in received], ["It", "It was a dark night"])
+            # for Zoom, last caption of each line is sent, numbered in order
+            received.clear()
+            run_worker(["one two three four five six"], max_length = 10, max_lines = 1, remote = "Zoom", 
+                        endpoint = f"http://127.0.0.1:{server.server_port}/caption?token=a", send_interval = 200)
+            self.assertEqual([body for path, body in received], ["one", "one two ", "three four", "five six"])
+            self.assertEqual([path for path, body in received], [f"/caption?token=a&seq={i}&lang=en-US" for i in range(1, 5)])
+        finally:
+            server.shutdown()
+            server.server_close()
+    def test_caption_fan_out(self):
+        received, connections, slow = [], [], []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), caption_endpoint(received, connections))
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        release = threading.Event()
+        def slow_deliver(cap):
+            # endpoint does not answer until released
+            release.wait(5)
+            slow.append(cap)
+        caps = []
+        thread = QThread()
+        worker = captionWorker(max_length = 32, max_lines = 3, remotes = [{"remote": "Zoom", "endpoint": f"http://127.0.0.1:{server.server_port}/"}, 
+                                {"remote": "Microsoft Teams", "endpoint": "not a url"}, {"remote": "None"}])
+        # endpoint that cannot be set up is left out
+        self.assertEqual(len(worker.sinks), 1)
+        worker.sinks.append(caption_sink("slow", slow_deliver, interval = 0.1))
+        worker.moveToThread(thread)
+        worker.capSend.connect(caps.append, Qt.DirectConnection)
+        worker.finished.connect(thread.quit, Qt.DirectConnection)
+        thread.start()
+        try:
+            worker.textIntake.emit("It was a dark night")
+            # slow sink does not hold up display or other endpoints
+            self.assertTrue(wait_for(lambda: len(received) == 9))
+            self.assertEqual((slow, worker.sinks[1].busy), ([], True))
+            release.set()
+            self.assertTrue(wait_for(lambda: worker.sinks[1].idle()))
+            worker.stopRequested.emit()
+            self.assertTrue(thread.wait(5000))
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual([body for path, body in received], caps)
+        # first caption is sent at once, later ones are replaced by latest while it waits
+        self.assertEqual(slow, ["It", "It was a dark night"])
+        self.assertEqual(worker.sinks[1].replaced, 7)
+    def test_caption_client(self):
+        received, connections, messages = [], [], []
+        server = ThreadingHTTPServer(("127.0.0.1", 0), caption_endpoint(received, connections))
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        try:
+            client = caption_client(f"http://127.0.0.1:{server.server_port}/caption?token=a", message = messages.append)
+            for text, query in [("It", "&seq=1"), ("bad", "&seq=2"), ("It was", "&seq=3")]:
+                client.send(text, query)
+            client.close(timeout = 5)
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual([body for path, body in received], ["It", "bad", "It was"])
+        self.assertEqual(received[2][0], "/caption?token=a&seq=3")
+        self.assertEqual(len(connections), 1)
+        self.assertEqual((client.sent, client.dropped), (2, 1))
+        self.assertIn("error code 400", messages[0])
+        # endpoint is down, captions wait in bounded queue, and are sent in order when it is up
+        received.clear()
+        server = ThreadingHTTPServer(("127.0.0.1", 0), caption_endpoint(received, connections))
+        port = server.server_port
+        server.server_close()
+        client = caption_client(f"http://127.0.0.1:{port}/", backoff = (0.02, 0.05), max_queue = 3, message = messages.append)
+        for text in ["a", "b", "c", "d"]:
+            client.send(text)
+        self.assertTrue(wait_for(lambda: client.failures > 1))
+        self.assertFalse(client.online)
+        server = ThreadingHTTPServer(("127.0.0.1", port), caption_endpoint(received, connections))
+        threading.Thread(target = server.serve_forever, daemon = True).start()
+        try:
+            self.assertTrue(wait_for(lambda: client.sent == 3))
+            client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual([body for path, body in received], ["b", "c", "d"])
+        self.assertEqual(client.dropped, 1)
+        self.assertTrue(client.online)
+        self.assertIn("kept", messages[1])
+        self.assertIn("back", messages[2])
+    def test_resolved_style_table(self):
+        styles = deepcopy(default_styles)
+        styles["Quote"] = {"family": "paragraph", "parentstylename": "Answer", "textproperties": {"fontstyle": "italic"}}
+        style_table = resolved_style_table(styles)
+        for name in styles:
+            self.assertEqual(style_table[name]["paragraphproperties"], recursive_style_format(styles, name))
+            self.assertEqual(style_table[name]["textproperties"], recursive_style_format(styles, name, prop = "textproperties"))
+        self.assertTrue(style_table.char_format("Quote").font().italic())
+        self.assertIs(style_table.font_metrics("Quote"), style_table.font_metrics("Quote"))
+        # table keeps its own copy, edits make a new revision
+        styles["Normal"]["textproperties"]["fontsize"] = "20pt"
+        self.assertNotEqual(style_table["Quote"]["textproperties"]["fontsize"], "20pt")
+        new_table = resolved_style_table(styles, style_table.revision + 1)
+        self.assertEqual(new_table["Quote"]["textproperties"]["fontsize"], "20pt")
+        self.assertNotEqual(new_table.style_key("Quote"), style_table.style_key("Quote"))
+    def test_steno_wrap_plain_alignment(self):
+        for elements in wrap_corpus():
+            text = element_collection(elements).to_text()
+            for width, indent in [(20, ""), (35, "  "), (80, "")]:
+                wrapped = steno_wrap_plain(text, element_collection(deepcopy(elements)), max_char = width, 
+                                            first_line_indent = indent, par_indent = indent, starting_line_num = -1)
+                reference = wrap_plain_reference(text, element_collection(deepcopy(elements)), width, indent, indent)
+                self.assertEqual(wrapped, reference)
+        # expanded tab in text but not in elements
+        elements = [automatic_text(prefix = "Q.\t", stroke = "STKPWHR", time = "2023-01-01T09:00:00.000")] + wrap_corpus(1, 1)[0]
+        style = {"paragraphproperties": {"textindent": "0.5in", "tabstop": "1in"}, "textproperties": {}}
+        wrapped = format_text(element_collection(elements), style, 30, -1)
+        self.assertTrue(wrapped[0]["text"].startswith("     Q.   "))
+        self.assertEqual(wrapped[0]["time"], "2023-01-01T09:00:00.000")
+        self.assertEqual(sorted(v["time"] for v in wrapped.values()), [v["time"] for v in wrapped.values()])
     def element_addition(self):
         el1 = text_element("ABC")
         el2 = text_element("DEF")
@@ -274,6 +766,62 @@ class TestTextEdit(unittest.TestCase):
         self.assertEqual(cursor.block().blockFormat().textIndent(), 0.5 * 96)
         tabs = [tab.position for tab in cursor.block().blockFormat().tabPositions()]
         self.assertEqual(96 in tabs, True)
+    def step_HeadingNavigation(self):
+        one_text = {0: {"style": "Normal", "strokes": [{"data": "ABC", "element": "stroke", "stroke": "S-", "time": "2000-01-01T00:00:00.001"},
+                                                         {"data": "\n", "element": "stroke", "stroke": "R-R", "time": "2000-01-01T00:00:00.002"}]},
+                    1: {"style": "Question", "strokes": [{"data": "DEF", "element": "stroke", "stroke": "-T", "time": "2000-01-01T00:00:00.002"}]}}
+        self.editor.textEdit.undo_stack.setClean()
+        save_json(one_text, self.editor.textEdit.file_name.joinpath(self.editor.textEdit.file_name.stem).with_suffix(".transcript"))
+        self.editor.close_file()
+        self.editor.open_file(pathlib.Path(self.temp_dir) / "test")
+        model = self.editor.textEdit.heading_model
+        self.assertEqual(model.rowCount(), 0)
+        heading_style = dict(self.editor.textEdit.styles["Question"])
+        heading_style["defaultoutlinelevel"] = "1"
+        self.editor.textEdit.set_style_properties("Question", heading_style)
+        self.assertEqual(model.rowCount(), 1)
+        self.assertEqual(model.index(0).data(Qt.UserRole), 1)
+        cursor = self.editor.textEdit.textCursor()
+        cursor.setPosition(1)
+        self.editor.textEdit.setTextCursor(cursor)
+        self.editor.textEdit.split_paragraph()
+        self.assertEqual(model.index(0).data(Qt.UserRole), 2)
+        self.editor.textEdit.undo_stack.undo()
+        self.assertEqual(model.index(0).data(Qt.UserRole), 1)
+        self.editor.textEdit.undo_stack.undo()
+        self.assertEqual(model.rowCount(), 0)
+    def step_IndexRegistry(self):
+        self.editor.textEdit.clear_transcript()
+        el = index_text(prefix = "Exhibit", indexname = "0", description = "first", hidden = False, text = "A")
+        self.editor.textEdit.insert_index_entry(element_collection([el]))
+        self.assertEqual(self.editor.textEdit.element_registry.count("index", "0"), 1)
+        present_index = self.editor.textEdit.extract_indexes()
+        self.assertEqual(present_index["0"]["entries"]["A"], "first")
+        self.editor.textEdit.undo_stack.undo()
+        self.assertEqual(self.editor.textEdit.extract_indexes(), {})
+        self.editor.textEdit.clear_transcript()
+    def step_AutoAffixSplit(self):
+        one_text = {0: {"style": "Normal", "strokes": [{"data": "ABC", "element": "stroke", "stroke": "S-", "time": "2000-01-01T00:00:00.001"}]}}
+        self.editor.textEdit.undo_stack.setClean()
+        save_json(one_text, self.editor.textEdit.file_name.joinpath(self.editor.textEdit.file_name.stem).with_suffix(".transcript"))
+        self.editor.close_file()
+        self.editor.open_file(pathlib.Path(self.temp_dir) / "test")
+        config = self.editor.textEdit.config
+        enabled = config["enable_automatic_affix"]
+        config["enable_automatic_affix"] = True
+        self.editor.textEdit.auto_paragraph_affixes["Normal"] = {"prefix": "", "suffix": "."}
+        try:
+            cursor = self.editor.textEdit.textCursor()
+            cursor.setPosition(1)
+            self.editor.textEdit.setTextCursor(cursor)
+            self.editor.textEdit.split_paragraph()
+            # new line stroke of first paragraph is automatic text
+            self.assertEqual(self.editor.textEdit.element_registry.blocks_with("automatic"), [0])
+            self.editor.textEdit.undo_stack.undo()
+            self.assertEqual(self.editor.textEdit.element_registry.count("automatic"), 0)
+        finally:
+            config["enable_automatic_affix"] = enabled
+            self.editor.textEdit.auto_paragraph_affixes.pop("Normal")
     def step_loadNewStyle(self):
         pass
     def step_ColorHighlight(self):
@@ -299,7 +847,10 @@ class testDialogWindow(QDialog, Ui_testDialog):
                     "step_SplitParSpace": "Split paragraph with space involved and undo",
                     "step_MergePar": "Merge paragraph, space involved, and undo",
                     "step_CheckStyleAttr": "Text properly styled when loaded",
-                    "step_ChangeStyle": "Text properly styled when style changed manually"}
+                    "step_ChangeStyle": "Text properly styled when style changed manually",
+                    "step_HeadingNavigation": "Heading navigation follows style change, split and undo",
+                    "step_IndexRegistry": "Index entries found through element registry, and undo",
+                    "step_AutoAffixSplit": "Split paragraph with automatic suffix tracked by element registry, and undo"}
         last = len(self.selection)
         counter = 0
         for i, des in self.selection.items():